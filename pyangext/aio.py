@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""Awaitable versions of the blocking ``pyangext`` operations.
+
+Parsing, validating and dumping YANG are CPU-bound operations that would
+stall an ``asyncio`` event loop. The coroutines in this module dispatch
+them to a managed executor (threads or processes), limiting the number of
+operations running at the same time. Contexts are borrowed from a
+:class:`~pyangext.pool.ContextPool` in each worker.
+
+Cancelling (or timing out) an operation that is still waiting for a slot
+prevents it from running at all. Operations already running in a worker
+cannot be interrupted, but their result is discarded (they keep their
+slot until they finish).
+
+This module requires Python 3.5+ (it is not available in older
+versions, which do not support the ``async``/``await`` syntax).
+
+Example:
+    ::
+
+        async with Runner(max_workers=4, max_concurrency=16) as runner:
+            ast = await runner.parse(snippet, 'models', max_line_len=80)
+            errors, warnings = await runner.validate(module_text, 'models')
+            text = await runner.dump(ast, timeout=5)
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from . import utils
+from .pool import ContextPool
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['Runner', 'parse', 'validate', 'dump']
+
+_CONTEXTS = ContextPool()
+"""Contexts available for the operations running in this process"""
+
+
+def _parse_job(text, path, options):
+    """Parse a YANG text (runs inside the executor)"""
+    with _CONTEXTS.context(path, **options) as ctx:
+        return utils.parse_text(text, ctx)
+
+
+def _validate_job(text, path, options, rescue):
+    """Add and validate a YANG module (runs inside the executor)"""
+    with _CONTEXTS.context(path, **options) as ctx:
+        module = ctx.add_module('input-module', text)
+        ctx.validate()
+        modules = None
+        if module is not None:  # errors in included submodules count too
+            modules = [module] + [
+                other for other in ctx.modules.values()
+                if getattr(other, 'i_including_modulename', None) ==
+                module.arg]
+        return utils.check(ctx, rescue=rescue, modules=modules)
+
+
+def _dump_job(node, prev_indent, indent_string):
+    """Generate the text representation of a tree (runs inside the executor)
+    """
+    return utils.dump(
+        node, prev_indent=prev_indent, indent_string=indent_string)
+
+
+class Runner(object):
+    """Run ``pyangext`` operations in an executor.
+
+    Arguments:
+        max_workers (int): number of threads or processes in the executor
+        processes (bool): use a pool of processes instead of threads.
+            Trees are transferred between processes using ``pickle``.
+        max_concurrency (int): maximum number of operations submitted to
+            the executor at the same time, the remaining ones wait.
+            By default, the number of workers (or unlimited, if the number
+            of workers is not given).
+        executor (concurrent.futures.Executor): use an existing executor
+            instead of creating a new one (it is not shut down by
+            :meth:`close`)
+    """
+
+    def __init__(self, max_workers=None, processes=False,
+                 max_concurrency=None, executor=None):
+        self._own_executor = executor is None
+        if executor is None:
+            factory = ProcessPoolExecutor if processes else ThreadPoolExecutor
+            executor = factory(max_workers)
+        self.executor = executor
+        self.max_concurrency = max_concurrency or max_workers
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        self.close()
+
+    def close(self, wait=True):
+        """Shut down the executor (if created by this runner)"""
+        if self._own_executor:
+            self.executor.shutdown(wait=wait)
+
+    async def _run(self, job, timeout=None):
+        """Submit a job to the executor, respecting the concurrency limit"""
+        loop = asyncio.get_event_loop()
+        if self.max_concurrency is None:
+            future = loop.run_in_executor(self.executor, job)
+            return await asyncio.wait_for(future, timeout)
+
+        if self._semaphore is None:  # created inside the running loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._semaphore
+
+        def _release(future):
+            semaphore.release()
+            if not future.cancelled():
+                future.exception()  # nobody may be waiting for it anymore
+
+        async def _limited():
+            await semaphore.acquire()
+            try:
+                future = loop.run_in_executor(self.executor, job)
+            except BaseException:
+                semaphore.release()
+                raise
+            # the slot is just released when the job finishes, even if
+            # the caller gives up waiting (jobs cannot be interrupted)
+            future.add_done_callback(_release)
+            return await asyncio.shield(future)
+
+        return await asyncio.wait_for(_limited(), timeout)
+
+    async def parse(self, text, path='.', timeout=None, **options):
+        """Parse YANG text into an Abstract Syntax subtree.
+
+        Arguments:
+            text (str): YANG content
+            path (str): location of YANG modules for the context
+            timeout (float): seconds to wait before cancelling
+            **options: context options, see
+                :func:`~pyangext.utils.create_context`
+
+        See Also:
+            function :func:`pyangext.utils.parse_text`
+        """
+        return await self._run(
+            partial(_parse_job, text, path, options), timeout)
+
+    async def validate(self, text, path='.', rescue=False, timeout=None,
+                       **options):
+        """Validate a YANG module.
+
+        Arguments:
+            text (str): YANG (or YIN) content of the module
+            path (str): location of the modules it depends on
+            rescue (bool): if ``True``, no exception/warning will be raised
+            timeout (float): seconds to wait before cancelling
+            **options: context options, see
+                :func:`~pyangext.utils.create_context`
+
+        Returns:
+            tuple: (list of errors, list of warnings) found in the module,
+            see :func:`~pyangext.utils.check`
+        """
+        # pylint: disable=too-many-arguments
+        return await self._run(
+            partial(_validate_job, text, path, options, rescue), timeout)
+
+    async def dump(self, node, prev_indent='', indent_string='  ',
+                   timeout=None):
+        """Generate a string representation of an abstract syntax tree.
+
+        See Also:
+            function :func:`pyangext.utils.dump`
+        """
+        return await self._run(
+            partial(_dump_job, node, prev_indent, indent_string), timeout)
+
+
+_RUNNER = None
+"""Runner shared by the module-level functions"""
+
+
+def _default_runner():
+    global _RUNNER  # pylint: disable=global-statement
+    if _RUNNER is None:
+        _RUNNER = Runner()
+    return _RUNNER
+
+
+async def parse(text, path='.', timeout=None, **options):
+    """Parse YANG text in a shared thread pool.
+
+    See Also:
+        method :meth:`Runner.parse`
+    """
+    return await _default_runner().parse(text, path, timeout, **options)
+
+
+async def validate(text, path='.', rescue=False, timeout=None, **options):
+    """Validate a YANG module in a shared thread pool.
+
+    See Also:
+        method :meth:`Runner.validate`
+    """
+    return await _default_runner().validate(
+        text, path, rescue, timeout, **options)
+
+
+async def dump(node, prev_indent='', indent_string='  ', timeout=None):
+    """Dump a tree in a shared thread pool.
+
+    See Also:
+        method :meth:`Runner.dump`
+    """
+    return await _default_runner().dump(
+        node, prev_indent, indent_string, timeout)
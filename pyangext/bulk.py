@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""Bulk operations over many YANG modules.
+
+Parsing is the most expensive step of loading a module, and it is
+independent for each file. :func:`load_modules` distributes it across a
+pool of worker processes, then adds the resulting trees to a single
+context (where validation takes place), respecting the dependencies
+between them.
+
+:func:`dump_all` regenerates the YANG text of many modules into a
+directory, also in worker processes, skipping the ones that did not
+change since the previous run.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+from os.path import basename, join, realpath, splitext
+
+import pyang
+from pyang import util
+from pyang.error import Position, err_add
+
+from .cache import _PARSER_OPTIONS, ModuleCache, _atomic_write
+from .dependencies import DependencyGraph
+from .parser import get_parser
+from .utils import _read_file, check, create_context, dump, objectify
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['load_modules', 'dump_all']
+
+_EMIT_OPTIONS = [
+    'yang_canonical',
+    'yang_remove_unused_imports',
+]
+"""Context options that change the text generated by :func:`dump_all`"""
+
+MANIFEST = '.pyangext-dump.json'
+"""File (inside the output directory) that records the fingerprints of the
+sources of the generated files"""
+
+
+def _map(func, jobs, workers=None):
+    """Run jobs in a pool of worker processes (or in the current process
+    if just a single worker is requested)"""
+    workers = workers or multiprocessing.cpu_count()
+    if workers <= 1 or len(jobs) <= 1:
+        return [func(job) for job in jobs]
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        return pool.map(func, jobs, chunksize)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _parse_file(job):
+    """Parse a single file (runs inside the worker processes).
+
+    Arguments:
+        job (tuple): (file name, dict with parser options, cache directory,
+            parser backend name)
+
+    Returns:
+        tuple: (file name, parsed tree, parser errors, text). The text is
+        just returned if the file cannot be parsed as YANG (e.g. YIN).
+    """
+    (filename, options, cache_dir, parser_name) = job
+    try:
+        text = _read_file(filename)
+    except (IOError, UnicodeDecodeError) as ex:
+        errors = []
+        err_add(errors, Position(filename), 'READ_ERROR', str(ex))
+        return (filename, None, errors, None)
+
+    if util.guess_format(text) != 'yang':
+        return (filename, None, [], text)
+
+    ctx = objectify(options, errors=[])
+    parser = get_parser(parser_name)
+    if cache_dir:
+        module = ModuleCache(cache_dir).parse(ctx, filename, text, parser)
+    else:
+        module = parser.parse(ctx, filename, text)
+
+    return (filename, module, ctx.errors, None)
+
+
+def _dependency_order(modules):
+    """Sort parsed trees so dependencies come before dependents"""
+    graph = DependencyGraph.from_statements(modules)
+    rank = dict(
+        (name, i) for i, name in enumerate(graph.topological_order()))
+
+    return sorted(modules, key=lambda module: rank[module.arg])
+
+
+def _register(ctx, module):
+    """Make the repository entries for a module point to its parsed tree.
+
+    This avoids the file being parsed again by ``pyang`` when it is
+    imported/included by other modules.
+    """
+    rev = util.get_latest_revision(module)
+    ref = module.pos.ref
+    revs = ctx.revs.setdefault(module.arg, [])
+    parsed = ('parsed', module, ref, None)
+
+    found = False
+    for i, (_, handle) in enumerate(revs):
+        if (handle is not None and handle[0] != 'parsed' and
+                realpath(handle[1]) == realpath(ref)):
+            revs[i] = (rev, parsed)
+            found = True
+
+    if not found:
+        revs.append((rev, parsed))
+
+
+def load_modules(paths, ctx=None, workers=None, rescue=False):
+    """Load and validate several YANG modules at once.
+
+    Files are parsed concurrently in a pool of worker processes. The
+    parsed trees are then added to the context in dependency order
+    (imported/included modules first), so each module is validated once
+    and no file is parsed twice.
+
+    Arguments:
+        paths (list): names of the files containing YANG modules
+        ctx (pyang.Context): context where modules will be added. If not
+            specified, a new one is created with default options.
+        workers (int): number of worker processes, by default the number
+            of CPUs. With ``1`` everything runs in the current process.
+        rescue (bool): if ``True``, no exception/warning will be raised
+            for the diagnostics found.
+
+    Returns:
+        tuple: (list of modules, in the same order of ``paths``, with
+        ``None`` for files that could not be loaded; diagnostics as
+        returned by :func:`~pyangext.utils.check`)
+    """
+    ctx = ctx or create_context()
+    options = dict(
+        (attr, getattr(ctx, attr, None)) for attr in _PARSER_OPTIONS)
+    cache_dir = getattr(ctx.opts, 'cache_dir', None)
+    parser_name = getattr(ctx.opts, 'parser', None)
+    jobs = [(filename, options, cache_dir, parser_name) for filename in paths]
+
+    results = _map(_parse_file, jobs, workers)
+
+    loaded = {}
+    trees = []
+    for (filename, module, errors, text) in results:
+        for (epos, etag, eargs) in errors:
+            err_add(ctx.errors, epos, etag, eargs)
+        if text is not None:  # not YANG, let pyang handle it
+            loaded[filename] = ctx.add_module(filename, text)
+        elif module is not None:
+            _register(ctx, module)
+            trees.append(module)
+
+    for module in _dependency_order(trees):
+        loaded[module.pos.ref] = ctx.add_parsed_module(module)
+
+    modules = [loaded.get(filename) for filename in paths]
+    ctx.validate()
+
+    return (modules, check(ctx, rescue=rescue))
+
+
+def _output_name(filename):
+    """Name of the file generated for a source file"""
+    return splitext(basename(filename))[0] + '.yang'
+
+
+def _fingerprint(text, settings):
+    """Hash of a source text, combined with everything that affects the
+    generated text"""
+    digest = hashlib.sha1()
+    digest.update(repr([pyang.__version__] + settings).encode('utf-8'))
+    digest.update(text.encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def _load_manifest(out_dir):
+    """Fingerprints recorded by the previous run, by output file name"""
+    try:
+        with io.open(join(out_dir, MANIFEST), 'r', encoding='utf-8') as fp:
+            manifest = json.load(fp)
+    except (IOError, OSError, ValueError):
+        return {}
+
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _write_text(path, text):
+    """Write a generated file, so readers never see partial content"""
+    _atomic_write(path, text.encode('utf-8'))
+
+
+def _dump_file(job):
+    """Parse and dump a single file (runs inside the worker processes).
+
+    Arguments:
+        job (tuple): (file name, output file, fingerprint of the previous
+            run, settings, dict with parser options, parser backend name,
+            emit options)
+
+    Returns:
+        tuple: (file name, fingerprint, parser errors, status). Status is
+        ``written``, ``skipped`` (nothing changed) or ``failed``. Files
+        that cannot be parsed as YANG (e.g. YIN) have ``None`` status,
+        so they can be handled by ``pyang`` in the main process.
+    """
+    (filename, output, previous, settings,
+     options, parser_name, emit_options) = job
+    try:
+        text = _read_file(filename)
+    except (IOError, UnicodeDecodeError) as ex:
+        errors = []
+        err_add(errors, Position(filename), 'READ_ERROR', str(ex))
+        return (filename, None, errors, 'failed')
+
+    fingerprint = _fingerprint(text, settings)
+    if fingerprint == previous and os.path.exists(output):
+        return (filename, fingerprint, [], 'skipped')
+
+    if util.guess_format(text) != 'yang':
+        return (filename, fingerprint, [], None)
+
+    ctx = objectify(options, errors=[])
+    module = get_parser(parser_name).parse(ctx, filename, text)
+    if module is None:
+        return (filename, fingerprint, ctx.errors, 'failed')
+
+    (prev_indent, indent_string) = settings[-2:]
+    _write_text(output, dump(
+        module, prev_indent=prev_indent, indent_string=indent_string,
+        ctx=objectify(opts=objectify(emit_options))))
+
+    return (filename, fingerprint, ctx.errors, 'written')
+
+
+def _dump_validated(ctx, jobs, workers):
+    """Generate files for modules that have to be validated before
+    being emitted (e.g. when unused imports should be removed).
+
+    Returns:
+        list: results (see :func:`_dump_file`) in the same order of
+        ``jobs``
+    """
+    results = [None] * len(jobs)
+    pending = []
+    for (i, job) in enumerate(jobs):
+        (filename, output, previous, settings) = job[:4]
+        try:
+            fingerprint = _fingerprint(_read_file(filename), settings)
+        except (IOError, UnicodeDecodeError):
+            fingerprint = None  # reported by load_modules
+        if fingerprint == previous and os.path.exists(output):
+            results[i] = (filename, fingerprint, [], 'skipped')
+        else:
+            pending.append((i, job, fingerprint))
+
+    (modules, _) = load_modules(
+        [job[0] for (_, job, _) in pending], ctx, workers, rescue=True)
+    for ((i, job, fingerprint), module) in zip(pending, modules):
+        (filename, output, _, settings) = job[:4]
+        if module is None:
+            results[i] = (filename, None, [], 'failed')
+            continue
+        (prev_indent, indent_string) = settings[-2:]
+        _write_text(output, dump(module, prev_indent=prev_indent,
+                                 indent_string=indent_string, ctx=ctx))
+        results[i] = (filename, fingerprint, [], 'written')
+
+    return results
+
+
+def dump_all(paths, out_dir, ctx=None, workers=None, prev_indent='',
+             indent_string='  ', force=False, rescue=False):
+    """Generate the YANG text of several modules into a directory.
+
+    Each file is parsed and emitted (see :func:`~pyangext.utils.dump`)
+    in a pool of worker processes and written atomically to ``out_dir``,
+    with the same base name (and ``.yang`` extension). A manifest
+    (:data:`MANIFEST`) records the fingerprint of each source, combined
+    with the emit options, so files whose sources and options did not
+    change since the previous run are skipped.
+
+    The emit options are taken from the context (``yang_canonical`` and
+    ``yang_remove_unused_imports``, see
+    :func:`~pyangext.utils.create_context`). Removing unused imports
+    requires validation, so in this case modules are loaded with
+    :func:`load_modules` and emitted in the current process.
+
+    Arguments:
+        paths (list): names of the files containing YANG modules
+        out_dir (str): directory where the files are generated
+        ctx (pyang.Context): context with the parser and emit options.
+            If not specified, a new one is created with default options.
+        workers (int): number of worker processes, by default the number
+            of CPUs. With ``1`` everything runs in the current process.
+        prev_indent (str): string to be added to the produced indentation
+        indent_string (str): string to be used as indentation
+        force (bool): generate all the files, even the unchanged ones
+        rescue (bool): if ``True``, no exception/warning will be raised
+            for the diagnostics found.
+
+    Returns:
+        tuple: (list of files written, list of files skipped, diagnostics
+        as returned by :func:`~pyangext.utils.check`). Files are the ones
+        generated inside ``out_dir``.
+
+    Raises:
+        ValueError: if two sources would generate the same file
+    """
+    # pylint: disable=too-many-arguments,too-many-locals
+    ctx = ctx or create_context()
+    outputs = [join(out_dir, _output_name(filename)) for filename in paths]
+    if len(set(outputs)) < len(outputs):
+        raise ValueError('sources with the same name would overwrite '
+                         'each other in ' + out_dir)
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    options = dict(
+        (attr, getattr(ctx, attr, None)) for attr in _PARSER_OPTIONS)
+    emit_options = dict(
+        (attr, bool(getattr(ctx.opts, attr, False)))
+        for attr in _EMIT_OPTIONS)
+    parser_name = getattr(ctx.opts, 'parser', None)
+    # indentation goes last, workers read it from there
+    settings = [sorted(options.items()), sorted(emit_options.items()),
+                prev_indent, indent_string]
+
+    manifest = {} if force else _load_manifest(out_dir)
+    jobs = [(filename, output, manifest.get(basename(output)), settings,
+             options, parser_name, emit_options)
+            for (filename, output) in zip(paths, outputs)]
+
+    if emit_options['yang_remove_unused_imports']:
+        results = _dump_validated(ctx, jobs, workers)
+    else:
+        results = _map(_dump_file, jobs, workers)
+
+    written = []
+    skipped = []
+    for ((filename, fingerprint, errors, status), output) in zip(
+            results, outputs):
+        for (epos, etag, eargs) in errors:
+            err_add(ctx.errors, epos, etag, eargs)
+        if status is None:  # not YANG, let pyang handle it
+            module = ctx.add_module(filename, _read_file(filename))
+            if module is not None:
+                _write_text(output, dump(module, prev_indent=prev_indent,
+                                         indent_string=indent_string,
+                                         ctx=ctx))
+                status = 'written'
+
+        name = basename(output)
+        if status == 'written':
+            written.append(output)
+            manifest[name] = fingerprint
+        elif status == 'skipped':
+            skipped.append(output)
+        else:
+            manifest.pop(name, None)
+
+    _write_text(join(out_dir, MANIFEST),
+                json.dumps(manifest, indent=2, sort_keys=True))
+
+    return (written, skipped, check(ctx, rescue=rescue))
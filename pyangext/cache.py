@@ -0,0 +1,542 @@
+# -*- coding: utf-8 -*-
+"""Caching layers for expensive ``pyang`` operations.
+
+:class:`ModuleCache` persists parsed (but not yet validated) statement
+trees in a directory, so the text of modules that have not changed
+between runs do not need to be tokenized and parsed again.
+
+:class:`ParseCache` keeps parsed trees in memory, for programs that parse
+the same fragments over and over.
+
+:class:`RenderCache` keeps the YANG text emitted for subtrees, so
+:func:`~pyangext.utils.dump` does not need to emit unchanged statements
+again.
+
+Example:
+    ::
+
+        ctx = create_context('models', cache_dir='~/.cache/pyangext')
+        ctx.add_module(filename, text)  # second run: deserialization only
+        print(ctx.module_cache.stats)
+
+        cache = ParseCache(max_entries=512)
+        for fragment in fragments:
+            parse(fragment, ctx, cache=cache)  # repeated: copy of the tree
+
+        renders = RenderCache()
+        for output in outputs:
+            dump(grouping, output, cache=renders)  # repeated: cached text
+"""
+import copy
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from os.path import expanduser, isdir, join
+from tempfile import mkstemp
+
+import pyang
+from pyang.error import Position, err_add
+from pyang.yang_parser import YangParser
+
+from . import serialize
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['ModuleCache', 'ParseCache', 'RenderCache']
+
+ENTRY_EXTENSION = '.pyx{}'.format(serialize.FORMAT_VERSION)
+"""Extension of persisted entries, changes with the serialization format"""
+
+_PARSER_OPTIONS = [
+    'max_line_len',
+    'keep_comments',
+    'lax_quote_checks',
+]
+"""Context attributes that change the outcome of the YANG parser"""
+
+_rename = getattr(os, 'replace', os.rename)  # python 2 has no os.replace
+
+
+def _atomic_write(path, data):
+    """Write binary data to a file, so readers never see partial content"""
+    directory = os.path.dirname(path)
+    if not isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:  # created concurrently
+            pass
+
+    fd, tmp_path = mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with io.open(fd, 'wb') as fp:
+            fp.write(data)
+        _rename(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+def _digest(ctx, ref, text):
+    """Hash of a text, combined with everything that affects its parsing"""
+    digest = hashlib.sha1()
+    header = [pyang.__version__, sys.version_info[0], ref] + [
+        getattr(ctx, attr, None) for attr in _PARSER_OPTIONS]
+    digest.update(repr(header).encode('utf-8'))
+    digest.update(text.encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def _parse(ctx, ref, text, parser=None):
+    """Parse a text, capturing just the errors produced by the parser.
+
+    Returns:
+        tuple: (parsed tree or ``None``, list of errors)
+    """
+    old_errors = ctx.errors
+    ctx.errors = type(old_errors)()
+    try:
+        module = (parser or YangParser()).parse(ctx, ref, text)
+        return (module, list(ctx.errors))
+    finally:
+        ctx.errors = old_errors
+
+
+def _encode_entry(module, errors):
+    """Persisted form of a parsed tree and its errors.
+
+    The errors are stored as a JSON line, followed by the tree in the
+    binary format of :mod:`pyangext.serialize`.
+    """
+    records = [
+        [epos.ref, epos.line, epos.top is module and module is not None,
+         etag, list(eargs) if isinstance(eargs, tuple) else eargs]
+        for (epos, etag, eargs) in errors]
+    header = json.dumps(records, separators=(',', ':')).encode('utf-8')
+    tree = b'' if module is None else serialize.dumps(
+        module, annotations=_annotations(module))
+
+    return header + b'\n' + tree
+
+
+def _decode_entry(data):
+    """Revert :func:`_encode_entry`"""
+    (header, _, tree) = data.partition(b'\n')
+    module = serialize.loads(tree) if tree else None
+    errors = []
+    for (ref, line, top, etag, eargs) in json.loads(header.decode('utf-8')):
+        epos = Position(ref)
+        epos.line = line
+        epos.top = module if top else None
+        errors.append(
+            (epos, etag, tuple(eargs) if isinstance(eargs, list) else eargs))
+
+    return (module, errors)
+
+
+def _annotations(root):
+    """Names of the ``i_`` attributes found in a tree"""
+    names = set()
+    stack = [root]
+    while stack:
+        stmt = stack.pop()
+        names.update(attr for attr in vars(stmt) if attr.startswith('i_'))
+        stack.extend(stmt.substmts)
+
+    return sorted(names)
+
+
+def _replay(ctx, errors):
+    """Add previously captured errors to a context"""
+    for (epos, etag, eargs) in errors:
+        err_add(ctx.errors, epos, etag, eargs)
+
+
+class ModuleCache(object):
+    """Persistent cache of parsed YANG modules.
+
+    Entries are keyed by the SHA-1 hash of the module text, combined with
+    the ``pyang`` version, the python major version, the reference
+    (file name) used for the module and the context options that affect
+    the parser. Each entry stores the statement tree right after parsing,
+    and the errors/warnings produced by the parser, which are replayed
+    in the context when the entry is reused. Entries are stored with
+    :mod:`pyangext.serialize` (no ``pickle``), so reading a cache
+    directory does not execute code.
+
+    Arguments:
+        directory (str): location where cache entries are stored
+
+    Attributes:
+        hits (int): number of times a parsed tree was reused
+        misses (int): number of times a text had to be parsed
+    """
+
+    def __init__(self, directory):
+        self.directory = expanduser(directory)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self):
+        """dict: hit and miss counters"""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def key(self, ctx, ref, text):
+        """Compute the key of the entry for a given text.
+
+        Arguments:
+            ctx (pyang.Context): context used for parsing
+            ref (str): identify the source of the text in error messages
+            text (str): YANG content
+
+        Returns:
+            str: hexadecimal digest
+        """
+        return _digest(ctx, ref, text)
+
+    def _path(self, key):
+        return join(self.directory, key[:2], key + ENTRY_EXTENSION)
+
+    def load(self, key):
+        """Retrieve the entry for a given key.
+
+        Returns:
+            tuple: (parsed tree, list of parser errors) or ``None``
+            if the entry does not exist or cannot be read.
+        """
+        try:
+            with io.open(self._path(key), 'rb') as fp:
+                data = fp.read()
+        except (IOError, OSError):  # missing entry
+            return None
+
+        try:
+            return _decode_entry(data)
+        except (ValueError, LookupError, TypeError):
+            # corrupted entry, allow it to be rewritten
+            return None
+
+    def store(self, key, module, errors):
+        """Persist the parsed tree and errors for a given key.
+
+        Entries that cannot be serialized (e.g. errors with arguments
+        that are not JSON compatible) are not persisted.
+        """
+        try:
+            data = _encode_entry(module, errors)
+        except (TypeError, ValueError):
+            return
+        try:
+            _atomic_write(self._path(key), data)
+        except (IOError, OSError):
+            pass  # caching is an optimization, failures are not fatal
+
+    def parse(self, ctx, ref, text, parser=None):
+        """Parse a YANG text, reusing previous results when possible.
+
+        Arguments:
+            ctx (pyang.Context): context used for parsing, parser errors
+                are added to ``ctx.errors``
+            ref (str): identify the source of the text in error messages
+            text (str): YANG content
+            parser: object with the same interface of ``YangParser``,
+                used when there is no cached entry
+
+        Returns:
+            pyang.statements.Statement: root of the tree or ``None`` on
+            failure
+        """
+        key = self.key(ctx, ref, text)
+        entry = self.load(key)
+        if entry is not None:
+            self.hits += 1
+            module, errors = entry
+        else:
+            self.misses += 1
+            (module, errors) = _parse(ctx, ref, text, parser)
+            self.store(key, module, errors)
+
+        _replay(ctx, errors)
+
+        return module
+
+
+def clone_tree(root, errors=()):
+    """Copy a (not validated) statement tree.
+
+    Statements are copied, while their attributes (keywords, arguments)
+    are shared, which is much cheaper than ``copy.deepcopy`` or parsing
+    the text again. References to the original statements (``top``,
+    ``parent`` and ``pos.top``) are replaced by the copies.
+
+    Arguments:
+        root (pyang.statements.Statement): root of the tree
+        errors (list): ``(position, tag, arguments)`` tuples whose
+            positions should also point to the copies
+
+    Returns:
+        tuple: (copy of the tree, copy of the errors, number of statements)
+    """
+    if root is None:
+        return (None, list(errors), 0)
+
+    copies = {}
+
+    def _new(stmt):
+        clone = object.__new__(type(stmt))
+        clone.__dict__.update(stmt.__dict__)
+        copies[id(stmt)] = clone
+        return clone
+
+    def _pos(pos):
+        if pos is None:
+            return None
+        clone = copy.copy(pos)
+        clone.top = copies.get(id(pos.top), pos.top)
+        return clone
+
+    new_root = _new(root)
+    stack = [(root, new_root)]
+    while stack:
+        (stmt, clone) = stack.pop()
+        clone.substmts = [_new(child) for child in stmt.substmts]
+        stack.extend(zip(stmt.substmts, clone.substmts))
+
+    for clone in copies.values():
+        clone.top = copies.get(id(clone.top), clone.top)
+        clone.parent = copies.get(id(clone.parent), clone.parent)
+        clone.pos = _pos(clone.pos)
+
+    return (new_root, [(_pos(epos), etag, eargs)
+                       for (epos, etag, eargs) in errors], len(copies))
+
+
+class ParseCache(object):
+    """In-memory LRU cache of parsed YANG texts.
+
+    Entries are keyed in the same way of :class:`ModuleCache`, and store a
+    pristine copy of the tree and the parser errors. Each lookup returns
+    a fresh copy of the tree (see :func:`clone_tree`), so callers are free
+    to validate or change it. The parser errors are replayed in the
+    context. Instances are thread-safe and can also be used as the
+    ``module_cache`` of a :class:`~pyangext.context.ExtendedContext`.
+
+    Arguments:
+        max_entries (int): maximum number of cached texts
+        max_bytes (int): maximum (estimated) memory used by the entries.
+            The estimate considers the size of the text and a fixed cost
+            per statement (:attr:`STATEMENT_SIZE`).
+
+    Attributes:
+        hits (int): number of times a parsed tree was reused
+        misses (int): number of times a text had to be parsed
+        evictions (int): number of entries discarded to respect the limits
+    """
+
+    STATEMENT_SIZE = 1024
+    """Estimated bytes used by each statement (objects, dict and position)"""
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        """dict: counters, number of entries and estimated size in bytes"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.size,
+        }
+
+    def key(self, ctx, ref, text):
+        """Compute the key of the entry for a given text.
+
+        See Also:
+            method :meth:`ModuleCache.key`
+        """
+        return _digest(ctx, ref, text)
+
+    def invalidate(self, key=None):
+        """Discard a single entry, or all of them if ``key`` is ``None``"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.size = 0
+            elif key in self._entries:
+                self.size -= self._entries.pop(key)[2]
+
+    def _store(self, key, entry):
+        """Add an entry, evicting the least recently used ones"""
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[2]
+            if entry[2] > self.max_bytes:
+                return  # too big to be cached
+            self._entries[key] = entry
+            self.size += entry[2]
+            while (len(self._entries) > self.max_entries or
+                   self.size > self.max_bytes):
+                (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted[2]
+                self.evictions += 1
+
+    def parse(self, ctx, ref, text, parser=None):
+        """Parse a YANG text, reusing previous results when possible.
+
+        Arguments:
+            ctx (pyang.Context): context used for parsing, parser errors
+                are added to ``ctx.errors``
+            ref (str): identify the source of the text in error messages
+            text (str): YANG content
+            parser: object with the same interface of ``YangParser``,
+                used when there is no cached entry
+
+        Returns:
+            pyang.statements.Statement: root of the tree or ``None`` on
+            failure
+        """
+        key = self.key(ctx, ref, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = self._entries.pop(key)  # most recent
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry is not None:
+            (module, errors, _) = clone_tree(entry[0], entry[1])
+        else:
+            (module, errors) = _parse(ctx, ref, text, parser)
+            (pristine, pristine_errors, count) = clone_tree(module, errors)
+            size = len(text) + count * self.STATEMENT_SIZE
+            self._store(key, (pristine, pristine_errors, size))
+
+        _replay(ctx, errors)
+
+        return module
+
+
+class RenderCache(object):
+    """In-memory LRU cache of YANG text emitted for statement subtrees.
+
+    Entries are keyed by a structural fingerprint of the subtree (keywords
+    and arguments of all its statements, but not their positions) combined
+    with the emitter settings (indentation, canonical order, etc), so the
+    text is reused for identical subtrees, even in different trees, while
+    any change in a statement just invalidates the text of the statement
+    and its ancestors. Instances are thread-safe.
+
+    Arguments:
+        max_bytes (int): maximum (estimated) memory used by the cached
+            texts, least recently used entries are evicted first
+
+    Attributes:
+        hits (int): number of times a text was reused
+        misses (int): number of times a subtree had to be emitted
+        evictions (int): number of entries discarded to respect the limit
+    """
+
+    ENTRY_SIZE = 128
+    """Estimated bytes used by each entry, besides the text itself"""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        """dict: counters, number of entries and estimated size in bytes"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.size,
+        }
+
+    @staticmethod
+    def fingerprints(root):
+        """Compute the structural fingerprints of all the statements in a tree.
+
+        Fingerprints are (64-bit on most platforms) hashes combining the
+        keyword and argument of each statement with the fingerprints of
+        its substatements. They are much cheaper than cryptographic
+        digests, so checking a tree costs less than emitting it again.
+
+        Returns:
+            dict: fingerprints (int), indexed by ``id`` of the statements
+        """
+        fingerprints = {}
+        stack = [(root, False)]
+        while stack:
+            (stmt, expanded) = stack.pop()
+            if expanded:  # substatements already visited
+                fingerprints[id(stmt)] = hash((
+                    stmt.keyword, stmt.raw_keyword, stmt.arg,
+                    tuple([fingerprints[id(child)]
+                           for child in stmt.substmts])))
+            else:
+                stack.append((stmt, True))
+                stack.extend((child, False) for child in stmt.substmts)
+
+        return fingerprints
+
+    def invalidate(self):
+        """Discard all the entries"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def get(self, key):
+        """Retrieve the text for a key, or ``None``"""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+            else:
+                self._entries[key] = self._entries.pop(key)  # most recent
+                self.hits += 1
+            return text
+
+    def put(self, key, text):
+        """Store the text for a key, evicting the least recently used ones"""
+        size = len(text) + self.ENTRY_SIZE
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key)) + self.ENTRY_SIZE
+            if size > self.max_bytes:
+                return  # too big to be cached
+            self._entries[key] = text
+            self.size += size
+            while self.size > self.max_bytes:
+                (_, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted) + self.ENTRY_SIZE
+                self.evictions += 1
@@ -59,12 +59,17 @@ Command Line Interface
   Commands:
     :``call``: invoke pyang script with plugin path adjusted using
         auto-discovery.
+    :``watch``: keep YANG files validated, reporting new and resolved
+        diagnostics whenever they change.
+    :``dump``: regenerate the YANG text of many modules into a directory,
+        in parallel, skipping the unchanged ones.
 
 .. |example| raw:: html
 
    <code><pre>eval $(pyangext --export-path)</pre></code>
 """
 import sys
+import time
 from os import environ
 from os.path import pathsep
 from subprocess import Popen
@@ -156,3 +161,89 @@ def call_pyang(args):
     proc = Popen(['pyang'] + list(args), stdout=sys.stdout, stderr=sys.stderr)
     proc.wait()
     return proc.returncode
+
+
+def _create_context(path, **kwargs):
+    """Create a context for the commands that use pyang.
+
+    ``pyang`` (and the modules depending on it) are imported lazily, just
+    by these commands, since it is not required by the other ones.
+    """
+    from .utils import create_context
+
+    return create_context(path, **kwargs)
+
+
+@call.command('watch')
+@click.argument('files', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    '-p', '--path', default='.', show_default=True,
+    help='Search path for imported/included YANG modules.')
+@click.option(
+    '-i', '--interval', default=1.0, show_default=True,
+    help='Seconds between checks for changes.')
+@click.option(
+    '--once', is_flag=True, help='Validate once and exit.')
+def watch(files, path, interval, once):
+    """watch YANG files (or directories) and incrementally revalidate them.
+
+    Only changed modules and the ones depending on them are validated again.
+    """
+    from .session import Session
+
+    session = Session(files, _create_context(path))
+    while True:
+        delta = session.refresh()
+        if delta or once:
+            for line in delta.report():
+                click.echo(line)
+        if once:
+            return
+        time.sleep(interval)
+
+
+@call.command('dump')
+@click.argument('files', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    '-o', '--output', required=True, type=click.Path(file_okay=False),
+    help='Directory where the files are generated.')
+@click.option(
+    '-p', '--path', default='.', show_default=True,
+    help='Search path for imported/included YANG modules.')
+@click.option(
+    '-j', '--workers', type=int,
+    help='Number of worker processes (default: number of CPUs).')
+@click.option(
+    '--canonical', is_flag=True,
+    help='Print statements according to the canonical order.')
+@click.option(
+    '--remove-unused-imports', is_flag=True,
+    help='Remove unused import statements (modules are validated).')
+@click.option(
+    '--indent', default=2, show_default=True,
+    help='Number of spaces used for indentation.')
+@click.option(
+    '--force', is_flag=True, help='Regenerate even the unchanged files.')
+def dump_files(files, output, path, workers, **options):
+    """generate the YANG text of files (or directories) into a directory.
+
+    Files whose content and options did not change since the last run
+    are skipped.
+    """
+    from .bulk import dump_all
+    from .session import _expand
+
+    ctx = _create_context(
+        path, yang_canonical=options['canonical'],
+        yang_remove_unused_imports=options['remove_unused_imports'])
+    (written, skipped, (errors, warnings)) = dump_all(
+        _expand(files), output, ctx, workers,
+        indent_string=' ' * options['indent'], force=options['force'],
+        rescue=True)
+
+    for message in errors + warnings:
+        click.echo(message, err=True)
+    click.echo('{} file(s) written, {} unchanged'.format(
+        len(written), len(skipped)))
+    if errors:
+        sys.exit(1)
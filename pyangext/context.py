@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""``pyang`` context with a pluggable YANG parsing step.
+
+``pyang.Context`` instantiates ``YangParser`` directly inside
+``add_module`` and while peeking module revisions, so there is no way
+of intercepting the text-to-AST conversion. :class:`ExtendedContext`
+reproduces these two methods (code mostly borrowed from ``pyang``)
+delegating the parsing of YANG text to :meth:`ExtendedContext.parse_text`.
+"""
+from pyang import Context, error, util
+from pyang.yang_parser import YangParser
+from pyang.yin_parser import YinParser
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['ExtendedContext']
+
+
+class ExtendedContext(Context):
+    """Context that allows the parsing of YANG text to be customized.
+
+    Arguments:
+        repository (pyang.Repository): location of the YANG modules
+
+    Keyword Arguments:
+        module_cache (pyangext.cache.ModuleCache): cache of parsed
+            modules, used to avoid parsing the same text again.
+        yang_parser: object with the interface of ``YangParser``
+            (e.g. :class:`pyangext.parser.FastYangParser`), used instead
+            of ``YangParser``.
+    """
+
+    def __init__(self, repository, module_cache=None, yang_parser=None):
+        self.module_cache = module_cache
+        self.yang_parser = yang_parser
+        super(ExtendedContext, self).__init__(repository)
+
+    def parse_text(self, ref, text):
+        """Convert YANG text into an Abstract Syntax Tree.
+
+        Arguments:
+            ref (str): identify the source of the text in error messages
+            text (str): YANG content
+
+        Returns:
+            pyang.statements.Statement: root of the tree or ``None`` on
+            failure
+        """
+        parser = self.yang_parser or YangParser()
+        if self.module_cache is not None:
+            return self.module_cache.parse(self, ref, text, parser)
+
+        return parser.parse(self, ref, text)
+
+    def add_module(self, ref, text, format=None,
+                   expect_modulename=None, expect_revision=None,
+                   expect_failure_error=True):
+        # pylint: disable=redefined-builtin,too-many-arguments
+        """Parse a module text and add the module data to the context
+
+        See Also:
+            method ``pyang.Context.add_module``
+        """
+        if format is None:
+            format = util.guess_format(text)
+
+        if format == 'yin':
+            module = YinParser().parse(self, ref, text)
+        else:
+            module = self.parse_text(ref, text)
+
+        if module is None:
+            return None
+
+        if expect_modulename is not None and expect_modulename != module.arg:
+            if expect_failure_error:
+                error.err_add(self.errors, module.pos, 'BAD_MODULE_NAME',
+                              (module.arg, ref, expect_modulename))
+                return None
+            else:
+                error.err_add(self.errors, module.pos, 'WBAD_MODULE_NAME',
+                              (module.arg, ref, expect_modulename))
+
+        latest_rev = util.get_latest_revision(module)
+        if expect_revision is not None and expect_revision != latest_rev:
+            if expect_failure_error:
+                error.err_add(self.errors, module.pos, 'BAD_REVISION',
+                              (latest_rev, ref, expect_revision))
+                return None
+            else:
+                error.err_add(self.errors, module.pos, 'WBAD_REVISION',
+                              (latest_rev, ref, expect_revision))
+
+        if module.arg not in self.revs:
+            self.revs[module.arg] = [(latest_rev, None)]
+
+        return self.add_parsed_module(module)
+
+    def _ensure_revs(self, revs):
+        """Parse modules whose revision is not known from the file name"""
+        for i, (rev, handle) in enumerate(revs):
+            if rev is not None:
+                continue
+
+            try:
+                (ref, format_, text) = (
+                    self.repository.get_module_from_handle(handle))
+            except self.repository.ReadError:
+                continue
+
+            if format_ is None:
+                format_ = util.guess_format(text)
+
+            if format_ == 'yin':
+                yintext = text
+                module = YinParser(
+                    {'no_include': True, 'no_extensions': True}
+                ).parse(self, ref, text)
+            else:
+                yintext = None
+                module = self.parse_text(ref, text)
+
+            if module is not None:
+                rev = util.get_latest_revision(module)
+                revs[i] = (rev, ('parsed', module, ref, yintext))
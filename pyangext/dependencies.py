@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""Dependency graph between YANG modules.
+
+The dependencies of a module are declared in its header (``import``,
+``include`` and ``belongs-to`` statements), so they can be discovered
+without parsing the whole file: :func:`scan_header` stops as soon as the
+first body statement is found.
+
+Example:
+    ::
+
+        graph = DependencyGraph.from_path('models')
+        for name in graph.topological_order():
+            ...  # dependencies always come first
+        graph.reverse_closure('ietf-yang-types')  # what needs rebuilding
+"""
+import io
+
+from six import iteritems
+
+from pyang import FileRepository
+from pyang.error import Abort, Eof, Position
+from pyang.yang_parser import YangTokenizer
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['ModuleHeader', 'DependencyGraph', 'scan_header', 'scan_file']
+
+HEADER_KEYWORDS = frozenset([
+    'yang-version',
+    'namespace',
+    'prefix',
+    'belongs-to',
+    'import',
+    'include',
+    'organization',
+    'contact',
+    'description',
+    'reference',
+    'revision',
+])
+"""Statements that can appear before the body of a (sub)module"""
+
+
+class ModuleHeader(object):
+    """Information about a module that can be found in its header.
+
+    Attributes:
+        name (str): name of the module
+        keyword (str): ``module`` or ``submodule``
+        filename (str): location of the module text
+        revision (str): latest revision, or ``None``
+        imports (list): tuples ``(module name, revision-date or None)``
+        includes (list): tuples ``(submodule name, revision-date or None)``
+        belongs_to (str): name of the parent module for submodules
+    """
+    # pylint: disable=too-few-public-methods,too-many-arguments
+
+    def __init__(self, name, keyword='module', filename=None, revision=None,
+                 imports=None, includes=None, belongs_to=None):
+        self.name = name
+        self.keyword = keyword
+        self.filename = filename
+        self.revision = revision
+        self.imports = imports or []
+        self.includes = includes or []
+        self.belongs_to = belongs_to
+
+    def __repr__(self):
+        return '<{} {} {}>'.format(
+            type(self).__name__, self.keyword, self.name)
+
+    @property
+    def dependencies(self):
+        """list: names of imported and included modules"""
+        return [name for name, _ in self.imports + self.includes]
+
+    @classmethod
+    def from_statement(cls, module):
+        """Extract the header from an already parsed (sub)module"""
+        header = cls(module.arg, module.keyword, module.pos.ref)
+        for stmt in module.substmts:
+            header._record(  # pylint: disable=protected-access
+                stmt.keyword, stmt.arg,
+                [(child.keyword, child.arg) for child in stmt.substmts])
+
+        return header
+
+    def _record(self, keyword, arg, children):
+        """Store the information of a header statement"""
+        if keyword in ('import', 'include'):
+            revision = None
+            for (child_keyword, child_arg) in children:
+                if child_keyword == 'revision-date':
+                    revision = child_arg
+            target = self.imports if keyword == 'import' else self.includes
+            target.append((arg, revision))
+        elif keyword == 'belongs-to':
+            self.belongs_to = arg
+        elif keyword == 'revision':
+            if self.revision is None or arg > self.revision:
+                self.revision = arg
+
+
+def _read_block(tokenizer):
+    """Consume the sub-statements of a statement.
+
+    Returns:
+        list: tuples ``(keyword, argument)`` for the direct children
+    """
+    children = []
+    if tokenizer.peek() == ';':
+        tokenizer.skip_tok()
+        return children
+
+    tokenizer.skip_tok()  # skip '{'
+    while tokenizer.peek() != '}':
+        keyword = tokenizer.get_keyword()
+        arg = None if tokenizer.peek() in ('{', ';') else (
+            tokenizer.get_string())
+        _read_block(tokenizer)
+        children.append((keyword, arg))
+    tokenizer.skip_tok()  # skip '}'
+
+    return children
+
+
+def scan_header(text, ref='header-scan'):
+    """Read the header of a YANG (sub)module, ignoring its body.
+
+    The text is tokenized just until the first statement that is not
+    part of the header (e.g. ``typedef``, ``container``).
+
+    Arguments:
+        text (str): YANG content
+        ref (str): location of the text, stored as ``filename``
+
+    Returns:
+        ModuleHeader: header information or ``None`` if the text does not
+        start with a valid module/submodule statement.
+    """
+    tokenizer = YangTokenizer(text, Position(ref), [])
+    header = None
+    try:
+        keyword = tokenizer.get_keyword()
+        if keyword not in ('module', 'submodule'):
+            return None
+        header = ModuleHeader(tokenizer.get_string(), keyword, ref)
+        if tokenizer.peek() != '{':
+            return None
+        tokenizer.skip_tok()
+
+        while tokenizer.peek() != '}':
+            keyword = tokenizer.get_keyword()
+            if keyword not in HEADER_KEYWORDS and not isinstance(
+                    keyword, tuple):  # extensions may appear anywhere
+                break
+            arg = None if tokenizer.peek() in ('{', ';') else (
+                tokenizer.get_string())
+            header._record(  # pylint: disable=protected-access
+                keyword, arg, _read_block(tokenizer))
+    except (Abort, Eof):
+        pass  # the parser will report the syntax errors later
+
+    return header
+
+
+def scan_file(filename):
+    """Read the header of a YANG (sub)module file.
+
+    See Also:
+        function :func:`scan_header`
+    """
+    with io.open(filename, 'r', encoding='utf-8') as fp:
+        return scan_header(fp.read(), filename)
+
+
+class DependencyGraph(object):
+    """Graph of ``import``/``include`` relations between YANG modules.
+
+    Each node is identified by the module name (if several revisions of
+    the same module are added, the last one wins). Edges go from a module
+    to the modules it imports/includes. Dependencies not added to the
+    graph are still reported by the queries, but have no dependencies
+    themselves.
+
+    Arguments:
+        headers (list): :class:`ModuleHeader` objects
+    """
+
+    def __init__(self, headers=()):
+        self.headers = {}
+        self._dependents = None
+        for header in headers:
+            self.add(header)
+
+    def __contains__(self, name):
+        return name in self.headers
+
+    def __len__(self):
+        return len(self.headers)
+
+    @classmethod
+    def from_files(cls, paths):
+        """Create a graph by scanning the headers of YANG files"""
+        headers = (scan_file(filename) for filename in paths)
+        return cls(header for header in headers if header is not None)
+
+    @classmethod
+    def from_path(cls, path='.', no_path_recurse=False):
+        """Create a graph with all the YANG files found in the search path.
+
+        Arguments:
+            path (str): ``os.pathsep``-separated string of directories
+            no_path_recurse (bool): do not recurse into subdirectories
+        """
+        repo = FileRepository(
+            path, use_env=False, no_path_recurse=no_path_recurse)
+        return cls.from_files(
+            filename
+            for (_, _, (format_, filename))
+            in repo.get_modules_and_revisions(None)
+            if format_ == 'yang')
+
+    @classmethod
+    def from_statements(cls, modules):
+        """Create a graph from already parsed (sub)modules"""
+        return cls(ModuleHeader.from_statement(module) for module in modules)
+
+    def add(self, header):
+        """Include (or replace) a module in the graph"""
+        self.headers[header.name] = header
+        self._dependents = None
+
+    def discard(self, name):
+        """Remove a module from the graph, if present"""
+        self.headers.pop(name, None)
+        self._dependents = None
+
+    def dependencies(self, name):
+        """Names of the modules directly imported/included by a module"""
+        header = self.headers.get(name)
+        return header.dependencies if header else []
+
+    def dependents(self, name):
+        """Names of the modules that directly import/include a module"""
+        if self._dependents is None:
+            self._dependents = {}
+            for (dependent, header) in iteritems(self.headers):
+                for dependency in header.dependencies:
+                    self._dependents.setdefault(
+                        dependency, set()).add(dependent)
+
+        return set(self._dependents.get(name, ()))
+
+    def _reach(self, names, neighbours):
+        """All the nodes reachable from ``names`` (excluding themselves)"""
+        seen = set()
+        stack = list(names)
+        while stack:
+            for neighbour in neighbours(stack.pop()):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    stack.append(neighbour)
+
+        return seen
+
+    def closure(self, *names):
+        """Names of all the modules needed (transitively) by the given ones.
+
+        The given modules are part of the result only if they are part of
+        a cycle.
+        """
+        return self._reach(names, self.dependencies)
+
+    def reverse_closure(self, *names):
+        """Names of all the modules affected (transitively) by the given ones.
+
+        Useful to discover what needs to be revalidated when a module
+        changes.
+        """
+        return self._reach(names, self.dependents)
+
+    def strongly_connected_components(self):
+        """Groups of modules that depend on each other.
+
+        Components are computed with an iterative version of Tarjan's
+        algorithm and returned with dependencies first.
+
+        Returns:
+            list: lists of module names
+        """
+        # pylint: disable=too-many-locals
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+        counter = 0
+
+        for root in sorted(self.headers):
+            if root in index:
+                continue
+            work = [(root, iter(self.dependencies(root)))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                (node, children) = work[-1]
+                for child in children:
+                    if child not in self.headers:
+                        continue
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.dependencies(child))))
+                        break
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(sorted(component))
+
+        return components
+
+    def cycles(self):
+        """Groups of modules involved in circular dependencies"""
+        return [
+            component for component in self.strongly_connected_components()
+            if len(component) > 1 or
+            component[0] in self.dependencies(component[0])
+        ]
+
+    def topological_order(self):
+        """Names of the modules in the graph, dependencies first.
+
+        Modules that are part of a cycle are placed next to each other.
+        """
+        return [
+            name
+            for component in self.strongly_connected_components()
+            for name in component
+        ]
+
+    def levels(self):
+        """Group modules in levels that can be processed concurrently.
+
+        Modules of a level depend only on modules of previous levels
+        (or on modules of the same cycle).
+
+        Returns:
+            list: sets of module names
+        """
+        level_of = {}
+        levels = []
+        for component in self.strongly_connected_components():
+            members = set(component)
+            level = 0
+            for name in component:
+                for dependency in self.dependencies(name):
+                    if dependency in level_of and dependency not in members:
+                        level = max(level, level_of[dependency] + 1)
+            for name in component:
+                level_of[name] = level
+            if level == len(levels):
+                levels.append(set())
+            levels[level].update(component)
+
+        return levels
@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""Structured access to the errors and warnings of a ``pyang`` context.
+
+``pyang`` accumulates diagnostics in ``ctx.errors`` as tuples
+``(position, tag, arguments)``. :func:`iter_diagnostics` classifies them
+(according to the context options) lazily, as :class:`Diagnostic`
+records. Formatting the message is deferred until it is really needed.
+
+When ``ctx.errors`` is an :class:`ErrorLog` (the default for contexts
+created by :func:`pyangext.utils.create_context`), the diagnostics of a
+few modules can be obtained without scanning the whole error list.
+
+Example:
+    ::
+
+        for diagnostic in iter_diagnostics(ctx):
+            if diagnostic.severity == 'error':
+                print(diagnostic.file, diagnostic.line, diagnostic.tag)
+
+        with open('diagnostics.jsonl', 'w') as fp:
+            write_jsonl(iter_diagnostics(ctx), fp)
+"""
+import json
+from collections import Counter
+from weakref import WeakKeyDictionary
+
+from six import string_types
+
+from pyang.error import err_level, err_to_str, error_codes
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = [
+    'Diagnostic',
+    'ErrorLog',
+    'ErrorPolicy',
+    'collect_diagnostics',
+    'iter_diagnostics',
+    'summarize',
+    'write_jsonl',
+]
+
+ERROR = 'error'
+WARNING = 'warning'
+
+_DESCRIPTION_QUIRK_TAGS = frozenset(
+    tag for tag, (_, fmt) in error_codes.items()
+    if fmt.startswith('unexpected keyword "%s"'))
+"""Tags of the errors reported for misplaced ``description`` statements"""
+
+
+def _first_arg(args):
+    """First argument used to format an error message"""
+    if isinstance(args, tuple):
+        return args[0] if args else None
+    return args
+
+
+class Diagnostic(object):
+    """Compact record of an error or warning found by ``pyang``.
+
+    Attributes:
+        tag (str): ``pyang`` error code, e.g. ``LONG_LINE``
+        level (int): ``pyang`` error level (1-3 errors, 4 warnings)
+        severity (str): ``'error'`` or ``'warning'``, after applying the
+            context options
+        file (str): file (or reference) where the problem was found
+        line (int): line where the problem was found
+        module (str): name of the top-level (sub)module
+        args: arguments used to format the message
+        pos (pyang.error.Position): original position object
+    """
+    __slots__ = (
+        'tag', 'level', 'severity', 'file', 'line', 'module', 'args', 'pos')
+
+    def __init__(self, pos, tag, args, level=None, severity=None):
+        # pylint: disable=too-many-arguments
+        self.pos = pos
+        self.tag = tag
+        self.args = args
+        self.level = err_level(tag) if level is None else level
+        self.severity = severity or (ERROR if self.level < 4 else WARNING)
+        self.file = pos.ref
+        self.line = pos.line
+        top = pos.top
+        self.module = top.arg if top is not None else None
+
+    def __repr__(self):
+        return '<{} {} {}:{} {}>'.format(
+            type(self).__name__, self.severity, self.file, self.line,
+            self.tag)
+
+    def __str__(self):
+        return self.format()
+
+    @property
+    def message(self):
+        """str: human readable explanation of the problem"""
+        return err_to_str(self.tag, self.args)
+
+    def format(self, print_error_code=False):
+        """Render the diagnostic as done by the ``pyang`` CLI.
+
+        Arguments:
+            print_error_code (bool): use the error code instead of the
+                message
+        """
+        reason = self.tag if print_error_code else self.message
+        return '({}) {}'.format(str(self.pos), reason)
+
+    def as_dict(self):
+        """Simple dict representation, suitable for serialization"""
+        args = self.args
+        if isinstance(args, tuple):
+            args = list(args)
+        return {
+            'tag': self.tag,
+            'level': self.level,
+            'severity': self.severity,
+            'file': self.file,
+            'line': self.line,
+            'module': self.module,
+            'args': args,
+            'message': self.message,
+        }
+
+
+class ErrorPolicy(object):
+    """Classification of diagnostics, compiled from the context options.
+
+    The options are converted into sets once, and the outcome of the
+    classification is memoized for each tag, so classifying a diagnostic
+    is just a dictionary lookup.
+
+    Arguments:
+        ignore_errors (bool): ignore every diagnostic
+        ignore_error_tags (list): tags to be ignored
+        warnings (list): tags to be treated as warnings. Special values:
+            ``error`` (treat all the other warnings as errors) and
+            ``none`` (ignore all the other warnings)
+        errors (list): tags to be always treated as errors
+        print_error_code (bool): error codes are shown instead of
+            messages. Misplaced ``description`` statements are treated
+            as warnings just when the messages are shown (a workaround
+            inherited from :func:`~pyangext.utils.check`).
+    """
+
+    def __init__(self, ignore_errors=False, ignore_error_tags=(),
+                 warnings=(), errors=(), print_error_code=False):
+        # pylint: disable=too-many-arguments
+        self.ignore_errors = bool(ignore_errors)
+        self.ignore_error_tags = frozenset(ignore_error_tags or ())
+        self.warnings = frozenset(warnings or ())
+        self.errors = frozenset(errors or ())
+        self.print_error_code = bool(print_error_code)
+        self._table = {}
+        self._description_table = {}
+
+    @staticmethod
+    def signature(opts):
+        """Values of the options that affect the classification"""
+        return (
+            bool(opts.ignore_errors),
+            tuple(getattr(opts, 'ignore_error_tags', None) or ()),
+            tuple(opts.warnings or ()),
+            tuple(opts.errors or ()),
+            bool(getattr(opts, 'print_error_code', False)),
+        )
+
+    @classmethod
+    def from_options(cls, opts):
+        """Compile a policy from the options of a context"""
+        return cls(*cls.signature(opts))
+
+    @classmethod
+    def for_context(cls, ctx):
+        """Policy for the current options of a context.
+
+        The policy is cached per context and compiled again only if the
+        options change.
+        """
+        signature = cls.signature(ctx.opts)
+        try:
+            cached = _POLICIES.get(ctx)
+        except TypeError:  # context cannot be weakly referenced
+            return cls(*signature)
+
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        policy = cls(*signature)
+        _POLICIES[ctx] = (signature, policy)
+        return policy
+
+    def classify(self, tag, args=None):
+        """Decide if a diagnostic is an error, a warning or ignored.
+
+        Returns:
+            tuple: (``pyang`` level, severity or ``None`` if ignored)
+        """
+        table = self._table
+        if (not self.print_error_code and
+                tag in _DESCRIPTION_QUIRK_TAGS and
+                _first_arg(args) == 'description'):
+            table = self._description_table
+
+        try:
+            return table[tag]
+        except KeyError:
+            level = 4 if table is self._description_table else err_level(tag)
+            result = table[tag] = (level, self._severity(tag, level))
+            return result
+
+    def _severity(self, tag, level):
+        """Severity of a tag, code mostly borrowed from ``pyang`` script"""
+        if self.ignore_errors or tag in self.ignore_error_tags:
+            return None
+
+        warnings = self.warnings
+        if (level >= 4 or tag in warnings) and tag not in self.errors:
+            if 'error' in warnings and tag not in warnings:
+                pass
+            elif 'none' in warnings:
+                return None
+            else:
+                return WARNING
+
+        return ERROR
+
+
+_POLICIES = WeakKeyDictionary()
+"""Compiled policy (and options signature) for each context"""
+
+
+class ErrorLog(list):
+    """List of ``pyang`` errors indexed by top-level (sub)module.
+
+    It can replace ``ctx.errors`` transparently (``pyang`` just appends
+    to it). The index is built lazily and incrementally: appended errors
+    are indexed the next time :meth:`for_modules` is called, while any
+    other change invalidates the index.
+    """
+
+    def __init__(self, *args):
+        list.__init__(self, *args)
+        self._reset()
+
+    def _reset(self):
+        """Invalidate the index"""
+        self._buckets = {}
+        self._indexed = 0
+
+    def _update(self):
+        """Index the errors appended since the last update"""
+        buckets = self._buckets
+        size = len(self)
+        for i in range(self._indexed, size):
+            buckets.setdefault(id(self[i][0].top), []).append(i)
+        self._indexed = size
+
+    def __copy__(self):
+        return type(self)(self)
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+    def for_modules(self, modules):
+        """Errors whose position belongs to the given modules.
+
+        Arguments:
+            modules (list): top-level statements (modules or submodules).
+                ``None`` selects errors without a top-level statement
+                (e.g. syntax errors found before the module statement).
+
+        Returns:
+            list: ``(position, tag, arguments)`` tuples, in the order they
+            were reported
+        """
+        self._update()
+        indexes = []
+        for key in set(id(module) for module in modules):
+            indexes.extend(self._buckets.get(key, ()))
+
+        return [self[i] for i in sorted(indexes)]
+
+
+def _invalidating(name):
+    """Wrap a list method that changes existing items"""
+    method = getattr(list, name)
+
+    def _wrapper(self, *args, **kwargs):
+        self._reset()  # pylint: disable=protected-access
+        return method(self, *args, **kwargs)
+
+    _wrapper.__name__ = name
+    _wrapper.__doc__ = method.__doc__
+    return _wrapper
+
+
+for _name in ('__setitem__', '__delitem__', '__setslice__', '__delslice__',
+              '__imul__', 'insert', 'remove', 'pop', 'sort', 'reverse',
+              'clear'):
+    if hasattr(list, _name):
+        setattr(ErrorLog, _name, _invalidating(_name))
+del _name
+
+
+def _entries(ctx, modules=None):
+    """Errors of a context, optionally restricted to some modules"""
+    errors = ctx.errors
+    if modules is None:
+        return errors
+    if isinstance(errors, ErrorLog):
+        return errors.for_modules(modules)
+
+    keys = set(id(module) for module in modules)
+    return [error for error in errors if id(error[0].top) in keys]
+
+
+def _classified(ctx, modules=None):
+    """Entries of ``ctx.errors`` that are not ignored, with their severity.
+
+    Yields:
+        tuple: (position, tag, arguments, level, severity)
+    """
+    policy = ErrorPolicy.for_context(ctx)
+    if policy.ignore_errors:
+        return
+
+    classify = policy.classify
+    implicit_errors = ctx.implicit_errors
+    for (epos, etag, eargs) in _entries(ctx, modules):
+        (level, severity) = classify(etag, eargs)
+        if severity is None:
+            continue
+        if not implicit_errors and hasattr(epos.top, 'i_modulename'):
+            # this module was added implicitly (by import); skip this error
+            # the code includes submodules
+            continue
+        yield (epos, etag, eargs, level, severity)
+
+
+def iter_diagnostics(ctx, modules=None):
+    """Lazily classify the errors and warnings accumulated in a context.
+
+    The context options (``ignore_errors``, ``ignore_error_tags``,
+    ``warnings``, ``errors``) are applied through an :class:`ErrorPolicy`,
+    in the same way of :func:`pyangext.utils.check`.
+
+    Arguments:
+        ctx (pyang.Context): pyang context to be checked.
+        modules (list): consider just the errors found in these top-level
+            statements (see :meth:`ErrorLog.for_modules`)
+
+    Yields:
+        Diagnostic: record for each error or warning that is not ignored
+    """
+    for entry in _classified(ctx, modules):
+        yield Diagnostic(*entry)
+
+
+def collect_diagnostics(ctx, max_errors=None, modules=None):
+    """Gather the diagnostics of a context, up to a number of errors.
+
+    After ``max_errors`` errors are found, the remaining diagnostics are
+    not turned into records, just counted per tag. Warnings found before
+    the limit is reached are kept as records (and not counted).
+
+    Arguments:
+        ctx (pyang.Context): pyang context to be checked.
+        max_errors (int): limit of errors, ``None`` or ``0`` mean
+            unlimited
+        modules (list): consider just the errors found in these top-level
+            statements (see :meth:`ErrorLog.for_modules`)
+
+    Returns:
+        tuple: (list of :class:`Diagnostic` objects,
+        ``collections.Counter`` of omitted diagnostics per tag)
+    """
+    diagnostics = []
+    omitted = Counter()
+    entries = _classified(ctx, modules)
+    count = 0
+    for entry in entries:
+        diagnostics.append(Diagnostic(*entry))
+        if entry[4] == ERROR:
+            count += 1
+            if max_errors and count >= max_errors:
+                break
+
+    for entry in entries:  # continue from where the loop stopped
+        omitted[entry[1]] += 1
+
+    return (diagnostics, omitted)
+
+
+def summarize(counts):
+    """Single line summary for a ``Counter`` of diagnostics per tag"""
+    total = sum(counts.values())
+    details = ', '.join(
+        '{} x{}'.format(tag, count)
+        for tag, count in sorted(
+            counts.items(), key=lambda item: (-item[1], item[0])))
+
+    return '{} more diagnostic(s) omitted: {}'.format(total, details)
+
+
+def write_jsonl(diagnostics, file_obj):
+    """Export diagnostics in the JSON Lines format (one object per line).
+
+    Arguments:
+        diagnostics (iterable): :class:`Diagnostic` objects
+        file_obj (file): *file-like* object opened in text mode
+
+    Returns:
+        int: number of diagnostics written
+    """
+    count = 0
+    for diagnostic in diagnostics:
+        line = json.dumps(diagnostic.as_dict(), default=_to_json)
+        file_obj.write(line + '\n')
+        count += 1
+
+    return count
+
+
+def _to_json(value):
+    """Fallback for values that cannot be directly represented in JSON"""
+    return value if isinstance(value, string_types) else str(value)
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""Columnar snapshot of statement trees.
+
+Scanning trees of ``pyang`` statements is slow and every statement
+carries a whole dictionary of attributes. For analytics over big corpora
+a :class:`FlatTree` encodes the trees (in pre-order) as parallel integer
+columns:
+
+- ``keywords``: ids in the table of distinct ``(keyword, raw keyword)``
+- ``args``: ids in the table of distinct arguments (``-1`` for ``None``)
+- ``parents``: position of the parent statement (``-1`` for roots)
+- ``depths``: distance to the root (``0`` for roots)
+- ``ends``: position after the last descendant, so the subtree of the
+  statement in position ``i`` is ``range(i, ends[i])``
+- ``lines``: line of the statement in the source file (``0`` if unknown)
+
+Columns are :class:`array.array` objects, or ``numpy`` arrays if it is
+installed (``pip install pyangext[numpy]``), in which case queries are
+vectorized. The original statements are retrieved just on demand.
+
+Example:
+    ::
+
+        tree = FlatTree(ctx)
+        tree.count('leaf')
+        leaves = tree.select('leaf', within=container)
+        deep = tree.statements(tree.filter(tree.depths > 10))
+"""
+from array import array
+from collections import Counter, namedtuple
+from numbers import Integral
+
+from six.moves import range  # pylint: disable=redefined-builtin
+
+from .index import _collect_roots
+from .utils import compile_selector
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # pylint: disable=invalid-name
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['FlatTree']
+
+COLUMNS = ('keywords', 'args', 'parents', 'depths', 'ends', 'lines')
+"""Names of the integer columns of a :class:`FlatTree`"""
+
+_Entry = namedtuple('_Entry', 'keyword raw_keyword arg')
+"""Statement-like object, used to match the tables with selectors"""
+
+
+class FlatTree(object):
+    """Flat representation of one or more statement trees.
+
+    Arguments:
+        roots: statement, list of statements or ``pyang.Context``
+            (all the modules in the context are included)
+        key (str): property where the children nodes are stored,
+            default is ``substmts``
+        use_numpy (bool): store the columns as ``numpy`` arrays.
+            By default ``numpy`` is used if it is installed.
+
+    Raises:
+        ImportError: if ``use_numpy`` is set, but ``numpy`` is missing
+    """
+
+    def __init__(self, roots, key='substmts', use_numpy=None):
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        elif use_numpy and numpy is None:
+            raise ImportError('numpy is required for vectorized columns')
+
+        self.key = key
+        self.numpy = bool(use_numpy)
+        self.keyword_table = []
+        """list: distinct ``(keyword, raw keyword)`` pairs"""
+        self.strings = []
+        """list: distinct arguments"""
+        self._nodes = []
+        self._positions = None
+
+        columns = self._flatten(_collect_roots(roots))
+        if self.numpy:
+            columns = [numpy.array(column, dtype=numpy.intc)
+                       for column in columns]
+
+        (keywords, args, parents, depths, ends, lines) = columns
+        self.keywords = keywords
+        """array: ids of the keywords in :attr:`keyword_table`"""
+        self.args = args
+        """array: ids of the arguments in :attr:`strings` (or ``-1``)"""
+        self.parents = parents
+        """array: position of the parent statement (``-1`` for roots)"""
+        self.depths = depths
+        """array: distance to the root (``0`` for roots)"""
+        self.ends = ends
+        """array: position after the last descendant"""
+        self.lines = lines
+        """array: line in the source file (``0`` if unknown)"""
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def _flatten(self, roots):
+        """Fill the tables in a single (pre-order) pass.
+
+        Returns:
+            tuple: columns as arrays
+        """
+        (keyword_ids, string_ids) = ({}, {})
+        (keyword_table, strings, nodes) = (
+            self.keyword_table, self.strings, self._nodes)
+        columns = tuple(array('i') for _ in COLUMNS)
+        (keywords, args, parents, depths, ends, lines) = columns
+
+        stack = [(root, -1, 0) for root in reversed(roots)]
+        while stack:
+            (node, parent, depth) = stack.pop()
+            position = len(nodes)
+            nodes.append(node)
+
+            entry = (node.keyword, node.raw_keyword)
+            keyword_id = keyword_ids.get(entry)
+            if keyword_id is None:
+                keyword_id = keyword_ids[entry] = len(keyword_table)
+                keyword_table.append(entry)
+            keywords.append(keyword_id)
+
+            arg_id = -1
+            if node.arg is not None:
+                arg_id = string_ids.get(node.arg)
+                if arg_id is None:
+                    arg_id = string_ids[node.arg] = len(strings)
+                    strings.append(node.arg)
+            args.append(arg_id)
+
+            parents.append(parent)
+            depths.append(depth)
+            pos = getattr(node, 'pos', None)
+            lines.append(getattr(pos, 'line', None) or 0)
+
+            children = getattr(node, self.key, None) or ()
+            stack.extend((child, position, depth + 1)
+                         for child in reversed(children))
+
+        ends.extend(range(1, len(nodes) + 1))
+        for position in range(len(nodes) - 1, -1, -1):
+            parent = parents[position]
+            if parent >= 0 and ends[position] > ends[parent]:
+                ends[parent] = ends[position]
+
+        return columns
+
+    def position(self, node):
+        """Position of a statement in the columns
+
+        Raises:
+            ValueError: if the statement is not part of the trees
+        """
+        if self._positions is None:
+            self._positions = {}
+            for (position, item) in enumerate(self._nodes):
+                self._positions.setdefault(id(item), position)
+
+        position = self._positions.get(id(node))
+        if position is None:
+            raise ValueError('statement is not in the tree: {} {}'.format(
+                node.keyword, node.arg))
+        return position
+
+    def statement(self, position):
+        """Original statement in the given position"""
+        return self._nodes[position]
+
+    def statements(self, positions):
+        """Original statements in the given positions"""
+        nodes = self._nodes
+        return [nodes[position] for position in positions]
+
+    def keyword(self, position):
+        """Keyword of the statement in the given position"""
+        return self.keyword_table[self.keywords[position]][0]
+
+    def arg(self, position):
+        """Argument of the statement in the given position"""
+        arg_id = self.args[position]
+        return None if arg_id < 0 else self.strings[arg_id]
+
+    def _matching_ids(self, keyword, arg, ignore_prefix):
+        """Ids of the table entries matching the criteria (as selected by
+        :func:`~pyangext.utils.select`), ``None`` for no restriction"""
+        (keyword_ids, arg_ids) = (None, None)
+        if keyword:
+            match = compile_selector(keyword, None, ignore_prefix).match
+            keyword_ids = [
+                i for (i, (name, raw)) in enumerate(self.keyword_table)
+                if match(_Entry(name, raw, None))]
+        if arg:
+            match = compile_selector(None, arg, ignore_prefix).match
+            arg_ids = [i for (i, value) in enumerate(self.strings)
+                       if match(_Entry(None, None, value))]
+
+        return (keyword_ids, arg_ids)
+
+    def _range(self, within):
+        """Positions of the descendants of a statement (or all of them)"""
+        if within is None:
+            return (0, len(self._nodes))
+        if not isinstance(within, Integral):
+            within = self.position(within)
+        return (within + 1, self.ends[within])
+
+    def positions(self, keyword=None, arg=None, ignore_prefix=False,
+                  within=None, depth=None):
+        """Positions of the statements with a keyword, or argument or both.
+
+        Arguments:
+            keyword (str): if specified the statements should have this
+                keyword
+            arg (str): if specified the statements should have this
+                argument
+            ignore_prefix (bool): compare keywords and arguments without
+                their prefixes
+            within: if specified (statement or position), just the
+                descendants of this statement are considered
+            depth (int): if specified, just the statements with this
+                distance to the root are considered
+
+        Returns:
+            ``numpy`` or ``array`` of ints: positions, in increasing order
+
+        Raises:
+            ValueError: if ``within`` is not part of the trees
+        """
+        # pylint: disable=too-many-arguments
+        (start, end) = self._range(within)
+        (keyword_ids, arg_ids) = self._matching_ids(
+            keyword, arg, ignore_prefix)
+
+        if self.numpy:
+            mask = numpy.ones(end - start, dtype=bool)
+            if keyword_ids is not None:
+                mask &= numpy.isin(self.keywords[start:end], keyword_ids)
+            if arg_ids is not None:
+                mask &= numpy.isin(self.args[start:end], arg_ids)
+            if depth is not None:
+                mask &= self.depths[start:end] == depth
+            return numpy.flatnonzero(mask) + start
+
+        tests = []
+        if keyword_ids is not None:
+            tests.append((self.keywords, frozenset(keyword_ids)))
+        if arg_ids is not None:
+            tests.append((self.args, frozenset(arg_ids)))
+        if depth is not None:
+            tests.append((self.depths, frozenset([depth])))
+
+        if not tests:
+            return array('i', range(start, end))
+
+        (column, ids) = tests[0]
+        positions = [position for (position, value)
+                     in enumerate(column[start:end], start) if value in ids]
+        for (column, ids) in tests[1:]:
+            positions = [position for position in positions
+                         if column[position] in ids]
+
+        return array('i', positions)
+
+    def count(self, keyword=None, arg=None, ignore_prefix=False,
+              within=None, depth=None):
+        """Number of statements matching the criteria.
+
+        See Also:
+            method :meth:`positions`
+        """
+        # pylint: disable=too-many-arguments
+        return len(self.positions(keyword, arg, ignore_prefix, within, depth))
+
+    def select(self, keyword=None, arg=None, ignore_prefix=False,
+               within=None, depth=None):
+        """Statements matching the criteria, in pre-order.
+
+        See Also:
+            method :meth:`positions`
+        """
+        # pylint: disable=too-many-arguments
+        return self.statements(
+            self.positions(keyword, arg, ignore_prefix, within, depth))
+
+    def children(self, parent, keyword=None, arg=None, ignore_prefix=False):
+        """Select the direct children of a statement.
+
+        Equivalent to :func:`pyangext.utils.find`.
+        """
+        position = (parent if isinstance(parent, Integral)
+                    else self.position(parent))
+        return self.select(keyword, arg, ignore_prefix,
+                           position, self.depths[position] + 1)
+
+    def filter(self, mask):
+        """Positions where a mask is true.
+
+        Arguments:
+            mask: sequence of bools, one for each statement, usually
+                computed from the columns (e.g. ``tree.depths > 3``
+                when using ``numpy``)
+
+        Returns:
+            ``numpy`` or ``array`` of ints: positions
+        """
+        if self.numpy:
+            return numpy.flatnonzero(numpy.asarray(mask, dtype=bool))
+
+        return array('i', (position for (position, flag) in enumerate(mask)
+                           if flag))
+
+    def keyword_counts(self):
+        """dict: number of statements for each keyword"""
+        if self.numpy:
+            totals = numpy.bincount(
+                self.keywords, minlength=len(self.keyword_table))
+        else:
+            counter = Counter(self.keywords)
+            totals = [counter[i] for i in range(len(self.keyword_table))]
+
+        counts = {}
+        for ((keyword, _), total) in zip(self.keyword_table, totals):
+            counts[keyword] = counts.get(keyword, 0) + int(total)
+
+        return counts
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""Index of statements for repeated lookups.
+
+:func:`~pyangext.utils.select` and :func:`~pyangext.utils.find` scan the
+substatements (and split prefixed strings) in every call. When the same
+tree is queried over and over (e.g. by plugins), a
+:class:`StatementIndex` answers the same questions with dictionary
+lookups, after a single pass over the tree.
+
+Example:
+    ::
+
+        index = StatementIndex(module)
+        leaves = index.find('leaf', within=container)
+        typedef = index.children(module, 'typedef', 'code')
+"""
+from bisect import bisect_left
+from collections import defaultdict
+
+from pyang import Context
+from pyang.statements import Statement
+
+from .utils import qualify_str
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['StatementIndex']
+
+
+def _keys(value, raw_value=None):
+    """Keys used to index a keyword (or argument) of a statement.
+
+    Returns:
+        tuple: (exact key, qualified key, key ignoring the prefix)
+    """
+    qualified = qualify_str(value if raw_value is None else raw_value)
+    return (('=', value), ('q', qualified), ('l', qualified[-1:]))
+
+
+def _query_keys(value, ignore_prefix=False):
+    """Keys that match a keyword (or argument) in a query, with the same
+    semantics of :func:`~pyangext.utils.compare_prefixed`"""
+    (exact, qualified, local) = _keys(value)
+    return (exact, local if ignore_prefix else qualified)
+
+
+def _merge(lists):
+    """Union of sorted lists of positions"""
+    lists = [positions for positions in lists if positions]
+    if len(lists) == 1:
+        return lists[0]
+
+    return sorted(set(position for positions in lists
+                      for position in positions))
+
+
+def _collect_roots(roots):
+    """List of trees given as a statement, list or ``pyang.Context``
+    (modules of a context are sorted by name and file)"""
+    if isinstance(roots, Statement):
+        return [roots]
+    if isinstance(roots, Context):
+        modules = dict((id(module), module)
+                       for module in roots.modules.values())
+        return sorted(modules.values(),
+                      key=lambda module: (module.arg, module.pos.ref))
+    return list(roots)
+
+
+def _matches(value, query_keys):
+    """Check if a keyword (or argument) matches the keys of a query"""
+    return value is not None and any(
+        key in query_keys for key in _keys(value))
+
+
+class StatementIndex(object):
+    """Index of the statements in one or more trees.
+
+    Statements are indexed by keyword, argument and ``(keyword,
+    argument)`` pairs, including the qualified forms (``prefix:name``)
+    and the ones without prefixes, so queries have the same results of
+    :func:`~pyangext.utils.select`. The index is built lazily (in the
+    first query) and should be invalidated if the trees change.
+
+    Arguments:
+        roots: statement, list of statements or ``pyang.Context``
+            (all the modules in the context are indexed)
+        key (str): property where the children nodes are stored,
+            default is ``substmts``
+    """
+
+    def __init__(self, roots, key='substmts'):
+        self.roots = roots
+        self.key = key
+        self._nodes = None  # (node, depth) in pre-order
+        self._ends = None  # position of the last descendant of each node
+        self._positions = None
+        self._table = None
+
+    def __len__(self):
+        self._build()
+        return len(self._nodes)
+
+    @property
+    def built(self):
+        """bool: ``True`` if the index is ready to answer queries"""
+        return self._nodes is not None
+
+    def invalidate(self):
+        """Discard the index, so it is built again in the next query"""
+        self._nodes = None
+
+    def _build(self):
+        """Index all the statements in a single pass (if needed).
+
+        The table maps keys to sorted lists of positions (in pre-order):
+
+        - ``('k', keyword key)``, ``('a', argument key)`` and
+          ``('p', keyword key, argument key)`` for all the statements
+        - ``(parent position, keyword key)`` and ``(parent position,
+          None)`` for the children of a statement
+        """
+        if self._nodes is not None:
+            return
+
+        nodes = []
+        ends = []
+        positions = {}
+        table = defaultdict(list)
+        open_nodes = []  # positions of nodes whose descendants are pending
+
+        stack = [(root, 0, None)
+                 for root in reversed(_collect_roots(self.roots))]
+        while stack:
+            (node, depth, parent) = stack.pop()
+            position = len(nodes)
+            while open_nodes and nodes[open_nodes[-1]][1] >= depth:
+                ends[open_nodes.pop()] = position - 1
+            nodes.append((node, depth))
+            ends.append(position)
+            open_nodes.append(position)
+            positions.setdefault(id(node), position)
+
+            if parent is not None:
+                table[parent, None].append(position)
+            kwd_keys = _keys(node.keyword, node.raw_keyword)
+            for kwd_key in set(kwd_keys):
+                table['k', kwd_key].append(position)
+                if parent is not None:
+                    table[parent, kwd_key].append(position)
+            if node.arg is not None:
+                arg_keys = _keys(node.arg)
+                for arg_key in set(arg_keys):
+                    table['a', arg_key].append(position)
+                for pair in set(('p', kwd_key, arg_key)
+                                for kwd_key in kwd_keys[:2]
+                                for arg_key in arg_keys[:2]):
+                    table[pair].append(position)
+
+            children = getattr(node, self.key, None) or ()
+            stack.extend((child, depth + 1, position)
+                         for child in reversed(children))
+
+        for position in open_nodes:
+            ends[position] = len(nodes) - 1
+
+        self._nodes = nodes
+        self._ends = ends
+        self._positions = positions
+        self._table = table
+
+    def _lookup(self, keys, within=None):
+        """Positions for any of the keys, optionally inside a subtree"""
+        table = self._table
+        lists = [table.get(key) for key in keys]
+        if within is not None:
+            (start, end) = (within + 1, self._ends[within] + 1)
+            lists = [positions[bisect_left(positions, start):
+                               bisect_left(positions, end)]
+                     for positions in lists if positions]
+
+        return _merge(lists)
+
+    def _candidates(self, keyword, arg, ignore_prefix, within):
+        """Matching positions, sorted"""
+        if keyword and arg and not ignore_prefix:
+            return self._lookup([
+                ('p', kwd_key, arg_key)
+                for kwd_key in _query_keys(keyword)
+                for arg_key in _query_keys(arg)], within)
+
+        if keyword:
+            positions = self._lookup(
+                [('k', key) for key in _query_keys(keyword, ignore_prefix)],
+                within)
+            if not arg:
+                return positions
+            arg_keys = _query_keys(arg, ignore_prefix)
+            return [position for position in positions
+                    if _matches(self._nodes[position][0].arg, arg_keys)]
+
+        if arg:
+            return self._lookup(
+                [('a', key) for key in _query_keys(arg, ignore_prefix)],
+                within)
+
+        if within is None:
+            return range(len(self._nodes))
+        return range(within + 1, self._ends[within] + 1)
+
+    def _position(self, node):
+        """Position of a statement in the index"""
+        position = self._positions.get(id(node))
+        if position is None:
+            raise ValueError('statement is not indexed: {} {}'.format(
+                node.keyword, node.arg))
+        return position
+
+    def find(self, keyword=None, arg=None, ignore_prefix=False, within=None):
+        """Find all the statements with a keyword, or argument or both.
+
+        Arguments:
+            keyword (str): if specified the statements should have this
+                keyword
+            arg (str): if specified the statements should have this
+                argument
+            ignore_prefix (bool): compare keywords and arguments without
+                their prefixes
+            within (pyang.statements.Statement): if specified, just the
+                descendants of this (indexed) statement are considered
+
+        Returns:
+            list: statements in the order they appear in the trees
+
+        Raises:
+            ValueError: if ``within`` is not part of the indexed trees
+        """
+        self._build()
+        if within is not None:
+            within = self._position(within)
+        nodes = self._nodes
+
+        return [nodes[position][0] for position in self._candidates(
+            keyword, arg, ignore_prefix, within)]
+
+    def children(self, parent, keyword=None, arg=None, ignore_prefix=False):
+        """Select the direct children of a statement.
+
+        Equivalent to :func:`pyangext.utils.find`.
+
+        See Also:
+            method :meth:`find`
+        """
+        self._build()
+        position = self._position(parent)
+        nodes = self._nodes
+        if keyword:
+            positions = self._lookup([
+                (position, key)
+                for key in _query_keys(keyword, ignore_prefix)])
+        else:
+            positions = self._table.get((position, None), ())
+
+        if arg:
+            arg_keys = _query_keys(arg, ignore_prefix)
+            positions = [child for child in positions
+                         if _matches(nodes[child][0].arg, arg_keys)]
+
+        return [nodes[child][0] for child in positions]
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""Alternative YANG parser backend, optimized for large modules.
+
+:class:`FastYangParser` has the same interface of ``pyang``'s
+``YangParser`` and builds exactly the same statement trees (including
+line numbers), but tokenizes the whole text with precompiled regular
+expressions in a single pass, instead of splitting it into lines and
+consuming them character by character.
+
+The fast path just handles well-formed input. As soon as something that
+would produce an error or warning is found (or an unusual construction,
+e.g. exotic line separators, comments that should be kept, unknown
+escape sequences), the text is parsed again with ``YangParser``, so
+diagnostics are always the ones produced by ``pyang``.
+
+Example:
+    ::
+
+        ctx = create_context('models', parser='fast')
+        module = ctx.add_module(filename, text)
+"""
+import re
+
+from pyang.error import Position
+from pyang.statements import Statement
+from pyang.syntax import identifier
+from pyang.yang_parser import YangParser
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['FastYangParser', 'get_parser']
+
+PARSERS = ('pyang', 'fast')
+"""Names accepted by :func:`get_parser`"""
+
+_UNSUPPORTED = re.compile(
+    u'[\r\x0b\x0c\x1c-\x1f\x85\xa0\u1680\u2000-\u200a\u2028\u2029'
+    u'\u202f\u205f\u3000]')
+"""Whitespace and line separators (besides space, tab and LF) that change
+the way ``pyang`` splits lines and strips strings"""
+
+_SKIP = (
+    r'(?:[ \t\n]+'          # whitespace
+    r'|//[^\n]*\n?'          # line comment
+    r'|/\*/|/\*[\s\S]*?\*/'  # block comment ('/*/' is a valid comment)
+    r')*'
+)
+"""Whitespace and comments between tokens"""
+
+_SPACES = re.compile(r'[ \t\n]*')
+_GAP = re.compile(_SKIP)
+_KEYWORD = re.compile(
+    r'(?:({0}):)?({0})(?=[ \t\n;{{]|/[/*])'.format(identifier) + _SKIP)
+_UNQUOTED = re.compile(r'(?:[^ \t\n;{}/*]|/(?![/*])|\*(?!/))*')
+_SIMPLE_QUOTED = re.compile(
+    r'(?:"([^"\\\n]*)"' + r"|'([^']*)')" + _SKIP)
+_DOUBLE_QUOTED_CHUNK = re.compile(r'[^"\\\n]*')
+
+_ESCAPES = {'n': '\n', 't': '\t', '"': '"', '\\': '\\'}
+
+_SEPARATORS = frozenset(' \t\n;{')
+
+
+class _Fallback(Exception):
+    """The fast path cannot guarantee the same outcome of ``pyang``"""
+
+
+def _uses_plain_statements():
+    """Check if statements can be built without calling ``__init__``"""
+    stmt = Statement(None, None, Position('probe'), 'probe')
+    return sorted(stmt.__dict__) == [
+        'arg', 'ext_mod', 'keyword', 'parent', 'pos', 'raw_keyword',
+        'substmts', 'top']
+
+
+_PLAIN_STATEMENTS = _uses_plain_statements()
+
+
+def _statement(top, parent, pos, keyword, arg):
+    """Equivalent to ``Statement(...)``, without copying ``pos``"""
+    if not _PLAIN_STATEMENTS:
+        return Statement(top, parent, pos, keyword, arg)
+
+    stmt = Statement.__new__(Statement)
+    stmt.__dict__.update(
+        top=top, parent=parent, pos=pos, raw_keyword=keyword,
+        keyword=keyword, ext_mod=None, arg=arg, substmts=[])
+    if pos.top is None:
+        pos.top = stmt
+
+    return stmt
+
+
+class _Scanner(object):
+    """Single-pass tokenizer that mimics ``pyang.yang_parser``.
+
+    Positions are indexes in the text. Any unexpected situation raises
+    :class:`_Fallback`.
+    """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, text):
+        self.text = text
+        self.size = len(text)
+        self._line = 1
+        self._line_pos = 0
+
+    def line(self, pos):
+        """Line number (1-based) of a position, must not go backwards"""
+        self._line += self.text.count('\n', self._line_pos, pos)
+        self._line_pos = pos
+        return self._line
+
+    def skip(self, pos):
+        """Skip whitespace and comments.
+
+        Returns:
+            int: position of the next token, or the size of the text
+        """
+        pos = _GAP.match(self.text, pos).end()
+        if self.text.startswith('/*', pos):  # unterminated comment
+            return self.size
+        return pos
+
+    def peek(self, pos):
+        """Skip to the next token, that should exist"""
+        return self.token(self.skip(pos))
+
+    def token(self, pos):
+        """Check there is a token in a position (after skipping gaps)"""
+        if pos >= self.size or self.text.startswith('/*', pos):
+            raise _Fallback('unexpected end of text')
+        return pos
+
+    def keyword(self, pos):
+        """Read a keyword, checking its separator, and skip to next token"""
+        match = _KEYWORD.match(self.text, pos)
+        if match is None:
+            raise _Fallback('illegal keyword or separator')
+
+        (prefix, identifier_) = match.groups()
+        keyword = identifier_ if prefix is None else (prefix, identifier_)
+
+        return (keyword, self.token(match.end()))
+
+    def string(self, pos):
+        """Read an argument (possibly concatenated quoted strings).
+
+        Returns:
+            tuple: (argument, position after the argument). For quoted
+            strings the whitespace and comments that follow are skipped.
+        """
+        text = self.text
+        char = text[pos]
+        if char not in '"\'':
+            end = _UNQUOTED.match(text, pos).end()
+            if end == pos or end >= self.size:
+                raise _Fallback('unexpected unquoted string')
+            return (text[pos:end], end)
+
+        match = _SIMPLE_QUOTED.match(text, pos)
+        if match is not None:  # most common case: single line, no escapes
+            end = self.token(match.end())
+            if text[end] != '+':
+                (double, single) = match.groups()
+                return (single if double is None else double, end)
+
+        parts = []
+        while True:
+            pos = self._quoted(pos, parts)
+            pos = self.peek(pos)
+            if text[pos] != '+':
+                return (u''.join(parts), pos)
+            pos = self.peek(pos + 1)
+            if text[pos] not in '"\'':
+                raise _Fallback('expected quoted string')
+
+    def _quoted(self, pos, parts):
+        """Read a quoted string, appending its content to ``parts``"""
+        text = self.text
+        if text[pos] == "'":
+            end = text.find("'", pos + 1)
+            if end < 0:
+                raise _Fallback('unterminated string')
+            parts.append(text[pos + 1:end])
+            return end + 1
+
+        indent = pos - text.rfind('\n', 0, pos) - 1  # column of the quote
+        start = pos + 1
+        while True:
+            end = _DOUBLE_QUOTED_CHUNK.match(text, start).end()
+            if end >= self.size - 1:
+                raise _Fallback('unterminated string')
+
+            char = text[end]
+            if char == '"':
+                parts.append(text[start:end])
+                return end + 1
+
+            if char == '\\':
+                special = _ESCAPES.get(text[end + 1])
+                if special is None:
+                    raise _Fallback('illegal escape')
+                parts.append(text[start:end])
+                parts.append(special)
+                start = end + 2
+                continue
+
+            # line break: keep it, then strip the indentation of the next
+            # line (at most up to the column of the opening quote)
+            parts.append(text[start:end + 1])
+            start = end + 1
+            line_end = text.find('\n', start)
+            line_size = (line_end + 1 if line_end >= 0 else self.size) - start
+            spaces = _SPACES.match(text, start).end() - start
+            spaces = min(spaces, line_size, indent + 1)
+            if spaces < line_size:  # whitespace-only lines are kept as is
+                start += spaces
+
+
+class FastYangParser(object):
+    """Drop-in replacement for ``pyang.yang_parser.YangParser``.
+
+    Arguments:
+        fallback: parser used when the fast path cannot be taken,
+            by default a ``YangParser``
+
+    Attributes:
+        fallbacks (int): number of texts handled by the fallback parser
+    """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback or YangParser()
+        self.fallbacks = 0
+
+    def parse(self, ctx, ref, text):
+        """Parse the string ``text`` containing a YANG statement.
+
+        Returns:
+            pyang.statements.Statement: root of the tree or ``None`` on
+            failure (errors are added to ``ctx.errors``)
+        """
+        if not getattr(ctx, 'keep_comments', False):
+            try:
+                self._check(ctx, text)
+                return self._parse(ref, text)
+            except (_Fallback, IndexError):
+                pass
+
+        self.fallbacks += 1
+        return self.fallback.parse(ctx, ref, text)
+
+    @staticmethod
+    def _check(ctx, text):
+        """Detect texts that would produce line-related diagnostics"""
+        if _UNSUPPORTED.search(text) is not None:
+            raise _Fallback('unusual whitespace')
+
+        max_line_len = getattr(ctx, 'max_line_len', None)
+        if max_line_len and max(
+                len(line) for line in text.split('\n')) > max_line_len:
+            raise _Fallback('long line')
+
+    @staticmethod
+    def _parse(ref, text):
+        """Build the tree, without any recursion"""
+        scanner = _Scanner(text)
+        root = None
+        stack = []  # statements with open blocks
+        pos = 0
+        while True:
+            pos = scanner.peek(pos)
+            if stack and text[pos] == '}':
+                stack.pop()
+                pos += 1
+                if not stack:
+                    break
+                continue
+
+            (keyword, pos) = scanner.keyword(pos)
+            unquoted = text[pos] not in '{;"\''
+            if text[pos] in '{;':
+                arg = None
+            else:
+                (arg, pos) = scanner.string(pos)
+
+            position = Position(ref)
+            position.line = scanner.line(pos)
+            position.top = root
+            if root is None:
+                stmt = root = _statement(None, None, position, keyword, arg)
+            else:
+                parent = stack[-1]
+                stmt = _statement(root, parent, position, keyword, arg)
+                parent.substmts.append(stmt)
+
+            if unquoted:  # quoted strings already skip what follows them
+                pos = scanner.peek(pos)
+            if text[pos] == '{':
+                stack.append(stmt)
+                pos += 1
+            elif text[pos] == ';':
+                pos += 1
+                if not stack:
+                    break
+            else:
+                raise _Fallback('incomplete statement')
+
+        if scanner.skip(pos) < len(text):
+            raise _Fallback('trailing garbage')
+
+        return root
+
+
+def get_parser(name=None):
+    """Instantiate a YANG parser backend.
+
+    Arguments:
+        name (str): ``pyang`` (default) or ``fast``
+
+    Returns:
+        object with the interface of ``pyang.yang_parser.YangParser``
+    """
+    if name is None or name == 'pyang':
+        return YangParser()
+    if name == 'fast':
+        return FastYangParser()
+
+    raise ValueError('unknown parser {!r}, expected one of {}'.format(
+        name, ', '.join(PARSERS)))
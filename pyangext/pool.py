@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""Reuse of warmed ``pyang`` contexts.
+
+Creating a context with :func:`pyangext.utils.create_context` is expensive:
+the search path is scanned (recursively) by ``pyang.FileRepository`` and
+the whole context is initialized from scratch. Long-running applications
+that validate lots of small snippets can avoid this cost by borrowing
+contexts from a :class:`ContextPool`.
+
+Example:
+    ::
+
+        pool = ContextPool(maxsize=4)
+
+        with pool.context('models', max_line_len=80) as ctx:
+            ast = parse(snippet, ctx)
+"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from copy import deepcopy
+from weakref import WeakKeyDictionary
+
+from six import iteritems
+
+from .utils import _COPY_OPTIONS, DEFAULT_OPTIONS, create_context, objectify
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['ContextPool', 'pool_key']
+
+_STATE_ATTRS = _COPY_OPTIONS + [
+    'implicit_errors',
+    'keep_comments',
+    'lax_quote_checks',
+]
+"""Context attributes (besides the options) restored when released"""
+
+
+def _freeze(value):
+    """Transform an option value in something hashable"""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (key, _freeze(item)) for key, item in iteritems(value)))
+
+    return value
+
+
+def pool_key(path='.', *options, **kwargs):
+    """Identify the effective configuration for a context.
+
+    The arguments are the same accepted by
+    :func:`~pyangext.utils.create_context`. Contexts created with
+    arguments that result in the same key are interchangeable.
+
+    Returns:
+        tuple: hashable representation of the path and options
+    """
+    opts = objectify(DEFAULT_OPTIONS, *options, **kwargs)
+    return (path, _freeze(opts.__dict__))
+
+
+class _Baseline(object):
+    """Snapshot of the state of a freshly created context"""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, ctx):
+        self.modules = dict(ctx.modules)
+        self.revs = dict(
+            (name, list(revs)) for name, revs in iteritems(ctx.revs))
+        self.features = dict(ctx.features)
+        self.deviation_modules = list(ctx.deviation_modules)
+        self.options = deepcopy(ctx.opts.__dict__)
+        self.attrs = dict(
+            (attr, getattr(ctx, attr, None)) for attr in _STATE_ATTRS)
+
+    def restore(self, ctx):
+        """Discard per-request state, returning ``ctx`` to the snapshot"""
+        ctx.errors = type(ctx.errors)()
+        ctx.modules = dict(self.modules)
+        ctx.revs = dict(
+            (name, list(revs)) for name, revs in iteritems(self.revs))
+        ctx.features = dict(self.features)
+        ctx.deviation_modules = list(self.deviation_modules)
+        ctx.opts.__dict__.clear()
+        ctx.opts.__dict__.update(deepcopy(self.options))
+        for attr, value in iteritems(self.attrs):
+            setattr(ctx, attr, value)
+
+
+class ContextPool(object):
+    """Pool of ``pyang`` contexts, keyed by their effective options.
+
+    Contexts are handed out by :meth:`acquire` and given back by
+    :meth:`release`. When released, a context is restored to the state
+    it had right after its creation: accumulated errors are discarded,
+    modules added during the request are removed and options changed in
+    ``ctx.opts`` are reverted.
+
+    The number of idle contexts kept by the pool is bounded by
+    ``maxsize``. When this limit is exceeded, the least recently used
+    context is discarded.
+
+    The pool can be safely shared between threads, however a single
+    context should not be used concurrently.
+
+    Arguments:
+        maxsize (int): maximum number of idle contexts kept in the pool
+        factory (callable): function used to create new contexts,
+            with the same signature as
+            :func:`~pyangext.utils.create_context` (default)
+    """
+
+    def __init__(self, maxsize=8, factory=create_context):
+        self.maxsize = maxsize
+        self.factory = factory
+        self._idle = OrderedDict()
+        self._baselines = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of idle contexts in the pool"""
+        with self._lock:
+            return sum(len(contexts) for contexts in self._idle.values())
+
+    def acquire(self, path='.', *options, **kwargs):
+        """Borrow a context from the pool.
+
+        If there is no idle context for the given configuration, a new
+        one is created.
+
+        Arguments are the same accepted by
+        :func:`~pyangext.utils.create_context`.
+
+        Returns:
+            pyang.Context: context object, that should be given back
+            with :meth:`release`
+        """
+        key = pool_key(path, *options, **kwargs)
+        with self._lock:
+            contexts = self._idle.get(key)
+            if contexts:
+                ctx = contexts.pop()
+                if not contexts:
+                    del self._idle[key]
+                return ctx
+
+        ctx = self.factory(path, *options, **kwargs)
+        with self._lock:
+            self._baselines[ctx] = (key, _Baseline(ctx))
+
+        return ctx
+
+    def release(self, ctx):
+        """Give back a context previously obtained with :meth:`acquire`.
+
+        Per-request state is reset before the context become available
+        again. Contexts that were not created by this pool are ignored.
+        """
+        with self._lock:
+            entry = self._baselines.get(ctx)
+            if entry is None:
+                return
+
+            key, baseline = entry
+            contexts = self._idle.pop(key, [])
+            if ctx in contexts:  # released twice
+                self._idle[key] = contexts
+                return
+
+            baseline.restore(ctx)
+            contexts.append(ctx)
+            self._idle[key] = contexts  # most recently used goes last
+            self._evict()
+
+    def _evict(self):
+        """Discard least recently used contexts until ``maxsize`` is met"""
+        excess = sum(len(contexts) for contexts in self._idle.values())
+        excess -= self.maxsize
+        while excess > 0:
+            key, contexts = next(iteritems(self._idle))
+            ctx = contexts.pop(0)
+            del self._baselines[ctx]
+            if not contexts:
+                del self._idle[key]
+            excess -= 1
+
+    def clear(self):
+        """Discard all idle contexts"""
+        with self._lock:
+            for contexts in self._idle.values():
+                for ctx in contexts:
+                    del self._baselines[ctx]
+            self._idle.clear()
+
+    @contextmanager
+    def context(self, path='.', *options, **kwargs):
+        """Borrow a context for the duration of a ``with`` block.
+
+        See Also:
+            method :meth:`acquire`
+        """
+        ctx = self.acquire(path, *options, **kwargs)
+        try:
+            yield ctx
+        finally:
+            self.release(ctx)
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""Path expressions for navigating statement trees.
+
+Instead of chaining :func:`~pyangext.utils.find` calls or writing
+:func:`~pyangext.utils.walk` predicates, statements can be located with
+expressions similar to (a very small subset of) XPath::
+
+    query(module, "module/container[config]/list[@arg='iface']//leaf")
+
+Grammar:
+
+- ``step/step``: the second step is applied to the children of the
+  statements matched by the first one
+- ``step//step``: the second step is applied to all the descendants
+- steps start with a keyword test: ``container``, ``prefix:keyword`` or
+  ``*`` (any statement), followed by optional predicates:
+
+  - ``[@arg='value']``: the argument is ``value``
+  - ``[@arg]``: the statement has an argument
+  - ``[keyword]``: the statement has a child with this keyword
+  - ``[keyword='value']``: ... and this argument
+
+The first step is matched against the given statement(s) themselves, or
+any of their descendants if the expression starts with ``//``. Keywords
+and arguments are compared as in :func:`~pyangext.utils.select` (so
+prefixes are considered, unless ``ignore_prefix`` is set).
+
+Statements are always generated before their descendants, and ``//``
+steps follow the document order. ``/`` steps, however, generate the
+children of each statement found by the previous step together, so
+when nested statements are found (e.g. ``//container/leaf``), the
+children of an inner statement come after the ones of the outer
+statement.
+
+Expressions are compiled once (and cached) into plans, that are evaluated
+lazily: statements are generated as soon as they are found, so the tree
+is only traversed as far as needed.
+"""
+import re
+
+from pyang.statements import Statement
+
+from .utils import compile_selector, iwalk
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['Query', 'compile_query', 'query']
+
+_TOKEN = re.compile(r'''
+    (?P<separator>//?)
+  | (?P<name>\*|[A-Za-z_][\w.-]*(?::[A-Za-z_][\w.-]*)?)
+  | \[(?P<predicate>
+        (?P<subject>@arg|[A-Za-z_][\w.-]*(?::[A-Za-z_][\w.-]*)?)
+        (?:=(?:'(?P<single>[^']*)'|"(?P<double>[^"]*)"))?
+    )\]
+''', re.VERBOSE)
+
+SELF = 'self'
+CHILD = 'child'
+DESCENDANT = 'descendant'
+
+
+class _Step(object):
+    """Single step of a compiled query"""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, axis, keyword, predicates, ignore_prefix=False):
+        self.axis = axis
+        self.keyword = keyword
+        self.selector = compile_selector(
+            None if keyword == '*' else keyword, None, ignore_prefix)
+        self.predicates = []
+        for (subject, value) in predicates:
+            if subject == '@arg':
+                self.predicates.append(
+                    (None, None if value is None else
+                     compile_selector(None, value, ignore_prefix)))
+            else:
+                self.predicates.append(
+                    (compile_selector(subject, value, ignore_prefix), None))
+
+    def match(self, node):
+        """Check if a statement satisfies the keyword test and predicates"""
+        if not self.selector(node):
+            return False
+
+        for (child_selector, arg_selector) in self.predicates:
+            if child_selector is not None:
+                if child_selector.first(node.substmts) is None:
+                    return False
+            elif node.arg is None:
+                return False
+            elif arg_selector is not None and not arg_selector(node):
+                return False
+
+        return True
+
+    def candidates(self, node):
+        """Statements (related to ``node`` by the axis) to be tested"""
+        if self.axis == SELF:
+            return (node,)
+        if self.axis == CHILD:
+            return node.substmts
+        return iwalk(node)  # descendants and the node itself
+
+
+class Query(object):
+    """Compiled path expression.
+
+    Instances are callables that receive a statement (or a list of
+    statements) and return a generator of the matching statements.
+
+    Arguments:
+        expression (str): path expression (see :mod:`pyangext.query`)
+        ignore_prefix (bool): compare keywords and arguments without their
+            prefixes
+
+    Raises:
+        ValueError: if the expression is invalid
+    """
+
+    def __init__(self, expression, ignore_prefix=False):
+        self.expression = expression
+        self.ignore_prefix = ignore_prefix
+        self.steps = self._compile(expression, ignore_prefix)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.expression)
+
+    @staticmethod
+    def _compile(expression, ignore_prefix=False):
+        """Transform the expression in a list of steps"""
+        tokens = []
+        pos = 0
+        while pos < len(expression):
+            match = _TOKEN.match(expression, pos)
+            if match is None:
+                raise ValueError('invalid query {!r} at position {}'.format(
+                    expression, pos))
+            tokens.append(match)
+            pos = match.end()
+
+        def _error(index):
+            position = (tokens[index].start() if index < len(tokens)
+                        else len(expression))
+            return ValueError('invalid query {!r} at position {}'.format(
+                expression, position))
+
+        steps = []
+        axis = SELF
+        i = 0
+        if tokens and tokens[0].group('separator'):
+            axis = SELF if tokens[0].group() == '/' else DESCENDANT
+            i = 1
+        while True:
+            if i >= len(tokens) or not tokens[i].group('name'):
+                raise _error(i)
+            keyword = tokens[i].group('name')
+            i += 1
+            predicates = []
+            while i < len(tokens) and tokens[i].group('predicate'):
+                value = tokens[i].group('single')
+                if value is None:
+                    value = tokens[i].group('double')
+                predicates.append((tokens[i].group('subject'), value))
+                i += 1
+            steps.append(_Step(axis, keyword, predicates, ignore_prefix))
+            if i >= len(tokens):
+                return steps
+            if not tokens[i].group('separator'):
+                raise _error(i)
+            axis = CHILD if tokens[i].group() == '/' else DESCENDANT
+            i += 1
+
+    def __call__(self, nodes):
+        """Evaluate the query.
+
+        Arguments:
+            nodes: statement or list of statements where the evaluation
+                starts
+
+        Returns:
+            generator: matching statements, without duplicates
+        """
+        if isinstance(nodes, Statement):
+            nodes = [nodes]
+
+        return self._evaluate(nodes)
+
+    def _evaluate(self, nodes):
+        """Chain the generators of each step"""
+        first = self.steps[0]
+        found = (node for root in nodes for node in first.candidates(root)
+                 if first.match(node))
+        for step in self.steps[1:]:
+            found = self._apply(step, found)
+
+        seen = set()
+        for node in found:
+            if id(node) not in seen:
+                seen.add(id(node))
+                yield node
+
+    @staticmethod
+    def _apply(step, nodes):
+        """Lazily apply a step to the statements found by the previous one
+
+        Statements are found before their descendants, so the descendants
+        of a statement inside an already walked subtree are not visited
+        again.
+        """
+        seen = set()
+        for node in nodes:
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            for candidate in step.candidates(node):
+                if candidate is node:
+                    continue
+                if step.axis == DESCENDANT:
+                    seen.add(id(candidate))
+                if step.match(candidate):
+                    yield candidate
+
+    def first(self, nodes, default=None):
+        """First matching statement, or ``default``"""
+        return next(self(nodes), default)
+
+
+_QUERIES = {}
+"""Queries compiled by :func:`compile_query`"""
+
+_MAX_QUERIES = 256
+
+
+def compile_query(expression, ignore_prefix=False):
+    """Compile (or reuse) a :class:`Query`.
+
+    Recently compiled queries are memoized, so calling this function
+    again with the same expression is cheap.
+
+    Raises:
+        ValueError: if the expression is invalid
+    """
+    key = (expression, bool(ignore_prefix))
+    compiled = _QUERIES.get(key)
+    if compiled is None:
+        if len(_QUERIES) >= _MAX_QUERIES:
+            _QUERIES.clear()
+        compiled = _QUERIES[key] = Query(expression, ignore_prefix)
+
+    return compiled
+
+
+def query(nodes, expression, ignore_prefix=False):
+    """Find statements using a path expression.
+
+    Arguments:
+        nodes: statement or list of statements where the evaluation
+            starts
+        expression (str): path expression (see :mod:`pyangext.query`)
+        ignore_prefix (bool): compare keywords and arguments without their
+            prefixes
+
+    Returns:
+        generator: matching statements
+
+    Raises:
+        ValueError: if the expression is invalid
+    """
+    return compile_query(expression, ignore_prefix)(nodes)
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""Module repositories with a persisted name index.
+
+``pyang.FileRepository`` lists (recursively) every directory in the
+search path, checking each entry with ``stat`` calls, whenever a context
+is created. :class:`IndexedRepository` keeps the result of this scan in
+an index file, together with the modification time of each directory.
+In the following runs only directories whose modification time changed
+are listed again.
+
+Example:
+    ::
+
+        ctx = create_context('vendor', index_file='.yang-index.json')
+        ctx.repository.lookup('ietf-interfaces')
+"""
+import io
+import json
+import os
+import re
+import time
+from os.path import abspath, isdir, isfile, join
+
+from pyang import FileRepository
+
+from .cache import _atomic_write
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['IndexedRepository']
+
+INDEX_VERSION = 1
+"""Format version of the persisted index"""
+
+MTIME_GRACE = 2
+"""Seconds after a change before a directory mtime is trusted"""
+
+_FILENAME = re.compile(r"^(.*?)(\@(\d{4}-\d{2}-\d{2}))?\.(yang|yin)$")
+"""Module file names, as expected by ``pyang.FileRepository``"""
+
+
+def _list_dir(directory):
+    """Scan a single directory.
+
+    Returns:
+        tuple: (list of ``[name, revision, format, file name]``,
+        list of subdirectories)
+    """
+    entries = []
+    subdirs = []
+    try:
+        files = os.listdir(directory)
+    except OSError:
+        files = []
+
+    for fname in files:
+        path = join(directory, fname)
+        if isfile(path):
+            match = _FILENAME.search(fname)
+            if match is not None and os.access(path, os.R_OK):
+                (name, _, rev, format_) = match.groups()
+                entries.append([name, rev, format_, fname])
+        elif isdir(path):
+            subdirs.append(fname)
+
+    return (entries, subdirs)
+
+
+class IndexedRepository(FileRepository):
+    """Search the filesystem for modules, using a persisted index.
+
+    Modules are discovered in the same way as in
+    ``pyang.FileRepository``, however the directory listings are stored
+    in ``index_file`` and revalidated in the next runs by comparing the
+    modification time of each directory. Changing a file does not
+    invalidate the index, since only names and locations are stored.
+
+    Arguments:
+        path (str): ``os.pathsep``-separated string of directories
+        index_file (str): location of the persisted index. If ``None``,
+            the index is kept just in memory.
+        use_env (bool): also search locations given by environment
+            variables (e.g. ``YANG_MODPATH``)
+        no_path_recurse (bool): do not recurse into subdirectories
+
+    Attributes:
+        stats (dict): number of directories ``listed`` and ``reused``
+            in the last scan
+    """
+
+    def __init__(self, path="", index_file=None,
+                 use_env=True, no_path_recurse=False):
+        FileRepository.__init__(
+            self, path, use_env=use_env, no_path_recurse=no_path_recurse)
+        self.index_file = index_file
+        self.index = None
+        self.stats = {'listed': 0, 'reused': 0}
+
+    def _load_index(self):
+        """Read the persisted directory listings"""
+        if not self.index_file:
+            return {}
+
+        try:
+            with io.open(self.index_file, 'r', encoding='utf-8') as fp:
+                data = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return {}
+
+        if (data.get('version') != INDEX_VERSION or
+                data.get('no_path_recurse') != self.no_path_recurse):
+            return {}
+
+        return data.get('dirs', {})
+
+    def _save_index(self, listings):
+        """Persist the directory listings"""
+        data = {
+            'version': INDEX_VERSION,
+            'no_path_recurse': self.no_path_recurse,
+            'dirs': listings,
+        }
+        try:
+            _atomic_write(
+                self.index_file, json.dumps(data, sort_keys=True).encode())
+        except (IOError, OSError):
+            pass  # the index is an optimization, failures are not fatal
+
+    def _setup(self, ctx):
+        """Build the list of modules, reusing unchanged directory listings"""
+        old_listings = self._load_index()
+        listings = {}
+        self.modules = []
+        self.index = {}
+        self.stats = {'listed': 0, 'reused': 0}
+        now = time.time()
+
+        def add_files_from_dir(directory):
+            key = abspath(directory)
+            if key in listings:
+                return  # already visited
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                return
+
+            listing = old_listings.get(key)
+            if listing is not None and listing['mtime'] == mtime:
+                self.stats['reused'] += 1
+            else:
+                self.stats['listed'] += 1
+                (entries, subdirs) = _list_dir(directory)
+                listing = {
+                    # recently changed directories may change again in
+                    # the same timestamp resolution, do not trust them
+                    'mtime': mtime if now - mtime > MTIME_GRACE else None,
+                    'entries': entries,
+                    'subdirs': subdirs,
+                }
+            listings[key] = listing
+
+            for (name, rev, format_, fname) in listing['entries']:
+                filename = join(directory, fname)
+                if filename.startswith("./"):
+                    filename = filename[2:]
+                handle = (format_, filename)
+                self.modules.append((name, rev, handle))
+                self.index.setdefault(name, []).append((rev, handle))
+
+            if not self.no_path_recurse and directory != '.':
+                for subdir in listing['subdirs']:
+                    add_files_from_dir(join(directory, subdir))
+
+        for directory in self.dirs:
+            add_files_from_dir(directory)
+
+        if self.index_file and listings != old_listings:
+            self._save_index(listings)
+
+    def lookup(self, modulename, revision=None):
+        """Find the handle for a module without scanning the search path.
+
+        Arguments:
+            modulename (str): name of the module
+            revision (str): revision date, if ``None`` the handle with
+                the latest revision known from the file names is returned
+
+        Returns:
+            tuple: handle accepted by ``get_module_from_handle``,
+            or ``None`` if the module is not found
+        """
+        if self.index is None:
+            self._setup(None)
+
+        candidates = self.index.get(modulename, [])
+        if revision is not None:
+            for (rev, handle) in candidates:
+                if rev == revision:
+                    return handle
+            return None
+
+        latest = None
+        for (rev, handle) in candidates:
+            if latest is None or (rev or '') > (latest[0] or ''):
+                latest = (rev, handle)
+
+        return latest and latest[1]
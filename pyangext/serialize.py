@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""Compact serialization of statement trees.
+
+``pyang`` statements reference their parents, modules and a lot of
+``i_`` attributes created during validation, so pickling them is slow and
+produces huge payloads, while :func:`~pyangext.utils.dump` generates YANG
+text that has to be parsed again.
+
+The functions in this module flatten a tree (in pre-order) into a table
+of distinct strings and a sequence of integers per statement (keyword,
+raw keyword, argument, extension module, position and number of
+substatements). Two formats are available:
+
+- ``binary``: a JSON header (with the table of strings) followed by the
+  integers packed as little-endian 32-bit values (the default)
+- ``json``: the same data as a JSON document
+
+Both formats are portable between platforms and Python versions, and
+neither uses ``pickle``, so loading data does not execute code.
+
+Validation annotations (``i_`` attributes) are just included if
+explicitly selected. Their values should be JSON compatible (strings,
+numbers, lists, dicts) or statements of the same tree. Tuples are
+loaded as lists.
+
+Example:
+    ::
+
+        data = dumps(module)
+        copy = loads(data)
+        text = dumps(module, fmt='json', annotations=['i_config'])
+"""
+import json
+import struct
+import sys
+from array import array
+
+from six import binary_type, text_type
+from six.moves import zip  # pylint: disable=redefined-builtin
+
+from pyang.error import Position
+from pyang.statements import Statement
+
+from .parser import _PLAIN_STATEMENTS, _statement
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['dumps', 'loads']
+
+FORMAT_VERSION = 2
+"""Version of the data layout, increased on incompatible changes"""
+
+FORMATS = ('binary', 'json')
+"""Names accepted by :func:`dumps`"""
+
+_MAGIC = b'PYX'
+"""Prefix of the binary format (followed by the format version)"""
+
+_HEADER = struct.Struct('<BII')
+"""Format version, size of the JSON header and number of integers"""
+
+_INT32 = 'i' if array('i').itemsize == 4 else 'l'
+"""``array`` type code for 32-bit integers"""
+
+_FIELDS = 7
+"""Integers per statement: keyword, raw keyword, argument, extension
+module, position reference, line and number of substatements"""
+
+_NODE = '$node'
+"""Key used to represent references to statements in annotations"""
+
+
+class _Table(object):
+    """Table of distinct strings (or tuples of strings)"""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.values = []
+        self._ids = {}
+
+    def add(self, value):
+        """Index of a value in the table, ``-1`` for ``None``"""
+        if value is None:
+            return -1
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+def _encode(value, nodes):
+    """Convert an annotation, replacing statements by references"""
+    if isinstance(value, Statement):
+        if id(value) not in nodes:
+            raise ValueError(
+                'annotation refers to a statement outside the tree')
+        return {_NODE: nodes[id(value)]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, nodes) for item in value]
+    if isinstance(value, dict):
+        return {key: _encode(item, nodes) for key, item in value.items()}
+
+    return value
+
+
+def _decode(value, nodes):
+    """Revert :func:`_encode`"""
+    if isinstance(value, list):
+        return [_decode(item, nodes) for item in value]
+    if isinstance(value, dict):
+        if len(value) == 1 and _NODE in value:
+            return nodes[value[_NODE]]
+        return {key: _decode(item, nodes) for key, item in value.items()}
+
+    return value
+
+
+def _flatten(node, annotations=()):
+    """Transform a tree into plain data.
+
+    Returns:
+        tuple: (table of strings, flat list of integers, annotations)
+    """
+    table = _Table()
+    fields = []
+    order = []
+    stack = [node]
+    while stack:
+        stmt = stack.pop()
+        order.append(stmt)
+        pos = stmt.pos
+        fields.extend((
+            table.add(stmt.keyword),
+            table.add(stmt.raw_keyword),
+            table.add(stmt.arg),
+            table.add(stmt.ext_mod),
+            -1 if pos is None else table.add(pos.ref),
+            0 if pos is None else pos.line,
+            len(stmt.substmts),
+        ))
+        stack.extend(reversed(stmt.substmts))
+
+    extra = {}
+    if annotations:
+        nodes = {id(stmt): i for i, stmt in enumerate(order)}
+        for i, stmt in enumerate(order):
+            values = {attr: _encode(getattr(stmt, attr), nodes)
+                      for attr in annotations if hasattr(stmt, attr)}
+            if values:
+                extra[i] = values
+
+    return (table.values, fields, extra)
+
+
+def _build(values, fields, extra):
+    """Revert :func:`_flatten`"""
+    # pylint: disable=too-many-locals
+    values = [tuple(value) if isinstance(value, list) else value
+              for value in values]
+    values.append(None)  # index -1
+    order = []
+    root = None
+    stack = []  # [statement, number of substatements still to be read]
+    (plain, new) = (_PLAIN_STATEMENTS, Statement.__new__)
+    items = iter(fields)
+    for (keyword, raw_keyword, arg, ext_mod, ref, line, count) in zip(
+            *([items] * _FIELDS)):
+        pos = None
+        if ref >= 0:
+            pos = Position(values[ref])
+            pos.line = line
+            pos.top = root
+
+        parent = stack[-1][0] if stack else None
+        if plain:  # bypass __init__
+            stmt = new(Statement)
+            stmt.__dict__ = {
+                'top': root, 'parent': parent, 'pos': pos,
+                'keyword': values[keyword], 'arg': values[arg],
+                'raw_keyword': values[raw_keyword],
+                'ext_mod': values[ext_mod], 'substmts': []}
+        else:
+            stmt = _statement(
+                root, parent, pos, values[keyword], values[arg])
+            stmt.raw_keyword = values[raw_keyword]
+            stmt.ext_mod = values[ext_mod]
+        order.append(stmt)
+
+        if root is None:
+            root = stmt
+            if pos is not None:
+                pos.top = root
+        else:
+            parent.substmts.append(stmt)
+            stack[-1][1] -= 1
+
+        if count:
+            stack.append([stmt, count])
+        while stack and not stack[-1][1]:
+            stack.pop()
+
+    for (i, attrs) in extra.items():
+        stmt = order[int(i)]
+        for (attr, value) in attrs.items():
+            setattr(stmt, attr, _decode(value, order))
+
+    return root
+
+
+def dumps(node, fmt='binary', annotations=()):
+    """Serialize a statement tree.
+
+    The parent of ``node`` (and the module it belongs to) is not included,
+    so the loaded copy is a standalone tree.
+
+    Arguments:
+        node (pyang.statements.Statement): root of the tree
+        fmt (str): ``binary`` (default) or ``json``
+        annotations (list): names of the ``i_`` attributes to be included
+
+    Returns:
+        bytes for the binary format, or str for JSON
+
+    Raises:
+        ValueError: for unknown formats, or annotations referring to
+            statements outside of the tree
+    """
+    (values, fields, extra) = _flatten(node, annotations)
+    if fmt == 'binary':
+        header = json.dumps({'strings': values, 'annotations': extra},
+                            separators=(',', ':')).encode('utf-8')
+        packed = array(_INT32, fields)
+        if sys.byteorder == 'big':
+            packed.byteswap()
+        packed = (getattr(packed, 'tobytes', None) or packed.tostring)()
+        return b''.join((
+            _MAGIC, _HEADER.pack(FORMAT_VERSION, len(header), len(fields)),
+            header, packed))
+    if fmt == 'json':
+        return json.dumps({
+            'version': FORMAT_VERSION,
+            'strings': values,
+            'statements': fields,
+            'annotations': extra,
+        }, separators=(',', ':'))
+
+    raise ValueError('unknown format {!r}, expected one of {}'.format(
+        fmt, ', '.join(FORMATS)))
+
+
+def _unpack(data):
+    """Read the parts of the binary format.
+
+    Returns:
+        tuple: (version, table of strings, integers, annotations)
+    """
+    start = len(_MAGIC)
+    if len(data) < start + _HEADER.size:
+        raise ValueError('truncated serialization data')
+    (version, size, count) = _HEADER.unpack_from(data, start)
+    if version != FORMAT_VERSION:
+        return (version, None, None, None)
+
+    start += _HEADER.size
+    header = json.loads(data[start:start + size].decode('utf-8'))
+    start += size
+    fields = array(_INT32)
+    packed = data[start:start + count * fields.itemsize]
+    if len(packed) != count * fields.itemsize:
+        raise ValueError('truncated serialization data')
+    (getattr(fields, 'frombytes', None) or fields.fromstring)(packed)
+    if sys.byteorder == 'big':
+        fields.byteswap()
+
+    return (version, header['strings'], fields, header['annotations'])
+
+
+def loads(data):
+    """Rebuild a statement tree serialized by :func:`dumps`.
+
+    The format is detected automatically.
+
+    Arguments:
+        data (bytes or str): serialized tree
+
+    Returns:
+        pyang.statements.Statement: root of the new tree
+
+    Raises:
+        ValueError: if the data was produced by an incompatible version
+            (or is truncated)
+    """
+    if isinstance(data, binary_type) and data.startswith(_MAGIC):
+        (version, values, fields, extra) = _unpack(data)
+    else:
+        if isinstance(data, binary_type):
+            data = data.decode('utf-8')
+        document = json.loads(text_type(data))
+        version = document.get('version')
+        values = document['strings']
+        fields = document['statements']
+        extra = document['annotations']
+
+    if version != FORMAT_VERSION:
+        raise ValueError('unsupported serialization format version {!r}'
+                         .format(version))
+
+    return _build(values, fields, extra)
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""Incremental loading and validation of YANG modules.
+
+A :class:`Session` keeps a long-lived context with a set of tracked files.
+Each call to :meth:`Session.refresh` detects which files changed (using
+their size, modification time and content hash), parses just those files
+and revalidates them together with the modules that depend on them.
+
+Example:
+    ::
+
+        session = Session(['models'], create_context('models'))
+        delta = session.refresh()  # first run loads everything
+        ...
+        delta = session.refresh()  # just changed modules and dependents
+        for line in delta.report():
+            print(line)
+"""
+import hashlib
+import io
+import os
+import time
+from os.path import isdir, join
+
+from six import iteritems
+
+from pyang import util
+from pyang.error import Position, err_add
+
+from .bulk import _dependency_order, _register
+from .cache import _PARSER_OPTIONS, clone_tree
+from .dependencies import DependencyGraph, ModuleHeader
+from .diagnostics import ERROR, iter_diagnostics
+from .parser import get_parser
+from .utils import create_context, objectify
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+__all__ = ['Session', 'SessionDelta']
+
+
+def _expand(paths):
+    """List YANG files, searching directories recursively"""
+    files = []
+    for path in paths:
+        if not isdir(path):
+            files.append(path)
+            continue
+        for (root, _, names) in os.walk(path):
+            files.extend(
+                join(root, name) for name in sorted(names)
+                if name.endswith('.yang'))
+
+    return files
+
+
+class SessionDelta(object):
+    """Outcome of a :meth:`Session.refresh`.
+
+    Attributes:
+        changed (list): files whose content changed (or were added)
+        removed (list): files no longer available
+        revalidated (list): files whose modules were validated again
+        added (list): new diagnostic messages
+        resolved (list): diagnostic messages that are gone
+        elapsed (float): time spent in seconds
+    """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.changed = []
+        self.removed = []
+        self.revalidated = []
+        self.added = []
+        self.resolved = []
+        self.elapsed = 0.0
+
+    def __bool__(self):
+        return bool(self.changed or self.removed)
+
+    __nonzero__ = __bool__  # python 2
+
+    def report(self):
+        """Lines describing the delta, in a human-readable way"""
+        lines = ['+ ' + message for message in self.added]
+        lines.extend('- ' + message for message in self.resolved)
+        lines.append(
+            '{} file(s) changed, {} removed, {} revalidated '
+            'in {:.3f}s'.format(len(self.changed), len(self.removed),
+                                len(self.revalidated), self.elapsed))
+
+        return lines
+
+
+class Session(object):
+    """Incrementally keep a set of YANG files loaded and validated.
+
+    Arguments:
+        paths (list): YANG files or directories (searched recursively)
+            to be tracked
+        ctx (pyang.Context): context where modules will be loaded.
+            If not specified, a new one is created with default options.
+
+    Attributes:
+        modules (dict): validated module for each tracked file name
+        diagnostics (dict): list of error and warning messages
+            for each tracked file name
+    """
+
+    def __init__(self, paths, ctx=None):
+        self.paths = list(paths)
+        self.ctx = ctx or create_context()
+        self.modules = {}
+        self.diagnostics = {}
+        self.graph = DependencyGraph()
+        self._stats = {}
+        self._digests = {}
+        self._pristine = {}
+        self._parse_tops = {}
+
+    def _detect_changes(self):
+        """Compare tracked files against their previous fingerprints.
+
+        Returns:
+            tuple: (dict with the text of changed files, removed files).
+            For files that cannot be read, the exception is stored
+            instead of the text.
+        """
+        files = _expand(self.paths)
+        removed = set(self._stats) - set(files)
+        changed = {}
+
+        for filename in files:
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                removed.add(filename)
+                continue
+
+            fingerprint = (stat.st_mtime, stat.st_size)
+            if self._stats.get(filename) == fingerprint:
+                continue
+            self._stats[filename] = fingerprint
+
+            try:
+                with io.open(filename, 'rb') as fp:
+                    content = fp.read()
+                text = content.decode('utf-8')
+            except (IOError, OSError, UnicodeDecodeError) as ex:
+                # reported as a diagnostic, the next read counts as a change
+                self._digests.pop(filename, None)
+                changed[filename] = ex
+                continue
+
+            digest = hashlib.sha1(content).hexdigest()
+            if self._digests.get(filename) != digest:
+                self._digests[filename] = digest
+                changed[filename] = text
+
+        for filename in removed:
+            self._stats.pop(filename, None)
+            self._digests.pop(filename, None)
+
+        return (changed, sorted(removed))
+
+    def _parse(self, filename, text):
+        """Parse a file, keeping a pristine (not validated) copy of it"""
+        ctx = objectify(dict(
+            (attr, getattr(self.ctx, attr, None))
+            for attr in _PARSER_OPTIONS), errors=[])
+        if isinstance(text, Exception):  # see _detect_changes
+            err_add(ctx.errors, Position(filename), 'READ_ERROR', str(text))
+            module = None
+        else:
+            parser = get_parser(getattr(self.ctx.opts, 'parser', None))
+            module = parser.parse(ctx, filename, text)
+        self._pristine[filename] = (module, ctx.errors)
+
+        return module
+
+    def _unload(self, filenames):
+        """Remove modules (and their errors) from the context"""
+        ctx = self.ctx
+        tops = set()
+        for filename in filenames:
+            module = self.modules.pop(filename, None)
+            if module is None:
+                continue
+            tops.add(id(module))
+            key = (module.arg, util.get_latest_revision(module))
+            if ctx.modules.get(key) is module:
+                del ctx.modules[key]
+            revs = [
+                (rev, handle) for (rev, handle) in ctx.revs.get(module.arg, [])
+                if handle is None or handle[0] != 'parsed' or
+                handle[1] is not module
+            ]
+            if revs:
+                ctx.revs[module.arg] = revs
+            else:  # allow "not found" errors to be reported
+                ctx.revs.pop(module.arg, None)
+
+        ctx.errors[:] = [
+            error for error in ctx.errors
+            if id(error[0].top) not in tops and error[0].ref not in filenames
+        ]
+
+    def _load(self, filenames):
+        """Add modules from their pristine copies, in dependency order"""
+        ctx = self.ctx
+        trees = {}
+        for filename in filenames:
+            (module, errors, _) = clone_tree(*self._pristine[filename])
+            ctx.errors.extend(errors)
+            # a file that fails to parse leaves errors in a partial tree
+            self._parse_tops[filename] = [error[0].top for error in errors]
+            if module is not None:
+                _register(ctx, module)
+                trees[id(module)] = (filename, module)
+
+        for module in _dependency_order([tree for _, tree in trees.values()]):
+            self.modules[trees[id(module)][0]] = ctx.add_parsed_module(module)
+
+        ctx.validate()
+
+    def _collect_diagnostics(self, filenames):
+        """Classify the errors of the given files"""
+        tops = [self.modules.get(filename) for filename in filenames]
+        tops.append(None)  # errors found before the module statement
+        for filename in filenames:
+            tops.extend(self._parse_tops.get(filename, ()))
+        print_error_code = self.ctx.opts.print_error_code
+
+        found = dict((filename, ([], [])) for filename in filenames)
+        for diagnostic in iter_diagnostics(self.ctx, modules=tops):
+            if diagnostic.file in found:
+                (errors, warnings) = found[diagnostic.file]
+                target = errors if diagnostic.severity == ERROR else warnings
+                target.append(diagnostic.format(print_error_code))
+
+        return dict(
+            (filename, errors + warnings)
+            for filename, (errors, warnings) in iteritems(found))
+
+    def refresh(self):
+        """Reload changed files and revalidate the affected modules.
+
+        Returns:
+            SessionDelta: summary of the changes
+        """
+        start = time.time()
+        delta = SessionDelta()
+        (changed, removed) = self._detect_changes()
+        delta.changed = sorted(changed)
+        delta.removed = removed
+
+        # affected: changed/removed modules and everything depending on them
+        names = set(
+            module.arg for filename, module in iteritems(self.modules)
+            if filename in changed or filename in removed)
+        for filename in removed:
+            self._pristine.pop(filename, None)
+            self._parse_tops.pop(filename, None)
+            if filename in self.modules:
+                self.graph.discard(self.modules[filename].arg)
+        for (filename, text) in iteritems(changed):
+            module = self._parse(filename, text)
+            if module is not None:
+                names.add(module.arg)
+                self.graph.add(ModuleHeader.from_statement(module))
+        names |= self.graph.reverse_closure(*names)
+
+        affected = set(changed) | set(removed) | set(
+            filename for filename, module in iteritems(self.modules)
+            if module is not None and module.arg in names)
+
+        self._unload(affected)
+        revalidated = sorted(affected - set(removed))
+        self._load(revalidated)
+        delta.revalidated = revalidated
+
+        diagnostics = self._collect_diagnostics(affected)
+        for filename in sorted(affected):
+            old = self.diagnostics.pop(filename, [])
+            new = diagnostics.get(filename, [])
+            delta.added.extend(
+                message for message in new if message not in old)
+            delta.resolved.extend(
+                message for message in old if message not in new)
+            if new:
+                self.diagnostics[filename] = new
+
+        delta.elapsed = time.time() - start
+        return delta
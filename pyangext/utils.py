@@ -2,17 +2,21 @@
 """Utility belt for working with ``pyang`` and ``pyangext``."""
 import io
 import logging
+from collections import deque
 from os.path import isfile
 from warnings import warn
 
-from six import StringIO
-
-from pyang import Context, FileRepository
-from pyang.error import err_level, err_to_str, error_codes
+from pyang import Context, FileRepository, grammar
+from pyang.error import error_codes
 from pyang.translators import yang
 from pyang.yang_parser import YangParser
 
+from .cache import ModuleCache
+from .context import ExtendedContext
 from .definitions import PREFIX_SEPARATOR
+from .diagnostics import ERROR, ErrorLog, collect_diagnostics, summarize
+from .parser import get_parser
+from .repository import IndexedRepository
 
 __all__ = [
     'create_context',
@@ -20,10 +24,20 @@ __all__ = [
     'qualify_str',
     'select',
     'find',
+    'iselect',
+    'ifind',
+    'find_first',
+    'Selector',
+    'compile_selector',
     'dump',
+    'iter_dump',
     'check',
     'parse',
+    'parse_file',
+    'parse_many',
+    'parse_text',
     'walk',
+    'iwalk',
 ]
 
 logging.basicConfig(level=logging.INFO)
@@ -37,6 +51,7 @@ DEFAULT_OPTIONS = {
     'format': 'yang',
     'keep_comments': True,
     'no_path_recurse': False,
+    'parser': None,
     'trim_yin': False,
     'yang_canonical': False,
     'yang_remove_unused_imports': False,
@@ -45,6 +60,8 @@ DEFAULT_OPTIONS = {
     'ignore_errors': [],
     'list_errors': True,
     'print_error_code': False,
+    'max_errors': None,
+    'fail_fast': False,
     'errors': [],
     'warnings': [code for code, desc in error_codes.items() if desc[0] > 4],
     'verbose': True,
@@ -117,6 +134,11 @@ def create_context(path='.', *options, **kwargs):
         ignore_error_tags (list): Ignore error code.
             (For a list of error codes see ``pyang --list-errors``).
         ignore_errors (bool): Ignore all errors. Default ``False``.
+        max_errors (int): Stop collecting diagnostics after this number
+            of errors, the remaining ones are just counted (per error
+            code). Disabled by default (or with ``0``).
+        fail_fast (bool): Stop collecting diagnostics after the first
+            error. Default ``False``.
         canonical (bool): Validate the module(s) according to the
             canonical YANG order. Default ``False``.
         yang_canonical (bool): Print YANG statements according to the
@@ -136,6 +158,15 @@ def create_context(path='.', *options, **kwargs):
         keep_comments (bool): Do not discard comments. Default ``True``.
         no_path_recurse (bool): Do not recurse into directories
             in the yang path. Default ``False``.
+        parser (str): YANG parser backend, ``pyang`` (default) or
+            ``fast``. See :class:`pyangext.parser.FastYangParser`.
+        cache_dir (str): Directory used to persist parsed modules, so
+            unchanged files are not parsed again in future runs.
+            Disabled by default. See :class:`pyangext.cache.ModuleCache`.
+        index_file (str): File used to persist the list of modules found
+            in the yang path, so only changed directories are listed
+            again in future runs. Disabled by default.
+            See :class:`pyangext.repository.IndexedRepository`.
 
     Returns:
         pyang.Context: Context object for ``pyang`` usage
@@ -143,10 +174,20 @@ def create_context(path='.', *options, **kwargs):
     # deviations (list): Deviation module (NOT CURRENTLY WORKING).
 
     opts = objectify(DEFAULT_OPTIONS, *options, **kwargs)
-    repo = FileRepository(path, no_path_recurse=opts.no_path_recurse)
-
-    ctx = Context(repo)
+    if opts.index_file:
+        repo = IndexedRepository(path, index_file=opts.index_file,
+                                 no_path_recurse=opts.no_path_recurse)
+    else:
+        repo = FileRepository(path, no_path_recurse=opts.no_path_recurse)
+
+    if opts.cache_dir or opts.parser:
+        module_cache = ModuleCache(opts.cache_dir) if opts.cache_dir else None
+        ctx = ExtendedContext(repo, module_cache=module_cache,
+                              yang_parser=get_parser(opts.parser))
+    else:
+        ctx = Context(repo)
     ctx.opts = opts
+    ctx.errors = ErrorLog()
 
     for attr in _COPY_OPTIONS:
         setattr(ctx, attr, getattr(opts, attr))
@@ -196,13 +237,157 @@ def compare_prefixed(arg1, arg2,
     return cmp1 == cmp2
 
 
+def _qualified_query(query, ignore_prefix=False):
+    """Pre-qualify part of a query.
+
+    Returns:
+        tuple: (function equivalent to :func:`compare_prefixed` for the
+        query, string that matches candidates without prefix)
+    """
+    qualified = qualify_str(query)
+    if ignore_prefix:
+        qualified = qualified[-1:]
+        target = qualified[0]
+    else:
+        # candidates without prefix are qualified as ('', candidate)
+        target = qualified[1] if qualified[0] == '' else None
+
+    def _compare(candidate):
+        candidate = qualify_str(candidate)
+        if ignore_prefix:
+            return candidate[-1:] == qualified
+        return candidate == qualified
+
+    return (_compare, target)
+
+
+class Selector(object):
+    """Precompiled criteria for :func:`select` and :func:`find`.
+
+    The query is qualified (split in prefix and name) just once, and
+    candidates are compared with cheap equality checks first, so the same
+    selector can be efficiently applied to many statements. Instances are
+    callables that receive a statement and return a bool.
+
+    Arguments:
+        keyword (str): if specified the statements should have this keyword
+        arg (str): if specified the statements should have this argument
+        ignore_prefix (bool): compare keywords and arguments without their
+            prefixes
+
+    See Also:
+        function :func:`compile_selector`
+    """
+    __slots__ = ('keyword', 'arg', 'ignore_prefix', 'match')
+
+    def __init__(self, keyword=None, arg=None, ignore_prefix=False):
+        self.keyword = keyword
+        self.arg = arg
+        self.ignore_prefix = ignore_prefix
+        self.match = self._compile()
+
+    def _compile(self):
+        """Build the function that checks a statement"""
+        (keyword, arg) = (self.keyword or None, self.arg or None)
+        compare_keyword = keyword_target = compare_arg = arg_target = None
+        if keyword is not None:
+            (compare_keyword, keyword_target) = _qualified_query(
+                keyword, self.ignore_prefix)
+        if arg is not None:
+            (compare_arg, arg_target) = _qualified_query(
+                arg, self.ignore_prefix)
+
+        def _match(item):
+            # equal values first, then candidates without prefix,
+            # qualifying the candidates just as a last resort
+            if keyword is not None and item.keyword != keyword:
+                raw = item.raw_keyword
+                if isinstance(raw, tuple) or PREFIX_SEPARATOR in raw:
+                    if not compare_keyword(raw):
+                        return False
+                elif raw != keyword_target:
+                    return False
+
+            if arg is not None and item.arg != arg:
+                value = item.arg
+                if value is None:
+                    return False
+                if isinstance(value, tuple) or PREFIX_SEPARATOR in value:
+                    if not compare_arg(value):
+                        return False
+                elif value != arg_target:
+                    return False
+
+            return True
+
+        return _match
+
+    def __call__(self, item):
+        return self.match(item)
+
+    def __repr__(self):
+        return '{}({!r}, {!r}, ignore_prefix={!r})'.format(
+            type(self).__name__, self.keyword, self.arg, self.ignore_prefix)
+
+    def select(self, statements):
+        """Filter the statements that match the criteria"""
+        match = self.match
+        return [item for item in statements if match(item)]
+
+    def iselect(self, statements):
+        """Lazy version of :meth:`select` (generator)"""
+        match = self.match
+        for item in statements:
+            if match(item):
+                yield item
+
+    def first(self, statements, default=None):
+        """First statement that matches the criteria, or ``default``.
+
+        The remaining statements are not checked.
+        """
+        match = self.match
+        for item in statements:
+            if match(item):
+                return item
+
+        return default
+
+
+_SELECTORS = {}
+"""Selectors compiled by :func:`compile_selector`"""
+
+_MAX_SELECTORS = 512
+
+
+def compile_selector(keyword=None, arg=None, ignore_prefix=False):
+    """Create (or reuse) a :class:`Selector`.
+
+    Recently compiled selectors are memoized, so calling this function
+    again with the same criteria is cheap.
+
+    Returns:
+        Selector: callable that checks if a statement matches the criteria
+    """
+    key = (keyword, arg, bool(ignore_prefix))
+    selector = _SELECTORS.get(key)
+    if selector is None:
+        if len(_SELECTORS) >= _MAX_SELECTORS:
+            _SELECTORS.clear()
+        selector = _SELECTORS[key] = Selector(keyword, arg, ignore_prefix)
+
+    return selector
+
+
 def select(statements, keyword=None, arg=None, ignore_prefix=False):
     """Given a list of statements filter by keyword, or argument or both.
 
     Arguments:
         statements (list of pyang.statements.Statement):
             list of statements to be filtered.
-        keyword (str): if specified the statements should have this keyword
+        keyword (str or Selector): if specified the statements should
+            have this keyword. A precompiled :class:`Selector` can be used
+            instead of the other arguments.
         arg (str): if specified the statements should have this argument
 
     ``keyword`` and ``arg`` can be also used as keyword arguments.
@@ -210,21 +395,7 @@ def select(statements, keyword=None, arg=None, ignore_prefix=False):
     Returns:
         list: nodes that matches the conditions
     """
-    response = []
-    for item in statements:
-        if (keyword and keyword != item.keyword and
-                not compare_prefixed(
-                    keyword, item.raw_keyword, ignore_prefix=ignore_prefix)):
-            continue
-
-        if (arg and arg != item.arg and
-                not compare_prefixed(
-                    arg, item.arg, ignore_prefix=ignore_prefix)):
-            continue
-
-        response.append(item)
-
-    return response
+    return _selector(keyword, arg, ignore_prefix).select(statements)
 
 
 def find(parent, keyword=None, arg=None, ignore_prefix=False):
@@ -236,6 +407,55 @@ def find(parent, keyword=None, arg=None, ignore_prefix=False):
     return select(parent.substmts, keyword, arg, ignore_prefix)
 
 
+def _selector(keyword=None, arg=None, ignore_prefix=False):
+    """Precompiled selector for the given criteria"""
+    if isinstance(keyword, Selector):
+        return keyword
+
+    return compile_selector(keyword, arg, ignore_prefix)
+
+
+def iselect(statements, keyword=None, arg=None, ignore_prefix=False):
+    """Lazy version of :func:`select`.
+
+    Statements are checked on demand, so no intermediate list is built
+    and the iteration can be interrupted as soon as the caller is
+    satisfied.
+
+    Returns:
+        generator: nodes that matches the conditions
+    """
+    return _selector(keyword, arg, ignore_prefix).iselect(statements)
+
+
+def ifind(parent, keyword=None, arg=None, ignore_prefix=False):
+    """Lazy version of :func:`find`.
+
+    See Also:
+        function :func:`iselect`
+    """
+    return iselect(parent.substmts, keyword, arg, ignore_prefix)
+
+
+def find_first(parent, keyword=None, arg=None, ignore_prefix=False,
+               default=None):
+    """Find the first sub-statement by keyword, or argument or both.
+
+    Equivalent to ``find(parent, keyword, arg)[0]`` for statements that
+    are expected to appear once (e.g. ``type``, ``prefix``,
+    ``description``), but stops in the first match and returns
+    ``default`` instead of raising ``IndexError`` when there is none.
+
+    Returns:
+        pyang.statements.Statement: matching node or ``default``
+
+    See Also:
+        function :func:`select`
+    """
+    return _selector(keyword, arg, ignore_prefix).first(
+        parent.substmts, default)
+
+
 def walk(parent, select=lambda x: x, apply=lambda x: x, key='substmts'):
     # pylint: disable=redefined-builtin,redefined-outer-name
     """Recursivelly find nodes and/or apply a function to them.
@@ -252,20 +472,103 @@ def walk(parent, select=lambda x: x, apply=lambda x: x, key='substmts'):
 
     Returns:
         list: results collected from the apply function
+
+    See Also:
+        function :func:`iwalk`, to stop as soon as something is found
+    """
+    return [apply(node) for node in iwalk(parent, key=key) if select(node)]
+
+
+WALK_ORDERS = ('pre', 'post', 'breadth')
+"""Traversal orders accepted by :func:`iwalk`"""
+
+
+def iwalk(parent, order='pre', prune=None, max_depth=None, key='substmts'):
+    """Iterate over the nodes of a subtree (including its root).
+
+    Nodes are generated lazily, without recursion, so the traversal can be
+    stopped as soon as the desired node is found::
+
+        leaf = next(node for node in iwalk(module)
+                    if node.keyword == 'leaf')
+
+    Arguments:
+        parent (pyang.statements.Statement): root of the subtree
+        order (str): ``pre`` (default, parents before their children),
+            ``post`` (children before their parents) or ``breadth``
+            (level by level)
+        prune: optional callable that receives a node and returns
+            ``True`` if its descendants should not be visited
+            (the node itself is still generated)
+        max_depth (int): do not descend further than this depth
+            (the root has depth ``0``)
+        key (str): property where the children nodes are stored,
+            default is ``substmts``
+
+    Yields:
+        pyang.statements.Statement: nodes of the subtree
+
+    Raises:
+        ValueError: for unknown orders
     """
-    results = []
-    if select(parent):
-        results.append(apply(parent))
+    if order not in WALK_ORDERS:
+        raise ValueError('unknown order {!r}, expected one of {}'.format(
+            order, ', '.join(WALK_ORDERS)))
+
+    def _children(node, depth):
+        if max_depth is not None and depth >= max_depth:
+            return ()
+        if prune is not None and prune(node):
+            return ()
+        return getattr(node, key, None) or ()
+
+    if order == 'pre':
+        stack = [(parent, 0)]
+        while stack:
+            (node, depth) = stack.pop()
+            yield node
+            stack.extend(
+                (child, depth + 1)
+                for child in reversed(_children(node, depth)))
+    elif order == 'breadth':
+        queue = deque([(parent, 0)])
+        while queue:
+            (node, depth) = queue.popleft()
+            yield node
+            queue.extend(
+                (child, depth + 1) for child in _children(node, depth))
+    else:
+        # nodes are visited twice: first expanded, then generated
+        stack = [(parent, 0, False)]
+        while stack:
+            (node, depth, expanded) = stack.pop()
+            if expanded:
+                yield node
+                continue
+            stack.append((node, depth, True))
+            stack.extend(
+                (child, depth + 1, False)
+                for child in reversed(_children(node, depth)))
+
 
-    if hasattr(parent, key):
-        children = getattr(parent, key)
-        for child in children:
-            results.extend(walk(child, select, apply, key))
+class _Chunks(list):
+    """Minimal *file-like* object that accumulates written text"""
 
-    return results
+    write = list.append
 
 
-def dump(node, file_obj=None, prev_indent='', indent_string='  ', ctx=None):
+_EMIT_CONTEXT = objectify(opts=objectify(
+    yang_canonical=DEFAULT_OPTIONS['yang_canonical'],
+    yang_remove_unused_imports=DEFAULT_OPTIONS['yang_remove_unused_imports']))
+"""Lightweight context used by :func:`dump` when no context is given.
+
+Emitting YANG just needs the printing options, so there is no reason to
+create (and scan the modules of) a new repository for each call.
+"""
+
+
+def dump(node, file_obj=None, prev_indent='', indent_string='  ', ctx=None,
+         cache=None):
     """Generate a string representation of an abstract syntax tree.
 
     Arguments:
@@ -280,23 +583,160 @@ def dump(node, file_obj=None, prev_indent='', indent_string='  ', ctx=None):
         ctx (pyang.Context): context object used to generate string
             representation. If no context is passed, a dummy object
             is used with default configuration
+        cache (pyangext.cache.RenderCache): reuse the text previously
+            emitted for identical subtrees. Ignored when unused imports
+            should be removed (``yang_remove_unused_imports`` option).
 
     Returns:
         str: text content if ``file_obj`` is not specified
+
+    See Also:
+        function :func:`iter_dump`, for large trees
     """
-    # create a buffer to allow string return if no file_obj given
-    _file_obj = file_obj or StringIO()
+    # pylint: disable=too-many-arguments
+    ctx = ctx or _EMIT_CONTEXT
+
+    # collect the pieces of text to allow string return if no file_obj given
+    _file_obj = file_obj or _Chunks()
 
     # process AST
-    yang.emit_stmt(
-        ctx or create_context(), node, _file_obj, 1, None,
-        prev_indent, indent_string)
+    if cache is None or ctx.opts.yang_remove_unused_imports:
+        yang.emit_stmt(
+            ctx, node, _file_obj, 1, None, prev_indent, indent_string)
+    else:
+        _file_obj.write(_render(
+            ctx, (node, 1, None, prev_indent), indent_string,
+            cache, cache.fingerprints(node)))
+
+    return file_obj or ''.join(_file_obj)
+
+
+def _is_unused_import(ctx, stmt):
+    """Check if an import statement is omitted by ``pyang``'s emitter"""
+    if not (ctx.opts.yang_remove_unused_imports and stmt.keyword == 'import'):
+        return False
+
+    unused = stmt.parent.i_unused_prefixes
+    return any(unused[prefix] is stmt for prefix in unused)
+
+
+def _emit_head(ctx, item, buffer, indent_string):
+    """Emit a statement, but just open the block of its substatements.
+
+    Arguments:
+        item (tuple): statement, level, class of the previous keyword and
+            indentation (arguments of ``pyang``'s ``emit_stmt``)
+        buffer (_Chunks): where the text is written
 
-    # one-liners <3: if no file_obj get buffer content and close it!
-    return file_obj or (_file_obj.getvalue(), _file_obj.close())[0]
+    Returns:
+        list: items for the substatements, that should be emitted
+        before closing the block (indentation and closing brace)
+    """
+    (stmt, level, prev_kwd_class, indent) = item
+
+    # let pyang emit the statement itself (without substatements)
+    head = object.__new__(type(stmt))
+    head.__dict__.update(stmt.__dict__)
+    head.substmts = []
+    yang.emit_stmt(ctx, head, buffer, level, prev_kwd_class,
+                   indent, indent_string)
+    if not stmt.substmts:
+        return []
+
+    buffer[-1] = ' {\n'  # instead of ';\n'
+    substmts = stmt.substmts
+    if ctx.opts.yang_canonical:
+        substmts = grammar.sort_canonical(stmt.keyword, substmts)
+    kwd_class = 'header' if level == 0 else yang.get_kwd_class(stmt.keyword)
+    children = []
+    for child in substmts:
+        if not _is_unused_import(ctx, child):
+            children.append(
+                (child, level + 1, kwd_class, indent + indent_string))
+        kwd_class = yang.get_kwd_class(child.keyword)
+
+    return children
+
+
+def _render(ctx, item, indent_string, cache, fingerprints):
+    """Emit the text of a subtree, reusing cached texts"""
+    (stmt, level, prev_kwd_class, indent) = item
+    if not stmt.substmts:  # cheap enough
+        buffer = _Chunks()
+        _emit_head(ctx, item, buffer, indent_string)
+        return ''.join(buffer)
+
+    # top level statements may be preceded by an empty line, depending on
+    # the previous keyword, so they cannot share texts with nested ones
+    top = level == 1
+    key = (fingerprints[id(stmt)], indent, indent_string,
+           bool(ctx.opts.yang_canonical), top,
+           prev_kwd_class if top else None)
+    text = cache.get(key)
+    if text is None:
+        buffer = _Chunks()
+        for child in _emit_head(ctx, item, buffer, indent_string):
+            buffer.append(
+                _render(ctx, child, indent_string, cache, fingerprints))
+        buffer.append(indent + '}\n')
+        text = ''.join(buffer)
+        cache.put(key, text)
+
+    return text
+
+
+def iter_dump(node, prev_indent='', indent_string='  ', ctx=None,
+              chunk_size=64 * 1024):
+    """Generate the string representation of an abstract syntax tree
+    in chunks.
+
+    The text is exactly the same produced by :func:`dump`, but it is
+    generated incrementally (without recursion), so it can be streamed
+    to a socket or file without holding the entire output in memory.
 
+    Arguments:
+        node (pyang.statements.Statement): object to be represented
+
+    Keyword Arguments:
+        prev_indent (str): string to be added to the produced indentation
+        indent_string (str): string to be used as indentation
+        ctx (pyang.Context): context object used to generate string
+            representation (see :func:`dump`)
+        chunk_size (int): approximated number of characters in each chunk
 
-def check(ctx, rescue=False):
+    Yields:
+        str: consecutive pieces of the text
+    """
+    ctx = ctx or _EMIT_CONTEXT
+    buffer = _Chunks()
+    size = 0
+    # items are statements to emit (with their emitter arguments)
+    # or closing braces
+    stack = [] if _is_unused_import(ctx, node) else [
+        (node, 1, None, prev_indent)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, tuple):
+            start = len(buffer)
+            children = _emit_head(ctx, item, buffer, indent_string)
+            if children:
+                stack.append(item[3] + '}\n')
+                stack.extend(reversed(children))
+            size += sum(len(piece) for piece in buffer[start:])
+        else:
+            buffer.append(item)
+            size += len(item)
+
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            del buffer[:]
+            size = 0
+
+    if buffer:
+        yield ''.join(buffer)
+
+
+def check(ctx, rescue=False, max_errors=None, fail_fast=None, modules=None):
     """Check existence of errors or warnings in context.
 
     Code mostly borrowed from ``pyang`` script.
@@ -306,6 +746,15 @@ def check(ctx, rescue=False):
 
     Keyword Arguments:
         rescue (bool): if ``True``, no exception/warning will be raised.
+        max_errors (int): stop after this number of errors. Diagnostics
+            found afterwards are summarized as counts per error code in
+            an additional error message. ``0`` means unlimited (even if
+            ``ctx.opts.max_errors`` is set). Default:
+            ``ctx.opts.max_errors``.
+        fail_fast (bool): stop after the first error.
+            Default: ``ctx.opts.fail_fast``.
+        modules (list): check just the errors found in these
+            (sub)modules, instead of the entire context.
 
     Raises:
         SyntaxError: if errors detected
@@ -315,39 +764,28 @@ def check(ctx, rescue=False):
 
     Returns:
         tuple: (list of errors, list of warnings), if ``rescue`` is ``True``
+
+    See Also:
+        function :func:`~pyangext.diagnostics.iter_diagnostics`, for
+        structured records instead of formatted messages
     """
-    errors = []
-    warnings = []
     opts = ctx.opts
+    if fail_fast is None:
+        fail_fast = getattr(opts, 'fail_fast', False)
+    if max_errors is None:
+        max_errors = getattr(opts, 'max_errors', None)
+    if fail_fast:
+        max_errors = 1
 
-    if opts.ignore_errors:
-        return (errors, warnings)
-
-    for (epos, etag, eargs) in ctx.errors:
-        if (hasattr(opts, 'ignore_error_tags') and
-                etag in opts.ignore_error_tags):
-            continue
-        if not ctx.implicit_errors and hasattr(epos.top, 'i_modulename'):
-            # this module was added implicitly (by import); skip this error
-            # the code includes submodules
-            continue
-        elevel = err_level(etag)  # elevel 4 -> warning
-        explain = err_to_str(etag, eargs)
-        reason = etag if opts.print_error_code else explain
-        if 'unexpected keyword "description"' in reason:
-            # TODO: WTF pyang bug??
-            elevel = 4
-        message = '({}) {}'.format(str(epos), reason)
-        if (elevel >= 4 or etag in opts.warnings) and etag not in opts.errors:
-            if 'error' in opts.warnings and etag not in opts.warnings:
-                pass
-            elif 'none' in opts.warnings:
-                continue
-            else:
-                warnings.append(message)
-                continue
+    errors = []
+    warnings = []
+    (diagnostics, omitted) = collect_diagnostics(ctx, max_errors, modules)
+    for diagnostic in diagnostics:
+        target = errors if diagnostic.severity == ERROR else warnings
+        target.append(diagnostic.format(opts.print_error_code))
 
-        errors.append(message)
+    if omitted:
+        errors.append(summarize(omitted))
 
     if rescue:
         return (errors, warnings)
@@ -362,12 +800,14 @@ def check(ctx, rescue=False):
     return (errors, warnings)
 
 
-def parse(text, ctx=None):
+def parse(text, ctx=None, cache=None):
     """Parse a YANG statement into an Abstract Syntax subtree.
 
     Arguments:
         text (str): file name for a YANG module or text
         ctx (optional pyang.Context): context used to validate text
+        cache (optional pyangext.cache.ParseCache): memoize the parsed
+            trees, so repeated texts are not parsed again
 
     Returns:
         pyang.statements.Statement: Abstract syntax subtree
@@ -380,28 +820,132 @@ def parse(text, ctx=None):
 
         It is also well known that ``parse`` function cannot solve
         YANG deviations yet.
+
+    See Also:
+        functions :func:`parse_text` and :func:`parse_file`, that avoid
+        guessing if ``text`` is a file name.
     """
-    parser = YangParser()
+    if '\n' not in text and isfile(text):  # file names have no line breaks
+        return parse_file(text, ctx, cache)
 
-    filename = 'parser-input'
+    return parse_text(text, ctx, cache=cache)
 
-    ctx_ = ctx or create_context()
 
-    if isfile(text):
-        filename = text
-        with open(filename, 'r') as fp:
-            text = fp.read()
+def parse_text(text, ctx=None, ref='parser-input', cache=None):
+    """Parse YANG text into an Abstract Syntax subtree.
 
-    # ensure reported errors are just from parsing
-    old_errors = ctx_.errors
-    ctx_.errors = []
+    Arguments:
+        text (str): YANG content
+        ctx (optional pyang.Context): context used to validate text
+        ref (str): name used to identify the text in error messages
+        cache (optional pyangext.cache.ParseCache): memoize the parsed
+            trees, so repeated texts are not parsed again
 
-    ast = parser.parse(ctx_, filename, text)
+    Returns:
+        pyang.statements.Statement: Abstract syntax subtree
 
-    # look for errors and warnings
-    check(ctx_)
+    Raises:
+        SyntaxError: if errors detected (see :func:`check`)
+    """
+    ctx = ctx or create_context()
 
-    # restore other errors
-    ctx_.errors = old_errors
+    # ensure reported errors are just from parsing
+    old_errors = ctx.errors
+    ctx.errors = type(old_errors)()
+
+    try:
+        parser = getattr(ctx, 'yang_parser', None) or YangParser()
+        if cache is None:
+            ast = parser.parse(ctx, ref, text)
+        else:
+            ast = cache.parse(ctx, ref, text, parser)
+
+        # look for errors and warnings
+        check(ctx)
+    finally:
+        # restore other errors
+        ctx.errors = old_errors
 
     return ast
+
+
+def parse_file(filename, ctx=None, cache=None):
+    """Parse a YANG file into an Abstract Syntax subtree.
+
+    Arguments:
+        filename (str): location of the YANG content (UTF-8 encoded)
+        ctx (optional pyang.Context): context used to validate text
+        cache (optional pyangext.cache.ParseCache): memoize the parsed
+            trees, so repeated texts are not parsed again
+
+    Returns:
+        pyang.statements.Statement: Abstract syntax subtree
+
+    Raises:
+        SyntaxError: if errors detected (see :func:`check`)
+    """
+    return parse_text(_read_file(filename), ctx, filename, cache)
+
+
+def _read_file(filename, encoding='utf-8'):
+    """Read the content of a text file with a single binary read.
+
+    Line endings are normalized as done by ``open`` in text mode.
+
+    Arguments:
+        filename (str): file location
+        encoding (str): text encoding
+
+    Returns:
+        str: decoded content
+    """
+    with io.open(filename, 'rb') as fp:
+        text = fp.read().decode(encoding)
+
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+    return text
+
+
+def parse_many(texts, ctx=None, lazy=False, cache=None):
+    """Parse several YANG snippets, sharing the parser and context.
+
+    Differently from :func:`parse`, no exception or warning is raised:
+    the diagnostics of each snippet are returned together with its tree.
+
+    Arguments:
+        texts (iterable): YANG texts
+        ctx (optional pyang.Context): context used to validate the texts.
+            If not specified, a single new one is created for all of them.
+        lazy (bool): if ``True``, return a generator that parses each
+            text just when it is requested
+        cache (optional pyangext.cache.ParseCache): memoize the parsed
+            trees, so repeated texts are not parsed again
+
+    Returns:
+        list: tuples ``(ast, (list of errors, list of warnings))``, one per
+        text (``ast`` is ``None`` if the text cannot be parsed). See
+        :func:`check`.
+    """
+    results = _iter_parse(texts, ctx or create_context(), cache)
+    return results if lazy else list(results)
+
+
+def _iter_parse(texts, ctx, cache=None):
+    """Generator behind :func:`parse_many`"""
+    parser = getattr(ctx, 'yang_parser', None) or YangParser()
+    for text in texts:
+        # keep the errors of each text apart from the other ones
+        old_errors = ctx.errors
+        ctx.errors = type(old_errors)()
+        try:
+            if cache is None:
+                ast = parser.parse(ctx, 'parser-input', text)
+            else:
+                ast = cache.parse(ctx, 'parser-input', text, parser)
+            diagnostics = check(ctx, rescue=True)
+        finally:
+            ctx.errors = old_errors
+
+        yield (ast, diagnostics)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for asyncio-friendly API (python 3.5+, see conftest.py)
+"""
+import asyncio
+import threading
+
+import pytest
+
+from pyang.statements import Statement
+
+from pyangext import aio
+from pyangext.utils import dump
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+MODULE = 'module a { namespace urn:a; prefix a; leaf x { type string; } }'
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine in a new event loop"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+def test_parse_and_dump(run):
+    """
+    awaitable parse and dump should be equivalent to the blocking ones
+    """
+    ast = run(aio.parse('leaf x { type string; }'))
+    assert isinstance(ast, Statement)
+    assert run(aio.dump(ast)) == dump(ast)
+
+    with pytest.raises(SyntaxError):
+        run(aio.parse('module a { keyword }'))
+
+
+def test_validate(run):
+    """
+    validate should report the diagnostics of the module
+    """
+    assert run(aio.validate(MODULE)) == ([], [])
+
+    (errors, _) = run(aio.validate(
+        'module b { namespace urn:b; }', rescue=True, print_error_code=True))
+    assert any('MISSING_ARGUMENT' in error or 'EXPECTED_KEYWORD' in error
+               for error in errors)
+
+
+def test_validate_submodule(run, tmpdir):
+    """
+    validate should report the diagnostics of included submodules
+    """
+    tmpdir.join('s.yang').write("""
+        submodule s {
+          belongs-to c { prefix c; }
+          leaf y { type undefined; }
+        }""")
+    (errors, _) = run(aio.validate(
+        'module c { namespace urn:c; prefix c; include s; }', str(tmpdir),
+        rescue=True, print_error_code=True))
+    assert any('s.yang' in error and 'TYPE_NOT_FOUND' in error
+               for error in errors)
+
+
+def test_concurrency_limit(run):
+    """
+    operations waiting for a slot should be cancellable
+    """
+    started = threading.Event()
+    release = threading.Event()
+
+    def _block():
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    async def scenario(runner):
+        # pylint: disable=protected-access
+        first = asyncio.ensure_future(runner._run(_block))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await runner.parse('leaf x;', timeout=0.1)
+        release.set()
+        return (await first, await runner.parse('leaf y;'))
+
+    runner = aio.Runner(max_workers=2, max_concurrency=1)
+    try:
+        (blocked, ast) = run(scenario(runner))
+    finally:
+        runner.close()
+
+    assert blocked == 'done' and ast.arg == 'y'
+
+
+def test_concurrency_limit_after_timeout(run):
+    """
+    operations that timed out while running should keep their slot
+    until they finish
+    """
+    started = threading.Event()
+    release = threading.Event()
+
+    def _block():
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    async def scenario(runner):
+        # pylint: disable=protected-access
+        with pytest.raises(asyncio.TimeoutError):
+            await runner._run(_block, timeout=0.1)
+        assert started.is_set()
+        with pytest.raises(asyncio.TimeoutError):
+            await runner.parse('leaf x;', timeout=0.1)
+        release.set()
+        return await runner.parse('leaf y;', timeout=5)
+
+    runner = aio.Runner(max_workers=2, max_concurrency=1)
+    try:
+        ast = run(scenario(runner))
+    finally:
+        runner.close()
+
+    assert ast.arg == 'y'
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for bulk operations
+"""
+import io
+import json
+
+import pytest
+
+from pyangext.bulk import MANIFEST, dump_all, load_modules
+from pyangext.utils import create_context, dump, parse_file
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+
+@pytest.fixture
+def models(tmpdir):
+    """Directory with YANG modules depending on each other"""
+    models = tmpdir.mkdir('models')
+    models.join('a.yang').write("""
+        module a {
+          namespace urn:a; prefix a;
+          import b { prefix b; }
+          include a-sub;
+          leaf x { type b:code; }
+        }""")
+    models.join('a-sub.yang').write("""
+        submodule a-sub {
+          belongs-to a { prefix a; }
+          import c { prefix c; }
+          leaf y { type c:code; }
+        }""")
+    models.join('b.yang').write("""
+        module b {
+          namespace urn:b; prefix b;
+          import c { prefix c; }
+          typedef code { type c:code; }
+        }""")
+    models.join('c.yang').write("""
+        module c {
+          namespace urn:c; prefix c;
+          typedef code { type string; }
+        }""")
+    models.join('broken.yang').write('module broken {')
+
+    return models
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_load_modules(models, workers):
+    """
+    all modules should be loaded and validated
+    modules should be returned in the same order of the files
+    modules loaded in bulk should be reused by the ones that import them
+    """
+    ctx = create_context(str(models))
+    names = ['a', 'b', 'c', 'a-sub']
+    paths = [str(models.join(name + '.yang')) for name in names]
+
+    modules, (errors, warnings) = load_modules(paths, ctx, workers)
+
+    assert [module.arg for module in modules] == names
+    assert not errors and not warnings
+    for module in modules:
+        assert module.i_is_validated
+        assert ctx.get_module(module.arg) is module
+    assert modules[0].i_prefixes['b'][0] == 'b'
+
+
+def test_load_modules_diagnostics(models):
+    """
+    parser errors from workers should be reported
+    failed files should map to None
+    """
+    ctx = create_context(str(models))
+    paths = [str(models.join(name)) for name in ('c.yang', 'broken.yang')]
+
+    with pytest.raises(SyntaxError) as info:
+        load_modules(paths, ctx, workers=2)
+    assert 'broken.yang' in str(info.value)
+
+    ctx = create_context(str(models))
+    modules, (errors, _) = load_modules(paths, ctx, workers=2, rescue=True)
+    assert modules[0].arg == 'c'
+    assert modules[1] is None
+    assert len(errors) == 1
+
+
+def test_load_missing_file(tmpdir):
+    """
+    unreadable files should be reported as errors
+    """
+    modules, (errors, _) = load_modules(
+        [str(tmpdir.join('missing.yang'))], create_context(), rescue=True)
+    assert modules == [None]
+    assert 'missing.yang' in errors[0]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_dump_all(models, tmpdir, workers):
+    """
+    all modules should be written to the output directory
+    unchanged modules should be skipped in the next runs
+    """
+    out_dir = str(tmpdir.join('out'))
+    paths = [str(models.join(name + '.yang')) for name in 'abc']
+
+    (written, skipped, _) = dump_all(paths, out_dir, workers=workers)
+    assert [output.basename for output in map(tmpdir.join, written)] == [
+        'a.yang', 'b.yang', 'c.yang']
+    assert not skipped
+    with io.open(written[1], encoding='utf-8') as fp:
+        assert fp.read() == dump(parse_file(paths[1]))
+
+    (written, skipped, _) = dump_all(paths, out_dir, workers=workers)
+    assert not written and len(skipped) == 3
+
+    # changes in the source or in the options are detected
+    models.join('c.yang').write('module c { namespace urn:c; prefix c; }')
+    (written, skipped, _) = dump_all(paths, out_dir, workers=workers)
+    assert [str(tmpdir.join('out', 'c.yang'))] == written
+
+    (written, _, _) = dump_all(
+        paths, out_dir, workers=workers, indent_string='\t')
+    assert len(written) == 3
+
+    (written, _, _) = dump_all(
+        paths, out_dir, workers=workers, indent_string='\t', force=True)
+    assert len(written) == 3
+
+
+def test_dump_all_options(models, tmpdir):
+    """
+    emit options should be taken from the context
+    parser errors should be reported
+    """
+    out_dir = tmpdir.join('out')
+    models.join('e.yang').write('module e { prefix e; namespace urn:e; }')
+    paths = [str(models.join(name + '.yang')) for name in ('e', 'broken')]
+    ctx = create_context(str(models), yang_canonical=True)
+
+    with pytest.raises(SyntaxError):
+        dump_all(paths, str(out_dir), create_context(str(models)))
+
+    (written, skipped, (errors, _)) = dump_all(
+        paths, str(out_dir), ctx, rescue=True)
+    assert len(written) == 1 and not skipped
+    assert 'broken.yang' in errors[0]
+    assert not out_dir.join('broken.yang').exists()
+    assert out_dir.join('e.yang').read().startswith(
+        'module e {\n  namespace')
+
+    # unused imports can only be detected after validation
+    models.join('d.yang').write("""
+        module d {
+          namespace urn:d; prefix d;
+          import c { prefix c; }
+        }""")
+    ctx = create_context(str(models), yang_remove_unused_imports=True)
+    (written, _, _) = dump_all(
+        [str(models.join('d.yang'))], str(out_dir), ctx, rescue=True)
+    assert 'import' not in out_dir.join('d.yang').read()
+
+    with pytest.raises(ValueError):
+        dump_all(paths * 2, str(out_dir))
+
+
+def test_dump_all_validated(models, tmpdir):
+    """
+    written/skipped files and the manifest should refer to the right
+    sources when just some of the validated modules changed
+    """
+    out_dir = tmpdir.join('out')
+    paths = [str(models.join(name + '.yang')) for name in 'bc']
+    ctx = create_context(str(models), yang_remove_unused_imports=True)
+    dump_all(paths, str(out_dir), ctx, rescue=True)
+    manifest = json.loads(out_dir.join(MANIFEST).read())
+
+    models.join('b.yang').write('module b { namespace urn:b; prefix b; }')
+    ctx = create_context(str(models), yang_remove_unused_imports=True)
+    (written, skipped, _) = dump_all(paths, str(out_dir), ctx, rescue=True)
+    assert written == [str(out_dir.join('b.yang'))]
+    assert skipped == [str(out_dir.join('c.yang'))]
+
+    updated = json.loads(out_dir.join(MANIFEST).read())
+    assert updated['b.yang'] != manifest['b.yang']
+    assert updated['c.yang'] == manifest['c.yang']
+
+    ctx = create_context(str(models), yang_remove_unused_imports=True)
+    (written, skipped, _) = dump_all(paths, str(out_dir), ctx, rescue=True)
+    assert not written and len(skipped) == 2
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for caching layers
+"""
+import sys
+from textwrap import dedent
+
+import pytest
+
+from pyang.statements import Statement
+from pyangext.cache import (
+    ENTRY_EXTENSION,
+    ModuleCache,
+    ParseCache,
+    RenderCache,
+)
+from pyangext.utils import check, create_context, dump, parse
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+
+@pytest.fixture
+def models(tmpdir):
+    """Directory with YANG modules"""
+    models = tmpdir.mkdir('models')
+    models.join('a.yang').write(dedent("""\
+        module a {
+          namespace urn:a;
+          prefix a;
+          import b { prefix b; }
+          leaf x { type b:code; description "a very long line here"; }
+        }"""))
+    models.join('b.yang').write(dedent("""\
+        module b {
+          namespace urn:b;
+          prefix b;
+          typedef code { type string; }
+        }"""))
+
+    return models
+
+
+def _load(models, cache_dir, **kwargs):
+    """Load module ``a`` (and implicitly ``b``) in a new context"""
+    ctx = create_context(str(models), cache_dir=cache_dir, **kwargs)
+    module = ctx.search_module(None, 'a')
+    ctx.validate()
+
+    return ctx, module
+
+
+def test_module_cache(tmpdir, models):
+    """
+    first run should parse all modules
+    second run should reuse parsed modules
+    modules loaded from cache should be equivalent
+    """
+    cache_dir = str(tmpdir.join('cache'))
+    ctx, module = _load(models, cache_dir)
+    assert ctx.module_cache.stats == {'hits': 0, 'misses': 2}
+
+    ctx2, module2 = _load(models, cache_dir)
+    assert ctx2.module_cache.stats == {'hits': 2, 'misses': 0}
+    assert dump(module2) == dump(module)
+    assert module2.i_ctx is ctx2
+    assert ctx2.get_module('b') is not ctx.get_module('b')
+    assert not ctx2.errors
+
+
+def test_module_cache_invalidation(tmpdir, models):
+    """
+    changed files should be parsed again
+    changing parser options should invalidate entries
+    parser errors should be replayed from cache
+    """
+    cache_dir = str(tmpdir.join('cache'))
+    _load(models, cache_dir)
+
+    models.join('b.yang').write(
+        'module b { namespace urn:b; prefix b; typedef code { type int8; } }')
+    ctx, _ = _load(models, cache_dir)
+    assert ctx.module_cache.stats == {'hits': 1, 'misses': 1}
+
+    ctx, _ = _load(models, cache_dir, max_line_len=40)
+    assert ctx.module_cache.misses == 2
+    warnings = check(ctx, rescue=True)[1]
+
+    ctx, _ = _load(models, cache_dir, max_line_len=40)
+    assert ctx.module_cache.hits == 2
+    assert check(ctx, rescue=True)[1] == warnings
+    assert any('exceeds 40' in message for message in warnings)
+
+
+def test_corrupted_entry(tmpdir):
+    """
+    corrupted entries should be treated as misses
+    """
+    cache = ModuleCache(str(tmpdir))
+    ctx = create_context()
+    text = 'module c { namespace urn:c; prefix c; }'
+    key = cache.key(ctx, 'c.yang', text)
+    tmpdir.mkdir(key[:2]).join(key + ENTRY_EXTENSION).write('garbage')
+
+    assert cache.parse(ctx, 'c.yang', text).arg == 'c'
+    assert cache.misses == 1
+    assert cache.parse(ctx, 'c.yang', text).arg == 'c'
+    assert cache.hits == 1
+
+
+def test_entry_format(tmpdir):
+    """
+    entries should be stored without pickle, replaying errors
+    (also for texts that cannot be parsed)
+    """
+    cache = ModuleCache(str(tmpdir))
+    ctx = create_context(print_error_code=True)
+    text = 'module c { namespace urn:c; prefix c; leaf x { type string; }'
+    key = cache.key(ctx, 'c.yang', text)
+    assert cache.parse(ctx, 'c.yang', text) is None
+    entry = tmpdir.join(key[:2], key + ENTRY_EXTENSION)
+    assert entry.check(file=True)
+    assert entry.read_binary().startswith(b'[[')  # JSON errors
+
+    errors = check(ctx, rescue=True)[0]
+    assert errors
+    ctx = create_context(print_error_code=True)
+    assert cache.parse(ctx, 'c.yang', text) is None
+    assert cache.hits == 1
+    assert check(ctx, rescue=True)[0] == errors
+
+    text = 'module d {\n namespace urn:d; prefix d; leaf x { type string; } }'
+    module = cache.parse(create_context(max_line_len=20), 'd.yang', text)
+    ctx = create_context(max_line_len=20)
+    copy = cache.parse(ctx, 'd.yang', text)
+    assert cache.hits == 2
+    assert dump(copy) == dump(module)
+    assert copy.substmts[0].pos.line == 2
+    ((epos, etag, eargs),) = ctx.errors
+    assert (epos.ref, epos.line, epos.top, etag) == (
+        'd.yang', 2, copy, 'LONG_LINE')
+    assert isinstance(eargs, tuple)
+
+
+def test_parse_cache():
+    """
+    parse cache should return independent copies of the cached trees
+    """
+    cache = ParseCache()
+    ctx = create_context(print_error_code=True)
+    text = 'container c { leaf x { type string; } }'
+
+    first = parse(text, ctx, cache=cache)
+    second = parse(text, ctx, cache=cache)
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+    assert second is not first and dump(second) == dump(first)
+
+    leaf = second.substmts[0]
+    assert leaf is not first.substmts[0]
+    assert leaf.parent is second and leaf.top is second
+    assert leaf.pos.top is second and leaf.arg == 'x'
+
+    second.substmts = []
+    assert dump(parse(text, ctx, cache=cache)) == dump(first)
+
+    cache.invalidate()
+    assert len(cache) == 0
+    parse(text, ctx, cache=cache)
+    assert cache.stats['misses'] == 2
+
+
+def test_parse_cache_errors():
+    """
+    parser errors should be replayed for cached texts
+    """
+    cache = ParseCache()
+    ctx = create_context(print_error_code=True)
+    for _ in range(2):
+        with pytest.raises(SyntaxError) as info:
+            parse('module a { keyword }', ctx, cache=cache)
+        assert 'EXPECTED_ARGUMENT' in str(info.value)
+
+    assert cache.hits == 1
+
+
+def test_parse_cache_limits():
+    """
+    least recently used entries should be evicted
+    """
+    cache = ParseCache(max_entries=2)
+    ctx = create_context()
+    for name in 'aba':
+        parse('leaf {};'.format(name), ctx, cache=cache)
+    parse('leaf c;', ctx, cache=cache)
+    assert len(cache) == 2 and cache.evictions == 1
+    parse('leaf a;', ctx, cache=cache)
+    assert cache.hits == 2
+
+    cache = ParseCache(max_bytes=3 * ParseCache.STATEMENT_SIZE)
+    parse('leaf a { type string; }', ctx, cache=cache)
+    parse('leaf b { type string; }', ctx, cache=cache)
+    assert len(cache) == 1 and cache.size <= cache.max_bytes
+
+
+def test_render_cache():
+    """
+    dump should reuse the text of unchanged subtrees
+    """
+    module = parse(dedent("""\
+        module a {
+          namespace urn:a;
+          prefix a;
+          grouping g { leaf x { type string; } leaf y { type int8; } }
+          container c { leaf z { type string; } }
+        }"""))
+    cache = RenderCache()
+    expected = dump(module)
+    assert dump(module, cache=cache) == expected
+    assert cache.hits == 0
+    assert dump(module, cache=cache) == expected
+    assert cache.stats['hits'] == 1
+
+    # just the changed statement and its ancestors are emitted again
+    module.search_one('container').search_one('leaf').arg = 'w'
+    misses = cache.misses
+    assert dump(module, cache=cache) == dump(module)
+    assert cache.misses - misses == 3
+    assert cache.hits == 2  # grouping
+
+    # indentation is part of the key
+    assert dump(module, prev_indent='  ', indent_string='\t',
+                cache=cache) == dump(module, prev_indent='  ',
+                                     indent_string='\t')
+
+    # identical subtrees of other trees are reused (but top level
+    # statements are emitted differently from nested ones)
+    grouping = parse('grouping g { leaf x { type string; } '
+                     'leaf y { type int8; } }')
+    hits = cache.hits
+    assert dump(grouping, prev_indent='  ', cache=cache) == dump(
+        grouping, prev_indent='  ')
+    assert cache.hits == hits + 2  # leaves
+
+
+def test_render_cache_levels():
+    """
+    texts of top level statements should not be reused for nested ones
+    (and vice-versa)
+    """
+    module = parse('module a { namespace urn:a; prefix a; '
+                   'container d { leaf x { type string; } } }')
+    container = module.search_one('container')
+    for (first, second) in [(container, module), (module, container)]:
+        cache = RenderCache()
+        indent = '  ' if first is container else ''
+        assert dump(first, prev_indent=indent, cache=cache) == dump(
+            first, prev_indent=indent)
+        indent = '  ' if second is container else ''
+        assert dump(second, prev_indent=indent, cache=cache) == dump(
+            second, prev_indent=indent)
+
+
+def test_render_cache_deep_tree():
+    """
+    fingerprints should be computed for trees deeper than the recursion
+    limit
+    """
+    tree = parent = Statement(None, None, None, 'container', 'c')
+    for _ in range(sys.getrecursionlimit()):
+        child = Statement(None, parent, None, 'container', 'c')
+        parent.substmts.append(child)
+        parent = child
+
+    fingerprints = RenderCache.fingerprints(tree)
+    assert len(fingerprints) == sys.getrecursionlimit() + 1
+    assert fingerprints[id(tree)] != fingerprints[id(tree.substmts[0])]
+
+
+def test_render_cache_limits():
+    """
+    render cache should evict entries to respect the size limit
+    """
+    cache = RenderCache(max_bytes=3 * (RenderCache.ENTRY_SIZE + 40))
+    for i in range(10):
+        dump(parse('container c%d { leaf x { type string; } }' % i),
+             cache=cache)
+    assert len(cache) <= 3
+    assert cache.evictions >= 7
+    assert cache.size <= cache.max_bytes
+
+    cache.invalidate()
+    assert len(cache) == 0 and cache.size == 0
+
+    # printing options that depend on validation disable the cache
+    ctx = create_context(yang_remove_unused_imports=True)
+    module = ctx.add_module('a.yang', 'module a { namespace urn:a; '
+                                      'prefix a; container c { leaf x; } }')
+    misses = cache.misses
+    dump(module, ctx=ctx, cache=cache)
+    assert cache.misses == misses and len(cache) == 0
@@ -139,3 +139,29 @@ def test_run(register_dummy_plugin, example_module, run_command):
         '--fake-fixture-option', '!dlroW olleH', example_module)
     assert not stderr
     assert '!dlroW olleH' in stdout
+
+
+def test_watch_once(example_module, run_command):
+    """
+    watch command should validate the files and report a summary
+    """
+    stdout, stderr = run_command(cli.call, 'watch', '--once', example_module)
+    assert not stderr
+    assert '1 file(s) changed, 0 removed, 1 revalidated' in stdout
+
+
+def test_dump(example_module, run_command, tmpdir):
+    """
+    dump command should generate the files and skip unchanged ones
+    """
+    out_dir = str(tmpdir.join('out'))
+    stdout, stderr = run_command(
+        cli.call, 'dump', '-o', out_dir, '-j', '1', example_module)
+    assert not stderr
+    assert '1 file(s) written, 0 unchanged' in stdout
+    assert os.path.isfile(
+        os.path.join(out_dir, os.path.basename(example_module)))
+
+    stdout, _ = run_command(
+        cli.call, 'dump', '-o', out_dir, '-j', '1', example_module)
+    assert '0 file(s) written, 1 unchanged' in stdout
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for module dependency graph
+"""
+import pytest
+
+from pyangext.dependencies import (
+    DependencyGraph,
+    ModuleHeader,
+    scan_header
+)
+from pyangext.utils import parse
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+HEADER = """
+    module a {
+      yang-version 1;
+      namespace urn:a;
+      prefix a;
+      import b { prefix b; revision-date 2016-01-01; }
+      import c { prefix c; }
+      include a-sub;
+      organization "ACME";
+      revision 2015-01-01 { description "first"; }
+      revision 2016-06-01 { description "second"; }
+      container x {
+    """
+"""Header followed by a body that is not even valid"""
+
+
+def test_scan_header():
+    """
+    scan should read dependencies and latest revision
+    scan should ignore the body of the module
+    """
+    header = scan_header(HEADER, 'a.yang')
+    assert header.name == 'a'
+    assert header.keyword == 'module'
+    assert header.filename == 'a.yang'
+    assert header.revision == '2016-06-01'
+    assert header.imports == [('b', '2016-01-01'), ('c', None)]
+    assert header.includes == [('a-sub', None)]
+    assert header.dependencies == ['b', 'c', 'a-sub']
+
+    header = scan_header('submodule s { belongs-to a { prefix a; } }')
+    assert header.keyword == 'submodule'
+    assert header.belongs_to == 'a'
+
+    assert scan_header('leaf x { type string; }') is None
+
+
+def test_header_from_statement():
+    """
+    header extracted from parsed tree should be equivalent to scanned one
+    """
+    text = HEADER + '} }'
+    scanned = scan_header(text)
+    parsed = ModuleHeader.from_statement(parse(text))
+
+    assert parsed.__dict__ == dict(scanned.__dict__, filename='parser-input')
+
+
+@pytest.fixture
+def graph():
+    """Graph: a -> (b, c), b -> c, c -> d, d -> c, e"""
+    return DependencyGraph([
+        ModuleHeader('a', imports=[('b', None), ('c', None)]),
+        ModuleHeader('b', imports=[('c', None)]),
+        ModuleHeader('c', imports=[('d', None)]),
+        ModuleHeader('d', imports=[('c', None), ('external', None)]),
+        ModuleHeader('e'),
+    ])
+
+
+def test_queries(graph):
+    """
+    dependencies and dependents should be direct relations
+    closures should be transitive
+    """
+    assert graph.dependencies('a') == ['b', 'c']
+    assert graph.dependents('c') == set(['a', 'b', 'd'])
+    assert graph.closure('a') == set(['b', 'c', 'd', 'external'])
+    assert graph.closure('c') == set(['c', 'd', 'external'])
+    assert graph.reverse_closure('d') == set(['a', 'b', 'c', 'd'])
+    assert graph.reverse_closure('e') == set()
+
+
+def test_ordering(graph):
+    """
+    topological order should put dependencies first
+    cycles should be detected
+    levels should group independent modules
+    """
+    order = graph.topological_order()
+    assert sorted(order) == ['a', 'b', 'c', 'd', 'e']
+    assert order.index('b') < order.index('a')
+    assert order.index('c') < order.index('b')
+    assert order.index('d') < order.index('b')
+
+    assert graph.cycles() == [['c', 'd']]
+    assert graph.levels() == [set(['c', 'd', 'e']), set(['b']), set(['a'])]
+
+
+def test_from_path(tmpdir):
+    """
+    graph should be created from files in the search path
+    """
+    tmpdir.join('a.yang').write(HEADER)
+    tmpdir.join('b.yang').write('module b { namespace urn:b; prefix b; }')
+    tmpdir.join('bad.yang').write('this is not YANG')
+
+    graph = DependencyGraph.from_path(str(tmpdir))
+    assert sorted(graph.headers) == ['a', 'b']
+    assert graph.dependents('b') == set(['a'])
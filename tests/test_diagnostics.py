@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for structured diagnostics
+"""
+import copy
+import json
+import pickle
+
+import pytest
+from six import StringIO
+
+from pyang.error import Position, err_add
+
+from pyangext.diagnostics import (
+    Diagnostic,
+    ErrorLog,
+    ErrorPolicy,
+    collect_diagnostics,
+    iter_diagnostics,
+    write_jsonl,
+)
+from pyangext.utils import check, create_context, parse
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+
+@pytest.fixture
+def ctx():
+    """Context with an error and a warning"""
+    ctx = create_context()
+    err_add(ctx.errors, Position('a.yang'), 'UNEXPECTED_KEYWORD', 'leaf')
+    err_add(ctx.errors, Position('b.yang'), 'LONG_LINE', (80, 90))
+    ctx.errors[0][0].line = 3
+
+    return ctx
+
+
+def test_iter_diagnostics(ctx):
+    """
+    diagnostics should be classified without formatting the messages
+    """
+    diagnostics = list(iter_diagnostics(ctx))
+    assert [(d.tag, d.severity) for d in diagnostics] == [
+        ('UNEXPECTED_KEYWORD', 'error'), ('LONG_LINE', 'warning')]
+    assert (diagnostics[0].file, diagnostics[0].line) == ('a.yang', 3)
+    assert diagnostics[1].args == (80, 90)
+    assert not hasattr(diagnostics[0], '__dict__')
+
+
+def test_format_matches_check(ctx):
+    """
+    rendered diagnostics should be equal to the messages of check
+    """
+    (errors, warnings) = check(ctx, rescue=True)
+    assert [str(d) for d in iter_diagnostics(ctx)] == errors + warnings
+    assert errors == ['(a.yang:3) unexpected keyword "leaf"']
+
+    ctx.opts.print_error_code = True
+    (errors, _) = check(ctx, rescue=True)
+    assert errors == ['(a.yang:3) UNEXPECTED_KEYWORD']
+
+
+def test_options(ctx):
+    """
+    context options should be respected
+    """
+    ctx.opts.ignore_error_tags = ['LONG_LINE']
+    assert [d.tag for d in iter_diagnostics(ctx)] == ['UNEXPECTED_KEYWORD']
+
+    ctx.opts.ignore_errors = True
+    assert list(iter_diagnostics(ctx)) == []
+
+
+def test_unexpected_description():
+    """
+    misplaced descriptions should be reported as warnings
+    unless error codes are printed (as done by the original check)
+    """
+    diagnostic = Diagnostic(
+        Position('x.yang'), 'UNEXPECTED_KEYWORD', 'description')
+    ctx = create_context()
+    ctx.errors.append((diagnostic.pos, diagnostic.tag, diagnostic.args))
+
+    assert [d.severity for d in iter_diagnostics(ctx)] == ['warning']
+    assert check(ctx, rescue=True) == ([], [diagnostic.format()])
+
+    ctx.opts.print_error_code = True
+    assert [d.severity for d in iter_diagnostics(ctx)] == ['error']
+    assert check(ctx, rescue=True) == ([diagnostic.format(True)], [])
+
+
+def test_error_policy():
+    """
+    policy should classify tags according to the options
+    """
+    policy = ErrorPolicy(warnings=['LONG_LINE'], errors=['UNUSED_IMPORT'])
+    assert policy.classify('LONG_LINE') == (4, 'warning')
+    assert policy.classify('UNUSED_IMPORT') == (4, 'error')
+    assert policy.classify('UNEXPECTED_KEYWORD', 'leaf') == (1, 'error')
+    assert policy.classify(
+        'UNEXPECTED_KEYWORD', 'description') == (4, 'warning')
+
+    policy = ErrorPolicy(print_error_code=True)
+    assert policy.classify(
+        'UNEXPECTED_KEYWORD', 'description') == (1, 'error')
+
+    policy = ErrorPolicy(warnings=['none'], ignore_error_tags=['BAD_VALUE'])
+    assert policy.classify('LONG_LINE') == (4, None)
+    assert policy.classify('BAD_VALUE')[1] is None
+
+    policy = ErrorPolicy(warnings=['error', 'LONG_LINE'])
+    assert policy.classify('UNUSED_IMPORT')[1] == 'error'
+    assert policy.classify('LONG_LINE')[1] == 'warning'
+
+
+def test_error_policy_cache(ctx):
+    """
+    policy should be reused until the context options change
+    """
+    policy = ErrorPolicy.for_context(ctx)
+    assert ErrorPolicy.for_context(ctx) is policy
+
+    ctx.opts.errors = ['LONG_LINE']
+    assert ErrorPolicy.for_context(ctx) is not policy
+    assert [d.severity for d in iter_diagnostics(ctx)] == ['error', 'error']
+
+
+def test_write_jsonl(ctx):
+    """
+    diagnostics should be exported one JSON object per line
+    """
+    buf = StringIO()
+    assert write_jsonl(iter_diagnostics(ctx), buf) == 2
+    records = [json.loads(line) for line in buf.getvalue().splitlines()]
+    assert records[0]['tag'] == 'UNEXPECTED_KEYWORD'
+    assert records[0]['message'] == 'unexpected keyword "leaf"'
+    assert records[1]['args'] == [80, 90]
+    assert records[1]['severity'] == 'warning'
+
+
+def test_max_errors():
+    """
+    diagnostics after the limit should be counted instead of formatted
+    """
+    ctx = create_context(max_errors=2)
+    for i in range(5):
+        err_add(ctx.errors, Position('a.yang'), 'UNEXPECTED_KEYWORD', str(i))
+    err_add(ctx.errors, Position('a.yang'), 'LONG_LINE', (80, 90))
+
+    (diagnostics, omitted) = collect_diagnostics(ctx, 2)
+    assert len(diagnostics) == 2
+    assert omitted == {'UNEXPECTED_KEYWORD': 3, 'LONG_LINE': 1}
+
+    (errors, warnings) = check(ctx, rescue=True)
+    assert len(errors) == 3 and not warnings
+    assert errors[-1] == ('4 more diagnostic(s) omitted: '
+                          'UNEXPECTED_KEYWORD x3, LONG_LINE x1')
+
+    (errors, _) = check(ctx, rescue=True, fail_fast=True)
+    assert len(errors) == 2
+
+    (errors, warnings) = check(ctx, rescue=True, max_errors=0)
+    assert (len(errors), len(warnings)) == (5, 1)
+
+
+def test_max_errors_boundary():
+    """
+    0 should mean unlimited
+    just the diagnostics after the limit should be counted
+    """
+    ctx = create_context()
+    err_add(ctx.errors, Position('a.yang'), 'LONG_LINE', (80, 90))
+    for i in range(3):
+        err_add(ctx.errors, Position('a.yang'), 'UNEXPECTED_KEYWORD', str(i))
+    err_add(ctx.errors, Position('a.yang'), 'LONG_LINE', (80, 91))
+
+    for max_errors in (None, 0, 3, 4):
+        (diagnostics, omitted) = collect_diagnostics(ctx, max_errors)
+        assert len(diagnostics) == (4 if max_errors == 3 else 5)
+        assert omitted == ({'LONG_LINE': 1} if max_errors == 3 else {})
+
+    (diagnostics, omitted) = collect_diagnostics(ctx, 1)
+    assert [diagnostic.tag for diagnostic in diagnostics] == [
+        'LONG_LINE', 'UNEXPECTED_KEYWORD']
+    assert omitted == {'UNEXPECTED_KEYWORD': 2, 'LONG_LINE': 1}
+
+
+def test_error_log():
+    """
+    errors should be indexed by top-level statement as they are added
+    """
+    (mod_a, mod_b) = (parse('module a {}'), parse('module b {}'))
+    log = ErrorLog()
+    err_add(log, mod_a.pos, 'UNEXPECTED_KEYWORD', 'x')
+    err_add(log, mod_b.pos, 'UNEXPECTED_KEYWORD', 'y')
+    assert [e[2] for e in log.for_modules([mod_b])] == ['y']
+
+    err_add(log, mod_a.pos, 'UNEXPECTED_KEYWORD', 'z')
+    assert [e[2] for e in log.for_modules([mod_a])] == ['x', 'z']
+
+    del log[0]
+    assert [e[2] for e in log.for_modules([mod_a, mod_b])] == ['y', 'z']
+
+    log[:] = []
+    assert log.for_modules([mod_a]) == []
+
+    err_add(log, Position('c.yang'), 'UNEXPECTED_KEYWORD', 'w')
+    assert isinstance(copy.copy(log), ErrorLog)
+    assert copy.copy(log).for_modules([None]) == log
+    restored = pickle.loads(pickle.dumps(log))
+    assert isinstance(restored, ErrorLog)
+    assert [e[2] for e in restored.for_modules([None])] == ['w']
+
+
+def test_check_modules():
+    """
+    check should be able to consider just some modules
+    """
+    ctx = create_context()
+    assert isinstance(ctx.errors, ErrorLog)
+    mod_a = ctx.add_module('a', 'module a { namespace urn:a; prefix a; }')
+    mod_b = ctx.add_module('b', 'module b { namespace urn:b; }')
+    ctx.validate()
+
+    assert check(ctx, rescue=True, modules=[mod_a]) == ([], [])
+    (errors, _) = check(ctx, rescue=True, modules=[mod_b])
+    assert errors and all('prefix' in error for error in errors)
+    assert check(ctx, rescue=True) == check(
+        ctx, rescue=True, modules=[mod_a, mod_b, None])
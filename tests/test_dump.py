@@ -4,9 +4,11 @@
 """
 tests for YANG AST to string conversion
 """
+from mock import patch
+
 from pyang.statements import Statement
 
-from pyangext.utils import dump
+from pyangext.utils import dump, iter_dump, parse
 
 __author__ = "Anderson Bravalheri"
 __copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
@@ -29,3 +31,34 @@ def test_dump():
         '  prefix test;\n'
         '}'
     )
+
+
+def test_iter_dump():
+    """
+    iter_dump should produce the same text of dump, in chunks
+    """
+    module = parse(
+        'module test {\n'
+        '  namespace "urn:yang:test";\n'
+        '  prefix test;\n'
+        '  description "a\n  multi-line\n  text";\n'
+        '  container c { leaf a { type string; } leaf b; }\n'
+        '  leaf-list d { type int8; }\n'
+        '}')
+    expected = dump(module, prev_indent='  ', indent_string='\t')
+    chunks = list(iter_dump(module, '  ', '\t', chunk_size=10))
+    assert len(chunks) > 1
+    assert ''.join(chunks) == expected
+    assert ''.join(iter_dump(module)) == dump(module)
+    assert list(iter_dump(module, chunk_size=10 ** 6)) == [dump(module)]
+
+
+def test_dump_context():
+    """
+    dump should not create a new context for each call
+    """
+    prefix = Statement(None, None, None, 'prefix', 'test')
+    with patch('pyangext.utils.create_context') as create:
+        assert dump(prefix).strip() == 'prefix test;'
+        assert ''.join(iter_dump(prefix)).strip() == 'prefix test;'
+    assert not create.called
@@ -7,7 +7,16 @@ tests for find/select
 import pytest
 
 from pyang.statements import Statement
-from pyangext.utils import find
+from pyangext.utils import (
+    Selector,
+    compare_prefixed,
+    compile_selector,
+    find,
+    find_first,
+    ifind,
+    iselect,
+    select,
+)
 
 __author__ = "Anderson Bravalheri"
 __copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
@@ -52,3 +61,86 @@ def test_find(container):
     assert not find(container, arg='value')
     assert find(container, 'myext', ignore_prefix=True)
     assert find(container, arg='value', ignore_prefix=True)
+
+
+@pytest.mark.parametrize(('keyword', 'arg', 'ignore_prefix'), [
+    ('leaf', None, False),
+    ('leaf', 'name', False),
+    (None, 'name', False),
+    ('ext:myext', None, False),
+    ('other:myext', None, False),
+    ('myext', None, True),
+    ('other:myext', 'x:value', True),
+    (None, 'ext:value', False),
+    (('ext', 'myext'), None, False),
+    (None, 'a:b:c', False),
+    (None, None, False),
+])
+def test_selector(container, keyword, arg, ignore_prefix):
+    """
+    selectors should match the same statements of compare_prefixed
+    select and find should accept selectors
+    """
+    container.substmts.extend([
+        Statement(None, container, None, ('ext', 'myext'), 'ext:value'),
+        Statement(None, container, None, 'ext:myext', 'a:b:d'),
+        Statement(None, container, None, 'leaf', None),
+    ])
+    container.substmts[-2].raw_keyword = 'ext:myext'
+
+    selector = compile_selector(keyword, arg, ignore_prefix)
+    assert isinstance(selector, Selector)
+    assert selector is compile_selector(keyword, arg, ignore_prefix)
+
+    def _matches(query, value, exact):
+        """original select criteria"""
+        return (not query or query == exact or (
+            value is not None and
+            compare_prefixed(query, value, ignore_prefix=ignore_prefix)))
+
+    expected = [item for item in container.substmts
+                if _matches(keyword, item.raw_keyword, item.keyword) and
+                _matches(arg, item.arg, item.arg)]
+    assert [item for item in container.substmts if selector(item)] == (
+        expected)
+    assert select(container.substmts, selector) == expected
+    assert find(container, selector) == expected
+    assert list(iselect(container.substmts, selector)) == expected
+    assert list(ifind(container, keyword, arg, ignore_prefix)) == expected
+    assert find_first(container, selector) is (
+        expected[0] if expected else None)
+    assert repr(selector).startswith('Selector(')
+
+
+def test_find_first(container):
+    """
+    lazy variants should stop in the first match
+    """
+    checked = []
+
+    class _Statements(list):
+        """List that records the iterated statements"""
+        def __iter__(self):
+            for item in list.__iter__(self):
+                checked.append(item)
+                yield item
+
+    container.substmts = _Statements(container.substmts)
+    (id_, name) = container.substmts
+    del checked[:]
+
+    assert find_first(container, 'leaf') is id_
+    assert checked == [id_]
+
+    del checked[:]
+    assert find_first(container, arg='name') is name
+    assert find_first(container, 'leaf', 'other') is None
+    assert find_first(container, 'list', default=container) is container
+    assert find_first(name, 'type').arg == 'string'
+
+    del checked[:]
+    found = ifind(container, 'leaf')
+    assert checked == []
+    assert next(found) is id_
+    assert checked == [id_]
+    assert next(iselect([name, id_], arg='id')) is id_
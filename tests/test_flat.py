@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for the columnar snapshot of statement trees
+"""
+import pytest
+
+from pyangext import flat
+from pyangext.flat import FlatTree
+from pyangext.utils import create_context, find, iwalk, parse, select
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+BACKENDS = [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(
+        flat.numpy is None, reason='numpy not installed')),
+]
+
+
+@pytest.fixture
+def module():
+    """YANG module with prefixed keywords and arguments"""
+    return parse("""
+        module test {
+          namespace urn:yang:test;
+          prefix t;
+          typedef code { type string; }
+          container a {
+            leaf x { type t:code; }
+            container b { leaf x { type code; } ext:info x; }
+          }
+          leaf y { type t:code; }
+        }""")
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_columns(module, use_numpy):
+    """
+    columns should describe the tree in pre-order
+    """
+    tree = FlatTree(module, use_numpy=use_numpy)
+    nodes = list(iwalk(module))
+    assert len(tree) == len(nodes)
+    assert tree.statements(range(len(tree))) == nodes
+
+    for (position, node) in enumerate(nodes):
+        assert tree.statement(position) is node
+        assert tree.position(node) == position
+        assert tree.keyword(position) == node.keyword
+        assert tree.arg(position) == node.arg
+        assert tree.lines[position] == node.pos.line
+        parent = tree.parents[position]
+        assert (node.parent if parent < 0 else tree.statement(parent)) is (
+            node.parent)
+        assert tree.depths[position] == (
+            0 if parent < 0 else tree.depths[parent] + 1)
+        assert tree.statements(range(position, tree.ends[position])) == (
+            list(iwalk(node)))
+
+    assert tree.keyword_counts() == {
+        'module': 1, 'namespace': 1, 'prefix': 1, 'typedef': 1,
+        'container': 2, 'leaf': 3, 'type': 4, ('ext', 'info'): 1}
+
+    with pytest.raises(ValueError):
+        tree.position(parse('leaf z;'))
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+@pytest.mark.parametrize(('keyword', 'arg', 'ignore_prefix'), [
+    ('leaf', None, False),
+    (None, 'x', False),
+    ('leaf', 'x', False),
+    ('type', 't:code', False),
+    ('type', 'code', False),
+    ('type', 'code', True),
+    ('ext:info', None, False),
+    ('info', None, True),
+    ('info', 'x', True),
+    (None, None, False),
+])
+def test_select(module, keyword, arg, ignore_prefix, use_numpy):
+    """
+    queries should have the same results of select
+    """
+    tree = FlatTree(module, use_numpy=use_numpy)
+    nodes = list(iwalk(module))
+    expected = select(
+        [node for node in nodes if node.arg is not None or not arg],
+        keyword, arg, ignore_prefix)
+    assert tree.select(keyword, arg, ignore_prefix) == expected
+    assert tree.count(keyword, arg, ignore_prefix) == len(expected)
+
+    for (position, parent) in enumerate(nodes):
+        descendants = list(iwalk(parent))[1:]
+        assert tree.select(keyword, arg, ignore_prefix, within=parent) == [
+            node for node in expected
+            if any(node is other for other in descendants)]
+        assert tree.children(parent, keyword, arg, ignore_prefix) == (
+            find(parent, keyword, arg, ignore_prefix))
+        assert tree.children(position, keyword, arg, ignore_prefix) == (
+            find(parent, keyword, arg, ignore_prefix))
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_filter(module, use_numpy):
+    """
+    masks computed from the columns should be mapped to statements
+    """
+    tree = FlatTree(module, use_numpy=use_numpy)
+    mask = [depth > 2 for depth in tree.depths]
+    deep = tree.statements(tree.filter(mask))
+    assert [(node.keyword, node.arg) for node in deep] == [
+        ('type', 't:code'), ('leaf', 'x'), ('type', 'code'),
+        (('ext', 'info'), 'x')]
+    assert [node.arg for node in tree.select('type', depth=2)] == [
+        'string', 't:code']
+    if use_numpy:
+        assert list(tree.filter(tree.depths > 2)) == list(tree.filter(mask))
+
+
+def test_context():
+    """
+    all the modules in a context should be included
+    """
+    ctx = create_context()
+    ctx.add_module('b.yang', 'module b { prefix b; leaf x; }')
+    ctx.add_module('a.yang', 'module a { prefix a; leaf y; leaf z; }')
+    tree = FlatTree(ctx, use_numpy=False)
+    assert [tree.arg(position) for position in tree.positions('module')] == [
+        'a', 'b']
+    assert [node.arg for node in tree.select('leaf')] == ['y', 'z', 'x']
+    assert list(tree.parents) == [-1, 0, 0, 0, -1, 4, 4]
+
+
+def test_missing_numpy(module, monkeypatch):
+    """
+    array columns should be used when numpy is not installed
+    """
+    monkeypatch.setattr(flat, 'numpy', None)
+    tree = FlatTree(module)
+    assert not tree.numpy
+    assert tree.count('leaf') == 3
+    with pytest.raises(ImportError):
+        FlatTree(module, use_numpy=True)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for the statement index
+"""
+import pytest
+
+from pyangext.index import StatementIndex
+from pyangext.utils import create_context, find, parse, select, walk
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+
+@pytest.fixture
+def module():
+    """YANG module with prefixed keywords and arguments"""
+    return parse("""
+        module test {
+          namespace urn:yang:test;
+          prefix t;
+          typedef code { type string; }
+          container a {
+            leaf x { type t:code; }
+            container b { leaf x { type code; } ext:info x; }
+          }
+          leaf y { type t:code; }
+        }""")
+
+
+@pytest.mark.parametrize(('keyword', 'arg', 'ignore_prefix'), [
+    ('leaf', None, False),
+    (None, 'x', False),
+    ('leaf', 'x', False),
+    ('type', 't:code', False),
+    ('type', 'code', False),
+    ('type', 'code', True),
+    ('ext:info', None, False),
+    ('info', None, True),
+    ('info', 'x', True),
+    (None, None, False),
+])
+def test_find(module, keyword, arg, ignore_prefix):
+    """
+    queries should have the same results of select
+    """
+    index = StatementIndex(module)
+    nodes = walk(module)
+    expected = select(
+        [node for node in nodes if node.arg is not None or not arg],
+        keyword, arg, ignore_prefix)
+    assert index.find(keyword, arg, ignore_prefix) == expected
+
+    for parent in nodes:
+        assert index.children(parent, keyword, arg, ignore_prefix) == [
+            node for node in expected if node.parent is parent]
+        assert index.find(keyword, arg, ignore_prefix, within=parent) == [
+            node for node in expected
+            if node is not parent and parent in _ancestors(node)]
+
+
+def _ancestors(node):
+    """Parents of a statement, up to the root"""
+    ancestors = []
+    while node.parent is not None:
+        node = node.parent
+        ancestors.append(node)
+    return ancestors
+
+
+def test_lazy_build(module):
+    """
+    index should be built in the first query and after invalidation
+    """
+    index = StatementIndex(module)
+    assert not index.built
+    assert index.children(module, 'leaf') == find(module, 'leaf')
+    assert index.built and len(index) == len(walk(module))
+
+    module.substmts.append(parse('leaf z;'))
+    assert len(index.find('leaf')) == 3
+    index.invalidate()
+    assert not index.built
+    assert len(index.find('leaf')) == 4
+
+    with pytest.raises(ValueError):
+        index.find('leaf', within=parse('leaf w;'))
+
+
+def test_context():
+    """
+    all the modules in a context should be indexed
+    """
+    ctx = create_context()
+    for name in ('a', 'b'):
+        ctx.add_module(name + '.yang', 'module %s { namespace urn:%s; '
+                       'prefix %s; leaf x; }' % (name, name, name))
+    index = StatementIndex(ctx)
+    assert [node.top.arg for node in index.find('leaf', 'x')] == ['a', 'b']
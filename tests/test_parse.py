@@ -12,7 +12,15 @@ import pytest
 
 from pyang.statements import Statement, validate_module
 
-from pyangext.utils import create_context, find, parse, select
+from pyangext.utils import (
+    create_context,
+    find,
+    parse,
+    parse_file,
+    parse_many,
+    parse_text,
+    select,
+)
 
 __author__ = "Anderson Bravalheri"
 __copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
@@ -126,6 +134,33 @@ def test_parse_valid_string(text):
     assert isinstance(parse(text), Statement)
 
 
+def test_parse_many(ctx):
+    """
+    should parse each text with its own diagnostics, without raising
+    """
+    texts = ['leaf id { type int32; }', 'module a { keyword }', 'leaf x;']
+    ctx.errors.append('previous error')
+
+    results = parse_many(texts, ctx)
+    assert [ast and ast.arg for ast, _ in results] == ['id', None, 'x']
+    assert results[0][1] == ([], [])
+    assert 'EXPECTED_ARGUMENT' in results[1][1][0][0]
+    assert results[2][1] == ([], [])
+    assert ctx.errors == ['previous error']
+
+
+def test_parse_many_lazy():
+    """
+    lazy mode should parse texts just when requested
+    """
+    texts = iter(['leaf a;', 'leaf b;'])
+    results = parse_many(texts, lazy=True)
+    (ast, _) = next(results)
+    assert ast.arg == 'a'
+    assert next(texts) == 'leaf b;'
+    assert list(results) == []
+
+
 @pytest.fixture
 def ok_yang():
     """YANG modules without errors or warning"""
@@ -175,6 +210,23 @@ def test_parse_from_file(tmpdir, ok_yang):
     test_parse_nested(str(yang_file))
 
 
+def test_parse_text_and_file(tmpdir):
+    """
+    explicit entry points should not guess the kind of input
+    """
+    yang_file = tmpdir.join('leaf.yang')
+    yang_file.write_binary(b'leaf a {\r\n  description "x\r\n  y";\r\n}')
+
+    leaf = parse_file(str(yang_file))
+    assert leaf.pos.ref == str(yang_file)
+    assert find(leaf, 'description')[0].arg == 'x\ny'
+
+    with pytest.raises(SyntaxError):
+        parse_text(str(yang_file))
+
+    assert parse_text('leaf b;', ref='b.yang').pos.ref == 'b.yang'
+
+
 def _featureful_yang():
     """Example of yang file with features"""
     return """
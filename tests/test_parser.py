@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+differential tests for the fast YANG parser backend
+"""
+import io
+import os
+import sys
+from glob import glob
+
+import pytest
+
+from pyang.yang_parser import YangParser
+
+from pyangext.parser import FastYangParser, get_parser
+from pyangext.utils import create_context, objectify, parse
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+CORPUS = sorted(glob(
+    os.path.join(sys.prefix, 'share', 'yang', 'modules', '*', '*.yang')))
+"""YANG modules distributed with ``pyang``"""
+
+SNIPPETS = [
+    'leaf a;',
+    'leaf a {}',
+    'leaf a{type string;}',
+    'container c { leaf a { type string; } }',
+    'a:ext "x" { b:y z; }',
+    'leaf a { pattern a"b*c/d; }',
+    'module a {\n  prefix "a";\n  description\n    "multi\n     line\n\n'
+    '       text";\n}\n',
+    '\t\tleaf a { description\t"a\n\t\t\t  b"; }',
+    'leaf a { description "  \n\n   \t  x\n  y"; }',
+    'container c { description "esc \\n \\t \\" \\\\ end"; }',
+    "leaf a { description 'single\n   quoted \\n';}",
+    'leaf a { description "con" + \n "cat" + \'x\'; }',
+    'leaf a { description "con" // c\n + /* b */ "cat"; }',
+    '/* head */ leaf /*/ x */ a { // line\n type\tstring; }  /* tail */\n',
+    'leaf a { type string; } /* unterminated',
+    u'leaf a { description "\xe9中"; }',
+    # invalid input or unusual constructions (handled by pyang)
+    'leaf a { description "bad \\q"; }',
+    'module m { yang-version 1.1; leaf a { description "x\\y"; } }',
+    'leaf a { description "x\\\n y"; }',
+    'leaf a\r\n{ type string; }\r\n',
+    'leaf a "x"',
+    'leaf a { type string; ',
+    'leaf a; leaf b;',
+    'leaf a { }}',
+    'leaf a { description "x" + y; }',
+    'leaf a { ; }',
+    '1leaf a;',
+    'leaf a { type string }',
+    'leaf a { */ }',
+    'leaf a;b',
+    'leaf',
+    '',
+]
+
+
+def _context(**kwargs):
+    """Minimal context accepted by the parsers"""
+    return objectify(
+        kwargs, errors=[], max_line_len=kwargs.get('max_line_len'),
+        keep_comments=kwargs.get('keep_comments', False),
+        lax_quote_checks=kwargs.get('lax_quote_checks', False))
+
+
+def _parse(parser, text, **kwargs):
+    """Parse text, returning the tree (or exception) and the errors"""
+    ctx = _context(**kwargs)
+    try:
+        tree = parser.parse(ctx, 'input.yang', text)
+    except Exception as ex:  # pylint: disable=broad-except
+        tree = type(ex)
+
+    return (tree, [(str(pos), tag, args) for (pos, tag, args) in ctx.errors])
+
+
+def _compare(expected, actual):
+    """Ensure two statement trees are identical"""
+    if expected is None or isinstance(expected, type):
+        assert actual == expected
+        return
+
+    pairs = [(expected, actual)]
+    while pairs:
+        (stmt, other) = pairs.pop()
+        assert sorted(stmt.__dict__) == sorted(other.__dict__)
+        for attr in ('keyword', 'raw_keyword', 'arg', 'ext_mod'):
+            assert getattr(stmt, attr) == getattr(other, attr)
+            assert type(getattr(stmt, attr)) is type(getattr(other, attr))
+        assert (stmt.pos.ref, stmt.pos.line) == (other.pos.ref, other.pos.line)
+        assert (stmt.top is None) == (other.top is None)
+        assert (other.top or other) is actual
+        assert other.pos.top is actual
+        assert len(stmt.substmts) == len(other.substmts)
+        for child in other.substmts:
+            assert child.parent is other
+        pairs.extend(zip(stmt.substmts, other.substmts))
+
+
+@pytest.mark.parametrize('options', [
+    {},
+    {'max_line_len': 20},
+    {'keep_comments': True},
+    {'lax_quote_checks': True},
+])
+@pytest.mark.parametrize('text', SNIPPETS)
+def test_snippets(text, options):
+    """
+    fast parser should produce the same trees and errors of pyang
+    """
+    (expected, errors) = _parse(YangParser(), text, **options)
+    (actual, fast_errors) = _parse(FastYangParser(), text, **options)
+    _compare(expected, actual)
+    assert fast_errors == errors
+
+
+@pytest.mark.skipif(not CORPUS, reason='pyang modules not installed')
+@pytest.mark.parametrize('filename', CORPUS, ids=os.path.basename)
+def test_corpus(filename):
+    """
+    fast parser should produce the same trees of pyang for real modules
+    """
+    with io.open(filename, 'r', encoding='utf-8') as fp:
+        text = fp.read()
+
+    parser = FastYangParser()
+    (expected, errors) = _parse(YangParser(), text)
+    (actual, fast_errors) = _parse(parser, text)
+    _compare(expected, actual)
+    assert fast_errors == errors
+    assert parser.fallbacks == 0
+
+
+def test_fallback():
+    """
+    texts with problems should be handled by pyang
+    """
+    parser = FastYangParser()
+    _parse(parser, 'leaf a { type string; }')
+    assert parser.fallbacks == 0
+    _parse(parser, 'leaf a { type string }')
+    assert parser.fallbacks == 1
+
+
+def test_selection():
+    """
+    parser backend should be selectable through the context options
+    """
+    ctx = create_context(parser='fast')
+    assert isinstance(ctx.yang_parser, FastYangParser)
+    assert parse('leaf a { type string; }', ctx).arg == 'a'
+    assert ctx.yang_parser.fallbacks == 0
+
+    module = ctx.add_module('a.yang', 'module a { prefix a; }')
+    assert module.arg == 'a'
+
+    assert isinstance(get_parser(), YangParser)
+    with pytest.raises(ValueError):
+        get_parser('unknown')
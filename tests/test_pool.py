@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for context reuse
+"""
+import pytest
+
+from pyangext.pool import ContextPool, pool_key
+from pyangext.utils import parse
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+
+@pytest.fixture
+def pool():
+    """Small pool of contexts"""
+    return ContextPool(maxsize=2)
+
+
+def test_pool_key():
+    """
+    equivalent options should produce the same key
+    different options should produce different keys
+    """
+    assert pool_key('.', {'features': ['a:b']}) == pool_key(
+        '.', features=['a:b'])
+    assert pool_key('.') != pool_key('.', max_line_len=80)
+    assert pool_key('.') != pool_key('other')
+
+
+def test_reuse(pool):
+    """
+    released contexts should be reused for the same options
+    different options should not share contexts
+    """
+    ctx = pool.acquire(max_line_len=80)
+    pool.release(ctx)
+    assert len(pool) == 1
+    assert pool.acquire(max_line_len=80) is ctx
+    assert len(pool) == 0
+    assert pool.acquire(max_line_len=90) is not ctx
+
+
+def test_reset_on_release(pool):
+    """
+    errors should be discarded when released
+    added modules should be removed when released
+    changed options should be reverted when released
+    """
+    with pool.context() as ctx:
+        keep_comments = ctx.keep_comments
+        ctx.opts.warnings = ['none']
+        ctx.keep_comments = not keep_comments
+        ctx.implicit_errors = False
+        ctx.max_line_len = 10
+        ctx.add_module('a', 'module a { namespace urn:a; prefix a; }')
+        parse('leaf a { type string; }', ctx)
+        ctx.errors.append((None, 'EOF_ERROR', ()))
+
+    assert pool.acquire() is ctx
+    assert not ctx.errors
+    assert not ctx.modules
+    assert 'a' not in ctx.revs
+    assert ctx.opts.warnings != ['none']
+    assert ctx.keep_comments == keep_comments
+    assert ctx.implicit_errors
+    assert ctx.max_line_len is None
+
+
+def test_lru_eviction(pool):
+    """
+    the number of idle contexts should be bounded
+    the least recently used context should be evicted
+    released twice should not duplicate the context
+    """
+    contexts = [pool.acquire(max_line_len=size) for size in (70, 80, 90)]
+    for ctx in contexts:
+        pool.release(ctx)
+    pool.release(contexts[-1])
+
+    assert len(pool) == 2
+    assert pool.acquire(max_line_len=70) is not contexts[0]
+    assert pool.acquire(max_line_len=80) is contexts[1]
+    assert pool.acquire(max_line_len=90) is contexts[2]
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for path queries over statement trees
+"""
+import pytest
+
+from pyangext import query as query_module
+from pyangext.query import Query, compile_query, query
+from pyangext.utils import iwalk, parse
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+
+@pytest.fixture
+def module():
+    """YANG module with nested data nodes"""
+    return parse("""
+        module test {
+          namespace urn:yang:test;
+          prefix t;
+          container interfaces {
+            config true;
+            list iface {
+              key name;
+              leaf name { type string; }
+              container stats { config false; leaf in { type int8; } }
+            }
+            list other { leaf x { type t:code; } }
+          }
+          container state { leaf up { type boolean; } }
+          t:ext "info";
+        }""")
+
+
+def _args(nodes):
+    """Arguments of the statements"""
+    return [node.arg for node in nodes]
+
+
+@pytest.mark.parametrize(('expression', 'expected'), [
+    ('module', ['test']),
+    ('container', []),
+    ('module/container', ['interfaces', 'state']),
+    ("module/container[config]/list[@arg='iface']//leaf", ['name', 'in']),
+    ('module/container[config]/list[@arg="iface"]/leaf', ['name']),
+    ('//leaf', ['name', 'in', 'x', 'up']),
+    ('module//container//leaf', ['name', 'in', 'x', 'up']),
+    ("//container[config='false']/*", ['false', 'in']),
+    ('//list[key]', ['iface']),
+    ('//type[@arg="t:code"]', ['t:code']),
+    ('//type[@arg="code"]', []),
+    ('module/t:ext', ['info']),
+    ('module/*[@arg]', ['urn:yang:test', 't', 'interfaces', 'state', 'info']),
+    ('/module/container/container', []),
+    ('//container/*', [  # children grouped by parent
+        'true', 'iface', 'other', 'false', 'in', 'up']),
+])
+def test_query(module, expression, expected):
+    """
+    queries should find statements by keyword, argument and predicates
+    """
+    assert _args(query(module, expression)) == expected
+
+
+def test_ignore_prefix(module):
+    """
+    prefixes should be ignored if requested
+    """
+    assert _args(query(module, '//type[@arg="code"]', True)) == ['t:code']
+    assert _args(query(module, 'module/ext', ignore_prefix=True)) == ['info']
+    assert _args(query([module, module], 'module')) == ['test']
+
+
+def test_lazy_evaluation(module):
+    """
+    results should be generated as soon as they are found
+    """
+    leaves = query(module, '//leaf')
+    assert next(leaves).arg == 'name'
+    stats = next(query(module, '//container[@arg="stats"]'))
+    stats.substmts = []  # not visited yet
+    assert _args(leaves) == ['x', 'up']
+
+    assert compile_query('//leaf').first(module).arg == 'name'
+    assert compile_query('//leaf[@arg="none"]').first(module) is None
+
+
+def test_nested_descendants(monkeypatch):
+    """
+    subtrees should not be walked again for nested matches
+    """
+    text = ''.join('container c%d { leaf a%d; leaf b%d; ' % (i, i, i)
+                   for i in range(12)) + '}' * 12
+    root = parse(text)
+    nodes = list(iwalk(root))
+    visits = []
+
+    def _iwalk(*args, **kwargs):
+        for node in iwalk(*args, **kwargs):
+            visits.append(node)
+            yield node
+
+    monkeypatch.setattr(query_module, 'iwalk', _iwalk)
+    leaves = list(query(root, '//container//leaf'))
+    assert leaves == [node for node in nodes if node.keyword == 'leaf']
+    assert len(visits) <= 2 * len(nodes)
+
+
+@pytest.mark.parametrize('expression', [
+    '', '/', 'module/', 'module//', 'module/[config]', 'module[config',
+    'module container', "leaf[@arg='x]", '[config]', 'a:b:c',
+])
+def test_invalid(expression):
+    """
+    invalid expressions should be rejected
+    """
+    with pytest.raises(ValueError):
+        Query(expression)
+
+
+def test_cache():
+    """
+    compiled queries should be reused
+    """
+    compiled = compile_query('module/leaf')
+    assert compiled is compile_query('module/leaf')
+    assert compiled is not compile_query('module/leaf', ignore_prefix=True)
+    assert repr(compiled) == "Query('module/leaf')"
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for module repositories
+"""
+import os
+
+import pytest
+
+from pyang import FileRepository
+
+from pyangext.repository import IndexedRepository
+from pyangext.utils import create_context
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+
+@pytest.fixture
+def models(tmpdir):
+    """Nested directories with YANG modules"""
+    models = tmpdir.mkdir('models')
+    models.join('a.yang').write('module a { namespace urn:a; prefix a; }')
+    vendor = models.mkdir('vendor')
+    vendor.join('b@2016-01-01.yang').write(
+        'module b { namespace urn:b; prefix b; revision 2016-01-01; }')
+    vendor.join('b@2016-02-01.yang').write(
+        'module b { namespace urn:b; prefix b; revision 2016-02-01; }')
+    vendor.join('README').write('not a module')
+    models.mkdir('empty')
+
+    return models
+
+
+def _age(*dirs):
+    """Make directory timestamps old enough to be trusted by the index"""
+    for directory in dirs:
+        os.utime(str(directory), (1000000000, 1000000000))
+
+
+def test_same_modules_as_pyang(models):
+    """
+    indexed repository should find the same modules as pyang
+    """
+    expected = FileRepository(str(models), use_env=False)
+    indexed = IndexedRepository(str(models), use_env=False)
+
+    assert (sorted(indexed.get_modules_and_revisions(None)) ==
+            sorted(expected.get_modules_and_revisions(None)))
+
+
+def test_lookup(models):
+    """
+    lookup should find the latest revision by default
+    lookup should find specific revisions
+    lookup should return None for unknown modules
+    """
+    repo = IndexedRepository(str(models), use_env=False)
+
+    assert repo.lookup('a')[1].endswith('a.yang')
+    assert repo.lookup('b')[1].endswith('b@2016-02-01.yang')
+    assert repo.lookup('b', '2016-01-01')[1].endswith('b@2016-01-01.yang')
+    assert repo.lookup('b', '2017-01-01') is None
+    assert repo.lookup('c') is None
+
+
+def test_persisted_index(tmpdir, models):
+    """
+    index should be persisted and reused
+    only changed directories should be listed again
+    """
+    index_file = str(tmpdir.join('index.json'))
+    _age(models, models.join('vendor'), models.join('empty'))
+
+    repo = IndexedRepository(str(models), index_file, use_env=False)
+    repo.get_modules_and_revisions(None)
+    assert repo.stats == {'listed': 3, 'reused': 0}
+
+    repo = IndexedRepository(str(models), index_file, use_env=False)
+    repo.get_modules_and_revisions(None)
+    assert repo.stats == {'listed': 0, 'reused': 3}
+
+    models.join('empty', 'c.yang').write(
+        'module c { namespace urn:c; prefix c; }')
+    repo = IndexedRepository(str(models), index_file, use_env=False)
+    repo.get_modules_and_revisions(None)
+    assert repo.stats == {'listed': 1, 'reused': 2}
+    assert repo.lookup('c')
+
+
+def test_create_context(tmpdir, models):
+    """
+    create_context should use index when ``index_file`` is given
+    modules should be found in the context
+    """
+    index_file = str(tmpdir.join('index.json'))
+    ctx = create_context(str(models), index_file=index_file)
+    assert isinstance(ctx.repository, IndexedRepository)
+    assert ctx.search_module(None, 'b').search_one('revision').arg == (
+        '2016-02-01')
+    assert os.path.isfile(index_file)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for compact serialization of statement trees
+"""
+import json
+import pickle
+import struct
+
+import pytest
+
+from pyangext.serialize import FORMAT_VERSION, dumps, loads
+from pyangext.utils import create_context, dump, parse, walk
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+MODULE = """
+module test {
+  namespace "urn:yang:test";
+  prefix t;
+  description "multi\n  line";
+  ext:info "x" { ext:detail; }
+  container c {
+    leaf a { type string; }
+    leaf-list b { type int8; }
+  }
+}
+"""
+
+
+def _attrs(node):
+    """Relevant attributes of all the statements in a tree"""
+    return walk(node, apply=lambda stmt: (
+        stmt.keyword, stmt.raw_keyword, stmt.arg, stmt.ext_mod,
+        stmt.pos.ref, stmt.pos.line, len(stmt.substmts)))
+
+
+@pytest.mark.parametrize('fmt', ['binary', 'json'])
+def test_round_trip(fmt):
+    """
+    loads should rebuild the tree serialized by dumps
+    """
+    module = parse(MODULE)
+    data = dumps(module, fmt)
+    copy = loads(data)
+
+    assert _attrs(copy) == _attrs(module)
+    assert dump(copy) == dump(module)
+    assert copy.top is None and copy.parent is None
+    for stmt in walk(copy)[1:]:
+        assert stmt.top is copy and stmt.pos.top is copy
+        assert stmt in stmt.parent.substmts
+
+    if fmt == 'binary':
+        assert len(data) < len(pickle.dumps(module, 2))
+
+
+def test_annotations():
+    """
+    selected annotations should be serialized, including references
+    """
+    ctx = create_context()
+    module = ctx.add_module('test.yang', MODULE.replace('ext:', 't:'))
+    module.i_extra = {'tags': ['a', 'b']}
+    container = module.search_one('container')
+    container.i_first = container.substmts[0]
+
+    for fmt in ('binary', 'json'):
+        copy = loads(dumps(module, fmt, ['i_extra', 'i_first']))
+        assert copy.i_extra == {'tags': ['a', 'b']}
+        copy_container = copy.search_one('container')
+        assert copy_container.i_first is copy_container.substmts[0]
+        assert not hasattr(copy, 'i_prefixes')
+
+    with pytest.raises(ValueError):
+        dumps(container, annotations=['i_module'])
+
+
+def test_errors():
+    """
+    invalid formats should be rejected
+    """
+    module = parse('leaf a { type string; }')
+    with pytest.raises(ValueError):
+        dumps(module, 'xml')
+
+    data = dumps(module, 'json').replace(
+        '"version":{}'.format(FORMAT_VERSION), '"version":0')
+    with pytest.raises(ValueError):
+        loads(data)
+
+    data = dumps(module)
+    with pytest.raises(ValueError):
+        loads(data[:-2])
+    with pytest.raises(ValueError):
+        loads(data[:5])
+
+
+def test_binary_layout():
+    """
+    binary format should be independent of the platform and not use
+    pickle (loading it should not execute code)
+    """
+    module = parse('leaf a { type string; }')
+    data = dumps(module)
+    (version, size, count) = struct.unpack_from('<BII', data, 3)
+    assert version == FORMAT_VERSION
+    fields = struct.unpack_from('<{}i'.format(count), data, 12 + size)
+    assert list(fields) == json.loads(dumps(module, 'json'))['statements']
+    assert fields[6] == 1 and fields[-1] == 0  # substatements
+
+    class _Exploit(object):  # pylint: disable=too-few-public-methods
+        def __reduce__(self):
+            return (pytest.fail, ('pickle data was loaded',))
+
+    with pytest.raises(ValueError):  # previous (pickle based) version
+        loads(b'PYX\x01' + pickle.dumps(_Exploit(), 2))
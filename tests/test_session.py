@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=redefined-outer-name
+"""
+tests for incremental validation
+"""
+import pytest
+
+from pyangext.session import Session
+from pyangext.utils import create_context
+
+__author__ = "Anderson Bravalheri"
+__copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
+__license__ = "mozilla"
+
+TYPEDEF = 'module b {{ namespace urn:b; prefix b; typedef {} {{ type {}; }} }}'
+
+
+@pytest.fixture
+def models(tmpdir):
+    """Directory with YANG modules: ``a`` depends on ``b``"""
+    models = tmpdir.mkdir('models')
+    models.join('a.yang').write("""
+        module a {
+          namespace urn:a; prefix a;
+          import b { prefix b; }
+          leaf x { type b:code; }
+        }""")
+    models.join('b.yang').write(TYPEDEF.format('code', 'string'))
+    models.join('c.yang').write('module c { namespace urn:c; prefix c; }')
+
+    return models
+
+
+@pytest.fixture
+def session(models):
+    """Session tracking all the modules"""
+    return Session([str(models)], create_context(str(models)))
+
+
+def test_first_refresh(models, session):
+    """
+    first refresh should load and validate all modules
+    """
+    delta = session.refresh()
+    assert len(delta.changed) == 3
+    assert len(delta.revalidated) == 3
+    assert not delta.added
+    assert session.modules[str(models.join('a.yang'))].i_is_validated
+
+    delta = session.refresh()
+    assert not delta
+    assert not delta.revalidated
+
+
+def test_incremental_refresh(models, session):
+    """
+    changed modules and dependents should be revalidated
+    independent modules should be kept
+    new and resolved diagnostics should be reported
+    """
+    session.refresh()
+    module_c = session.modules[str(models.join('c.yang'))]
+
+    models.join('b.yang').write(TYPEDEF.format('other-code', 'string'))
+    delta = session.refresh()
+    assert delta.changed == [str(models.join('b.yang'))]
+    assert sorted(delta.revalidated) == [
+        str(models.join('a.yang')), str(models.join('b.yang'))]
+    assert len(delta.added) == 1
+    assert 'a.yang' in delta.added[0]
+    assert session.modules[str(models.join('c.yang'))] is module_c
+    assert session.diagnostics[str(models.join('a.yang'))]
+
+    models.join('b.yang').write(TYPEDEF.format('code', 'int8'))
+    delta = session.refresh()
+    assert not delta.added
+    assert len(delta.resolved) == 1
+    assert not session.diagnostics
+    assert len(session.ctx.errors) == 0
+
+
+def test_removed_file(models, session):
+    """
+    removed dependencies should be reported as errors in dependents
+    """
+    session.refresh()
+    models.join('b.yang').remove()
+    delta = session.refresh()
+
+    assert delta.removed == [str(models.join('b.yang'))]
+    assert delta.revalidated == [str(models.join('a.yang'))]
+    assert len(delta.added) == 1
+    assert str(models.join('b.yang')) not in session.modules
+
+
+def test_syntax_error(models, session):
+    """
+    errors of files that cannot be parsed should be reported
+    """
+    session.refresh()
+    filename = str(models.join('c.yang'))
+    models.join('c.yang').write('module c { namespace urn:c; prefix c; ')
+    delta = session.refresh()
+
+    assert delta.changed == [filename]
+    assert len(delta.added) == 1
+    assert 'c.yang' in delta.added[0]
+    assert session.diagnostics[filename] == delta.added
+    assert filename not in session.modules
+
+    models.join('c.yang').write('module c { namespace urn:c; prefix c; }')
+    delta = session.refresh()
+    assert len(delta.resolved) == 1
+    assert not session.diagnostics
+
+
+def test_read_error(models, session):
+    """
+    files that cannot be read should be reported, not stop the refresh
+    """
+    session.refresh()
+    filename = str(models.join('c.yang'))
+    models.join('c.yang').write_binary(b'module c { description "\xff"; }')
+    delta = session.refresh()
+
+    assert delta.changed == [filename]
+    assert len(delta.added) == 1
+    assert 'read error' in session.diagnostics[filename][0]
+    assert filename not in session.modules
+
+    models.join('c.yang').write('module c { namespace urn:c; prefix c; }')
+    delta = session.refresh()
+    assert len(delta.resolved) == 1
+    assert not session.diagnostics
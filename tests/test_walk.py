@@ -7,7 +7,7 @@ import pytest
 
 from pyang.statements import validate_module
 
-from pyangext.utils import create_context, parse, walk
+from pyangext.utils import create_context, iwalk, parse, walk
 
 __author__ = "Anderson Bravalheri"
 __copyright__ = "Copyright (C) 2016 Anderson Bravalheri"
@@ -74,3 +74,77 @@ def test_walk(module):
 
     assert len(walk(module, is_uses, key='substmts')) == 1
     assert len(walk(module, is_uses, key='i_children')) == 0
+
+
+def _args(nodes):
+    """Arguments of the statements with children"""
+    return [node.arg for node in nodes if node.substmts]
+
+
+def test_iwalk_orders(module):
+    """
+    iwalk should generate nodes in pre-order, post-order or breadth-first
+    """
+    assert list(iwalk(module)) == walk(module)
+    assert _args(iwalk(module)) == [
+        'test', '2008-01-02', 'code', 'string', 'identification',
+        'part-number', 'serial-number', 'name', 'id']
+    assert _args(iwalk(module, 'post')) == [
+        '2008-01-02', 'string', 'code', 'part-number', 'serial-number',
+        'identification', 'name', 'id', 'test']
+    assert _args(iwalk(module, 'breadth')) == [
+        'test', '2008-01-02', 'code', 'identification', 'name', 'id',
+        'string', 'part-number', 'serial-number']
+
+    with pytest.raises(ValueError):
+        list(iwalk(module, 'in'))
+
+
+def test_iwalk_pruning(module):
+    """
+    pruned nodes and nodes deeper than max_depth should not be expanded
+    """
+    nodes = list(iwalk(module, max_depth=1))
+    assert nodes[0] is module and nodes[1:] == module.substmts
+
+    def is_grouping(node):
+        """check if node is grouping"""
+        return node.keyword == 'grouping'
+
+    args = _args(iwalk(module, prune=is_grouping))
+    assert 'identification' in args and 'part-number' not in args
+
+    assert len(list(iwalk(module, key='i_children'))) == 5
+
+
+def test_iwalk_early_termination():
+    """
+    iwalk should not visit the entire tree to find the first match
+    """
+    visited = []
+
+    class Node(object):
+        """node recording visits to its children"""
+        # pylint: disable=too-few-public-methods
+
+        def __init__(self, keyword, children=()):
+            self.keyword = keyword
+            self._children = list(children)
+
+        @property
+        def substmts(self):
+            """children of the node"""
+            visited.append(self)
+            return self._children
+
+    deep = Node('leaf')
+    for _ in range(5000):  # deeper than the recursion limit
+        deep = Node('container', [deep])
+    first = Node('leaf')
+    root = Node('module', [first, deep])
+
+    found = next(node for node in iwalk(root) if node.keyword == 'leaf')
+    assert found is first
+    assert visited == [root]
+
+    assert len(walk(root)) == 5003